@@ -15,9 +15,9 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
     QFont, QFontDatabase, QGradient, QIcon,
     QImage, QKeySequence, QLinearGradient, QPainter,
     QPalette, QPixmap, QRadialGradient, QTransform)
-from PySide6.QtWidgets import (QAbstractSpinBox, QApplication, QDoubleSpinBox, QFrame,
-    QLCDNumber, QLabel, QListWidget, QListWidgetItem,
-    QMainWindow, QPushButton, QSizePolicy, QSpinBox,
+from PySide6.QtWidgets import (QAbstractSpinBox, QApplication, QComboBox, QDateTimeEdit,
+    QDoubleSpinBox, QFrame, QLCDNumber, QLabel, QLineEdit, QListWidget, QListWidgetItem,
+    QMainWindow, QProgressBar, QPushButton, QSizePolicy, QSpinBox,
     QStatusBar, QTabWidget, QWidget)
 
 class Ui_MainWindow(object):
@@ -190,6 +190,69 @@ class Ui_MainWindow(object):
         self.label_90 = QLabel(self.Container_12)
         self.label_90.setObjectName(u"label_90")
         self.label_90.setGeometry(QRect(0, 0, 55, 16))
+        self.widget_10 = QWidget(self.tab)
+        self.widget_10.setObjectName(u"widget_10")
+        self.widget_10.setGeometry(QRect(960, 20, 541, 251))
+        self.frame_17 = QFrame(self.widget_10)
+        self.frame_17.setObjectName(u"frame_17")
+        self.frame_17.setGeometry(QRect(0, 20, 541, 231))
+        self.frame_17.setFrameShape(QFrame.Shape.StyledPanel)
+        self.frame_17.setFrameShadow(QFrame.Shadow.Raised)
+        self.label_130 = QLabel(self.frame_17)
+        self.label_130.setObjectName(u"label_130")
+        self.label_130.setGeometry(QRect(10, 10, 171, 16))
+        self.dateTimeEdit_ExportStart = QDateTimeEdit(self.frame_17)
+        self.dateTimeEdit_ExportStart.setObjectName(u"dateTimeEdit_ExportStart")
+        self.dateTimeEdit_ExportStart.setGeometry(QRect(10, 30, 181, 41))
+        self.dateTimeEdit_ExportStart.setCalendarPopup(True)
+        self.label_131 = QLabel(self.frame_17)
+        self.label_131.setObjectName(u"label_131")
+        self.label_131.setGeometry(QRect(210, 10, 171, 16))
+        self.dateTimeEdit_ExportEnd = QDateTimeEdit(self.frame_17)
+        self.dateTimeEdit_ExportEnd.setObjectName(u"dateTimeEdit_ExportEnd")
+        self.dateTimeEdit_ExportEnd.setGeometry(QRect(210, 30, 181, 41))
+        self.dateTimeEdit_ExportEnd.setCalendarPopup(True)
+        self.label_132 = QLabel(self.frame_17)
+        self.label_132.setObjectName(u"label_132")
+        self.label_132.setGeometry(QRect(410, 10, 121, 16))
+        self.comboBox_ExportFormat = QComboBox(self.frame_17)
+        self.comboBox_ExportFormat.setObjectName(u"comboBox_ExportFormat")
+        self.comboBox_ExportFormat.setGeometry(QRect(410, 30, 121, 41))
+        self.label_133 = QLabel(self.frame_17)
+        self.label_133.setObjectName(u"label_133")
+        self.label_133.setGeometry(QRect(10, 80, 171, 16))
+        self.pushButton_ExportA = QPushButton(self.frame_17)
+        self.pushButton_ExportA.setObjectName(u"pushButton_ExportA")
+        self.pushButton_ExportA.setGeometry(QRect(10, 100, 61, 41))
+        self.pushButton_ExportA.setCheckable(True)
+        self.pushButton_ExportA.setChecked(True)
+        self.pushButton_ExportB = QPushButton(self.frame_17)
+        self.pushButton_ExportB.setObjectName(u"pushButton_ExportB")
+        self.pushButton_ExportB.setGeometry(QRect(80, 100, 61, 41))
+        self.pushButton_ExportB.setCheckable(True)
+        self.pushButton_ExportB.setChecked(True)
+        self.pushButton_ExportC = QPushButton(self.frame_17)
+        self.pushButton_ExportC.setObjectName(u"pushButton_ExportC")
+        self.pushButton_ExportC.setGeometry(QRect(150, 100, 61, 41))
+        self.pushButton_ExportC.setCheckable(True)
+        self.pushButton_ExportC.setChecked(True)
+        self.pushButton_Export = QPushButton(self.frame_17)
+        self.pushButton_Export.setObjectName(u"pushButton_Export")
+        self.pushButton_Export.setGeometry(QRect(290, 100, 111, 41))
+        self.pushButton_ExportCancel = QPushButton(self.frame_17)
+        self.pushButton_ExportCancel.setObjectName(u"pushButton_ExportCancel")
+        self.pushButton_ExportCancel.setGeometry(QRect(420, 100, 111, 41))
+        self.pushButton_ExportCancel.setEnabled(False)
+        self.progressBar_Export = QProgressBar(self.frame_17)
+        self.progressBar_Export.setObjectName(u"progressBar_Export")
+        self.progressBar_Export.setGeometry(QRect(10, 160, 521, 23))
+        self.progressBar_Export.setValue(0)
+        self.label_ExportStatus = QLabel(self.frame_17)
+        self.label_ExportStatus.setObjectName(u"label_ExportStatus")
+        self.label_ExportStatus.setGeometry(QRect(10, 195, 521, 16))
+        self.label_134 = QLabel(self.widget_10)
+        self.label_134.setObjectName(u"label_134")
+        self.label_134.setGeometry(QRect(0, 0, 161, 16))
         self.tabWidget.addTab(self.tab, "")
         self.Paramtres = QWidget()
         self.Paramtres.setObjectName(u"Paramtres")
@@ -233,6 +296,34 @@ class Ui_MainWindow(object):
         self.label_55 = QLabel(self.numInput_13)
         self.label_55.setObjectName(u"label_55")
         self.label_55.setGeometry(QRect(130, 40, 18, 16))
+        self.numInput_15 = QWidget(self.frame)
+        self.numInput_15.setObjectName(u"numInput_15")
+        self.numInput_15.setGeometry(QRect(180, 70, 149, 61))
+        self.label_93 = QLabel(self.numInput_15)
+        self.label_93.setObjectName(u"label_93")
+        self.label_93.setGeometry(QRect(0, 0, 149, 16))
+        self.spinBox_diskQuota = QSpinBox(self.numInput_15)
+        self.spinBox_diskQuota.setObjectName(u"spinBox_diskQuota")
+        self.spinBox_diskQuota.setGeometry(QRect(0, 20, 121, 41))
+        self.spinBox_diskQuota.setMaximum(10000)
+        self.spinBox_diskQuota.setValue(0)
+        self.label_94 = QLabel(self.numInput_15)
+        self.label_94.setObjectName(u"label_94")
+        self.label_94.setGeometry(QRect(130, 40, 18, 16))
+        self.numInput_16 = QWidget(self.frame)
+        self.numInput_16.setObjectName(u"numInput_16")
+        self.numInput_16.setGeometry(QRect(180, 140, 149, 61))
+        self.label_95 = QLabel(self.numInput_16)
+        self.label_95.setObjectName(u"label_95")
+        self.label_95.setGeometry(QRect(0, 0, 149, 16))
+        self.spinBox_retentionDays = QSpinBox(self.numInput_16)
+        self.spinBox_retentionDays.setObjectName(u"spinBox_retentionDays")
+        self.spinBox_retentionDays.setGeometry(QRect(0, 20, 121, 41))
+        self.spinBox_retentionDays.setMaximum(3650)
+        self.spinBox_retentionDays.setValue(0)
+        self.label_96 = QLabel(self.numInput_16)
+        self.label_96.setObjectName(u"label_96")
+        self.label_96.setGeometry(QRect(130, 40, 30, 16))
         self.label_44 = QLabel(self.frame)
         self.label_44.setObjectName(u"label_44")
         self.label_44.setGeometry(QRect(10, 210, 197, 16))
@@ -271,6 +362,286 @@ class Ui_MainWindow(object):
         self.label_22 = QLabel(self.widget_2)
         self.label_22.setObjectName(u"label_22")
         self.label_22.setGeometry(QRect(0, 0, 161, 16))
+        self.widget_3 = QWidget(self.Paramtres)
+        self.widget_3.setObjectName(u"widget_3")
+        self.widget_3.setGeometry(QRect(20, 320, 621, 284))
+        self.frame_6 = QFrame(self.widget_3)
+        self.frame_6.setObjectName(u"frame_6")
+        self.frame_6.setGeometry(QRect(0, 20, 621, 264))
+        self.frame_6.setFrameShape(QFrame.Shape.StyledPanel)
+        self.frame_6.setFrameShadow(QFrame.Shadow.Raised)
+        self.label_91 = QLabel(self.frame_6)
+        self.label_91.setObjectName(u"label_91")
+        self.label_91.setGeometry(QRect(10, 10, 197, 16))
+        self.pushButton_DiagnosticsOnOff = QPushButton(self.frame_6)
+        self.pushButton_DiagnosticsOnOff.setObjectName(u"pushButton_DiagnosticsOnOff")
+        self.pushButton_DiagnosticsOnOff.setGeometry(QRect(10, 30, 75, 24))
+        self.pushButton_DiagnosticsOnOff.setCheckable(True)
+        self.pushButton_DiagnosticsOnOff.setChecked(False)
+        self.pushButton_DiagnosticsReset = QPushButton(self.frame_6)
+        self.pushButton_DiagnosticsReset.setObjectName(u"pushButton_DiagnosticsReset")
+        self.pushButton_DiagnosticsReset.setGeometry(QRect(420, 30, 90, 24))
+        self.pushButton_DiagnosticsDump = QPushButton(self.frame_6)
+        self.pushButton_DiagnosticsDump.setObjectName(u"pushButton_DiagnosticsDump")
+        self.pushButton_DiagnosticsDump.setGeometry(QRect(520, 30, 80, 24))
+        self.listWidget_Diagnostics = QListWidget(self.frame_6)
+        self.listWidget_Diagnostics.setObjectName(u"listWidget_Diagnostics")
+        self.listWidget_Diagnostics.setGeometry(QRect(10, 61, 591, 191))
+        self.listWidget_Diagnostics.setFrameShape(QFrame.Shape.Box)
+        self.label_92 = QLabel(self.widget_3)
+        self.label_92.setObjectName(u"label_92")
+        self.label_92.setGeometry(QRect(0, 0, 161, 16))
+        self.widget_4 = QWidget(self.Paramtres)
+        self.widget_4.setObjectName(u"widget_4")
+        self.widget_4.setGeometry(QRect(700, 320, 621, 284))
+        self.frame_15 = QFrame(self.widget_4)
+        self.frame_15.setObjectName(u"frame_15")
+        self.frame_15.setGeometry(QRect(0, 20, 621, 264))
+        self.frame_15.setFrameShape(QFrame.Shape.StyledPanel)
+        self.frame_15.setFrameShadow(QFrame.Shadow.Raised)
+        self.label_97 = QLabel(self.frame_15)
+        self.label_97.setObjectName(u"label_97")
+        self.label_97.setGeometry(QRect(10, 10, 149, 16))
+        self.lineEdit_FilterA = QLineEdit(self.frame_15)
+        self.lineEdit_FilterA.setObjectName(u"lineEdit_FilterA")
+        self.lineEdit_FilterA.setGeometry(QRect(10, 28, 591, 24))
+        self.label_98 = QLabel(self.frame_15)
+        self.label_98.setObjectName(u"label_98")
+        self.label_98.setGeometry(QRect(10, 60, 149, 16))
+        self.lineEdit_FilterB = QLineEdit(self.frame_15)
+        self.lineEdit_FilterB.setObjectName(u"lineEdit_FilterB")
+        self.lineEdit_FilterB.setGeometry(QRect(10, 78, 591, 24))
+        self.label_99 = QLabel(self.frame_15)
+        self.label_99.setObjectName(u"label_99")
+        self.label_99.setGeometry(QRect(10, 110, 149, 16))
+        self.lineEdit_FilterC = QLineEdit(self.frame_15)
+        self.lineEdit_FilterC.setObjectName(u"lineEdit_FilterC")
+        self.lineEdit_FilterC.setGeometry(QRect(10, 128, 591, 24))
+        self.label_100 = QLabel(self.frame_15)
+        self.label_100.setObjectName(u"label_100")
+        self.label_100.setGeometry(QRect(10, 170, 591, 41))
+        self.label_100.setWordWrap(True)
+        self.label_101 = QLabel(self.widget_4)
+        self.label_101.setObjectName(u"label_101")
+        self.label_101.setGeometry(QRect(0, 0, 161, 16))
+        self.widget_5 = QWidget(self.Paramtres)
+        self.widget_5.setObjectName(u"widget_5")
+        self.widget_5.setGeometry(QRect(1380, 20, 491, 284))
+        self.frame_16 = QFrame(self.widget_5)
+        self.frame_16.setObjectName(u"frame_16")
+        self.frame_16.setGeometry(QRect(0, 20, 491, 264))
+        self.frame_16.setFrameShape(QFrame.Shape.StyledPanel)
+        self.frame_16.setFrameShadow(QFrame.Shadow.Raised)
+        self.label_102 = QLabel(self.frame_16)
+        self.label_102.setObjectName(u"label_102")
+        self.label_102.setGeometry(QRect(10, 10, 149, 16))
+        self.lineEdit_MathM1 = QLineEdit(self.frame_16)
+        self.lineEdit_MathM1.setObjectName(u"lineEdit_MathM1")
+        self.lineEdit_MathM1.setGeometry(QRect(10, 28, 461, 24))
+        self.label_103 = QLabel(self.frame_16)
+        self.label_103.setObjectName(u"label_103")
+        self.label_103.setGeometry(QRect(10, 60, 149, 16))
+        self.lineEdit_MathM2 = QLineEdit(self.frame_16)
+        self.lineEdit_MathM2.setObjectName(u"lineEdit_MathM2")
+        self.lineEdit_MathM2.setGeometry(QRect(10, 78, 461, 24))
+        self.label_104 = QLabel(self.frame_16)
+        self.label_104.setObjectName(u"label_104")
+        self.label_104.setGeometry(QRect(10, 120, 461, 61))
+        self.label_104.setWordWrap(True)
+        self.label_105 = QLabel(self.widget_5)
+        self.label_105.setObjectName(u"label_105")
+        self.label_105.setGeometry(QRect(0, 0, 161, 16))
+        self.widget_6 = QWidget(self.Paramtres)
+        self.widget_6.setObjectName(u"widget_6")
+        self.widget_6.setGeometry(QRect(1380, 320, 491, 284))
+        self.frame_9 = QFrame(self.widget_6)
+        self.frame_9.setObjectName(u"frame_9")
+        self.frame_9.setGeometry(QRect(0, 20, 491, 264))
+        self.frame_9.setFrameShape(QFrame.Shape.StyledPanel)
+        self.frame_9.setFrameShadow(QFrame.Shadow.Raised)
+        self.label_106 = QLabel(self.frame_9)
+        self.label_106.setObjectName(u"label_106")
+        self.label_106.setGeometry(QRect(10, 10, 197, 16))
+        self.pushButton_RecorderOnOff = QPushButton(self.frame_9)
+        self.pushButton_RecorderOnOff.setObjectName(u"pushButton_RecorderOnOff")
+        self.pushButton_RecorderOnOff.setGeometry(QRect(10, 30, 75, 24))
+        self.pushButton_RecorderOnOff.setCheckable(True)
+        self.pushButton_RecorderOnOff.setChecked(False)
+        self.pushButton_RecorderTrigger = QPushButton(self.frame_9)
+        self.pushButton_RecorderTrigger.setObjectName(u"pushButton_RecorderTrigger")
+        self.pushButton_RecorderTrigger.setGeometry(QRect(380, 30, 91, 24))
+        self.label_107 = QLabel(self.frame_9)
+        self.label_107.setObjectName(u"label_107")
+        self.label_107.setGeometry(QRect(10, 70, 149, 16))
+        self.doubleSpinBox_preTrigger = QDoubleSpinBox(self.frame_9)
+        self.doubleSpinBox_preTrigger.setObjectName(u"doubleSpinBox_preTrigger")
+        self.doubleSpinBox_preTrigger.setGeometry(QRect(10, 90, 121, 31))
+        self.doubleSpinBox_preTrigger.setDecimals(1)
+        self.doubleSpinBox_preTrigger.setMinimum(0.1)
+        self.doubleSpinBox_preTrigger.setMaximum(600.0)
+        self.doubleSpinBox_preTrigger.setSingleStep(1.0)
+        self.doubleSpinBox_preTrigger.setValue(5.0)
+        self.label_108 = QLabel(self.frame_9)
+        self.label_108.setObjectName(u"label_108")
+        self.label_108.setGeometry(QRect(140, 105, 21, 16))
+        self.label_109 = QLabel(self.frame_9)
+        self.label_109.setObjectName(u"label_109")
+        self.label_109.setGeometry(QRect(250, 70, 149, 16))
+        self.doubleSpinBox_postTrigger = QDoubleSpinBox(self.frame_9)
+        self.doubleSpinBox_postTrigger.setObjectName(u"doubleSpinBox_postTrigger")
+        self.doubleSpinBox_postTrigger.setGeometry(QRect(250, 90, 121, 31))
+        self.doubleSpinBox_postTrigger.setDecimals(1)
+        self.doubleSpinBox_postTrigger.setMinimum(0.0)
+        self.doubleSpinBox_postTrigger.setMaximum(600.0)
+        self.doubleSpinBox_postTrigger.setSingleStep(1.0)
+        self.doubleSpinBox_postTrigger.setValue(1.0)
+        self.label_110 = QLabel(self.frame_9)
+        self.label_110.setObjectName(u"label_110")
+        self.label_110.setGeometry(QRect(380, 105, 21, 16))
+        self.label_111 = QLabel(self.frame_9)
+        self.label_111.setObjectName(u"label_111")
+        self.label_111.setGeometry(QRect(10, 135, 197, 16))
+        self.comboBox_TriggerChannel = QComboBox(self.frame_9)
+        self.comboBox_TriggerChannel.setObjectName(u"comboBox_TriggerChannel")
+        self.comboBox_TriggerChannel.setGeometry(QRect(10, 155, 121, 31))
+        self.doubleSpinBox_triggerLevel = QDoubleSpinBox(self.frame_9)
+        self.doubleSpinBox_triggerLevel.setObjectName(u"doubleSpinBox_triggerLevel")
+        self.doubleSpinBox_triggerLevel.setGeometry(QRect(250, 155, 121, 31))
+        self.doubleSpinBox_triggerLevel.setDecimals(1)
+        self.doubleSpinBox_triggerLevel.setMinimum(-20000.0)
+        self.doubleSpinBox_triggerLevel.setMaximum(20000.0)
+        self.doubleSpinBox_triggerLevel.setSingleStep(100.0)
+        self.doubleSpinBox_triggerLevel.setValue(1000.0)
+        self.label_112 = QLabel(self.frame_9)
+        self.label_112.setObjectName(u"label_112")
+        self.label_112.setGeometry(QRect(380, 170, 31, 16))
+        self.label_RecorderStatus = QLabel(self.frame_9)
+        self.label_RecorderStatus.setObjectName(u"label_RecorderStatus")
+        self.label_RecorderStatus.setGeometry(QRect(10, 205, 461, 41))
+        self.label_RecorderStatus.setWordWrap(True)
+        self.label_114 = QLabel(self.widget_6)
+        self.label_114.setObjectName(u"label_114")
+        self.label_114.setGeometry(QRect(0, 0, 161, 16))
+        self.widget_7 = QWidget(self.Paramtres)
+        self.widget_7.setObjectName(u"widget_7")
+        self.widget_7.setGeometry(QRect(20, 620, 621, 181))
+        self.frame_10 = QFrame(self.widget_7)
+        self.frame_10.setObjectName(u"frame_10")
+        self.frame_10.setGeometry(QRect(0, 20, 621, 161))
+        self.frame_10.setFrameShape(QFrame.Shape.StyledPanel)
+        self.frame_10.setFrameShadow(QFrame.Shadow.Raised)
+        self.label_115 = QLabel(self.frame_10)
+        self.label_115.setObjectName(u"label_115")
+        self.label_115.setGeometry(QRect(10, 10, 149, 16))
+        self.spinBox_memoryBudget = QSpinBox(self.frame_10)
+        self.spinBox_memoryBudget.setObjectName(u"spinBox_memoryBudget")
+        self.spinBox_memoryBudget.setGeometry(QRect(10, 30, 121, 41))
+        self.spinBox_memoryBudget.setMaximum(65536)
+        self.spinBox_memoryBudget.setSingleStep(128)
+        self.spinBox_memoryBudget.setValue(1024)
+        self.label_116 = QLabel(self.frame_10)
+        self.label_116.setObjectName(u"label_116")
+        self.label_116.setGeometry(QRect(140, 50, 21, 16))
+        self.label_MemoryUsage = QLabel(self.frame_10)
+        self.label_MemoryUsage.setObjectName(u"label_MemoryUsage")
+        self.label_MemoryUsage.setGeometry(QRect(180, 10, 421, 16))
+        self.listWidget_Memory = QListWidget(self.frame_10)
+        self.listWidget_Memory.setObjectName(u"listWidget_Memory")
+        self.listWidget_Memory.setGeometry(QRect(180, 30, 421, 121))
+        self.listWidget_Memory.setFrameShape(QFrame.Shape.Box)
+        self.label_117 = QLabel(self.widget_7)
+        self.label_117.setObjectName(u"label_117")
+        self.label_117.setGeometry(QRect(0, 0, 161, 16))
+        self.widget_8 = QWidget(self.Paramtres)
+        self.widget_8.setObjectName(u"widget_8")
+        self.widget_8.setGeometry(QRect(700, 620, 621, 181))
+        self.frame_11 = QFrame(self.widget_8)
+        self.frame_11.setObjectName(u"frame_11")
+        self.frame_11.setGeometry(QRect(0, 20, 621, 161))
+        self.frame_11.setFrameShape(QFrame.Shape.StyledPanel)
+        self.frame_11.setFrameShadow(QFrame.Shadow.Raised)
+        self.label_119 = QLabel(self.frame_11)
+        self.label_119.setObjectName(u"label_119")
+        self.label_119.setGeometry(QRect(10, 10, 149, 16))
+        self.pushButton_SlowA = QPushButton(self.frame_11)
+        self.pushButton_SlowA.setObjectName(u"pushButton_SlowA")
+        self.pushButton_SlowA.setGeometry(QRect(10, 30, 61, 41))
+        self.pushButton_SlowA.setCheckable(True)
+        self.pushButton_SlowB = QPushButton(self.frame_11)
+        self.pushButton_SlowB.setObjectName(u"pushButton_SlowB")
+        self.pushButton_SlowB.setGeometry(QRect(80, 30, 61, 41))
+        self.pushButton_SlowB.setCheckable(True)
+        self.pushButton_SlowC = QPushButton(self.frame_11)
+        self.pushButton_SlowC.setObjectName(u"pushButton_SlowC")
+        self.pushButton_SlowC.setGeometry(QRect(150, 30, 61, 41))
+        self.pushButton_SlowC.setCheckable(True)
+        self.label_120 = QLabel(self.frame_11)
+        self.label_120.setObjectName(u"label_120")
+        self.label_120.setGeometry(QRect(240, 10, 149, 16))
+        self.doubleSpinBox_slowPeriod = QDoubleSpinBox(self.frame_11)
+        self.doubleSpinBox_slowPeriod.setObjectName(u"doubleSpinBox_slowPeriod")
+        self.doubleSpinBox_slowPeriod.setGeometry(QRect(240, 30, 121, 41))
+        self.doubleSpinBox_slowPeriod.setMinimum(0.01)
+        self.doubleSpinBox_slowPeriod.setMaximum(3600.0)
+        self.doubleSpinBox_slowPeriod.setSingleStep(0.5)
+        self.doubleSpinBox_slowPeriod.setValue(1.0)
+        self.label_121 = QLabel(self.frame_11)
+        self.label_121.setObjectName(u"label_121")
+        self.label_121.setGeometry(QRect(370, 50, 21, 16))
+        self.label_122 = QLabel(self.frame_11)
+        self.label_122.setObjectName(u"label_122")
+        self.label_122.setGeometry(QRect(10, 90, 601, 41))
+        self.label_122.setWordWrap(True)
+        self.label_118 = QLabel(self.widget_8)
+        self.label_118.setObjectName(u"label_118")
+        self.label_118.setGeometry(QRect(0, 0, 161, 16))
+        self.widget_9 = QWidget(self.Paramtres)
+        self.widget_9.setObjectName(u"widget_9")
+        self.widget_9.setGeometry(QRect(1380, 620, 491, 181))
+        self.frame_12 = QFrame(self.widget_9)
+        self.frame_12.setObjectName(u"frame_12")
+        self.frame_12.setGeometry(QRect(0, 20, 491, 161))
+        self.frame_12.setFrameShape(QFrame.Shape.StyledPanel)
+        self.frame_12.setFrameShadow(QFrame.Shadow.Raised)
+        self.label_124 = QLabel(self.frame_12)
+        self.label_124.setObjectName(u"label_124")
+        self.label_124.setGeometry(QRect(10, 10, 121, 16))
+        self.comboBox_PersistenceChannel = QComboBox(self.frame_12)
+        self.comboBox_PersistenceChannel.setObjectName(u"comboBox_PersistenceChannel")
+        self.comboBox_PersistenceChannel.setGeometry(QRect(10, 30, 121, 41))
+        self.label_125 = QLabel(self.frame_12)
+        self.label_125.setObjectName(u"label_125")
+        self.label_125.setGeometry(QRect(150, 10, 149, 16))
+        self.doubleSpinBox_persistenceWindow = QDoubleSpinBox(self.frame_12)
+        self.doubleSpinBox_persistenceWindow.setObjectName(u"doubleSpinBox_persistenceWindow")
+        self.doubleSpinBox_persistenceWindow.setGeometry(QRect(150, 30, 121, 41))
+        self.doubleSpinBox_persistenceWindow.setMinimum(1.0)
+        self.doubleSpinBox_persistenceWindow.setMaximum(10000.0)
+        self.doubleSpinBox_persistenceWindow.setSingleStep(10.0)
+        self.doubleSpinBox_persistenceWindow.setValue(50.0)
+        self.label_126 = QLabel(self.frame_12)
+        self.label_126.setObjectName(u"label_126")
+        self.label_126.setGeometry(QRect(280, 50, 31, 16))
+        self.label_127 = QLabel(self.frame_12)
+        self.label_127.setObjectName(u"label_127")
+        self.label_127.setGeometry(QRect(320, 10, 149, 16))
+        self.doubleSpinBox_persistenceDecay = QDoubleSpinBox(self.frame_12)
+        self.doubleSpinBox_persistenceDecay.setObjectName(u"doubleSpinBox_persistenceDecay")
+        self.doubleSpinBox_persistenceDecay.setGeometry(QRect(320, 30, 121, 41))
+        self.doubleSpinBox_persistenceDecay.setMinimum(0.1)
+        self.doubleSpinBox_persistenceDecay.setMaximum(600.0)
+        self.doubleSpinBox_persistenceDecay.setSingleStep(0.5)
+        self.doubleSpinBox_persistenceDecay.setValue(1.0)
+        self.label_128 = QLabel(self.frame_12)
+        self.label_128.setObjectName(u"label_128")
+        self.label_128.setGeometry(QRect(450, 50, 21, 16))
+        self.label_129 = QLabel(self.frame_12)
+        self.label_129.setObjectName(u"label_129")
+        self.label_129.setGeometry(QRect(10, 90, 471, 41))
+        self.label_129.setWordWrap(True)
+        self.label_123 = QLabel(self.widget_9)
+        self.label_123.setObjectName(u"label_123")
+        self.label_123.setGeometry(QRect(0, 0, 161, 16))
         icon = QIcon(QIcon.fromTheme(u"applications-development"))
         self.tabWidget.addTab(self.Paramtres, icon, "")
         MainWindow.setCentralWidget(self.centralwidget)
@@ -308,18 +679,84 @@ class Ui_MainWindow(object):
         self.label_86.setText(QCoreApplication.translate("MainWindow", u"D\u00e9bit", None))
         self.label_87.setText(QCoreApplication.translate("MainWindow", u"SCCM", None))
         self.label_90.setText(QCoreApplication.translate("MainWindow", u"Gaz", None))
+        self.label_130.setText(QCoreApplication.translate("MainWindow", u"D\u00e9but", None))
+        self.label_131.setText(QCoreApplication.translate("MainWindow", u"Fin", None))
+        self.label_132.setText(QCoreApplication.translate("MainWindow", u"Format", None))
+        self.label_133.setText(QCoreApplication.translate("MainWindow", u"Voies", None))
+        self.pushButton_ExportA.setText(QCoreApplication.translate("MainWindow", u"A", None))
+        self.pushButton_ExportB.setText(QCoreApplication.translate("MainWindow", u"B", None))
+        self.pushButton_ExportC.setText(QCoreApplication.translate("MainWindow", u"C", None))
+        self.pushButton_Export.setText(QCoreApplication.translate("MainWindow", u"Exporter...", None))
+        self.pushButton_ExportCancel.setText(QCoreApplication.translate("MainWindow", u"Annuler", None))
+        self.label_134.setText(QCoreApplication.translate("MainWindow", u"Export", None))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab), QCoreApplication.translate("MainWindow", u"TestBench", None))
         self.label_43.setText(QCoreApplication.translate("MainWindow", u"Chemin du dossier", None))
         self.label_56.setText(QCoreApplication.translate("MainWindow", u"Fr\u00e9quence d'enregistrement", None))
         self.label_57.setText(QCoreApplication.translate("MainWindow", u"Sec", None))
         self.label_52.setText(QCoreApplication.translate("MainWindow", u"Limite de taille par fichiers", None))
         self.label_55.setText(QCoreApplication.translate("MainWindow", u"Mb", None))
+        self.label_93.setText(QCoreApplication.translate("MainWindow", u"Quota disque des journaux", None))
+        self.spinBox_diskQuota.setSpecialValueText(QCoreApplication.translate("MainWindow", u"Illimit\u00e9", None))
+        self.label_94.setText(QCoreApplication.translate("MainWindow", u"Go", None))
+        self.label_95.setText(QCoreApplication.translate("MainWindow", u"Dur\u00e9e de conservation", None))
+        self.spinBox_retentionDays.setSpecialValueText(QCoreApplication.translate("MainWindow", u"Illimit\u00e9e", None))
+        self.label_96.setText(QCoreApplication.translate("MainWindow", u"Jours", None))
         self.label_44.setText(QCoreApplication.translate("MainWindow", u"Activer l'enregistrement des donn\u00e9es", None))
         self.pushButton_LogOnOff.setText(QCoreApplication.translate("MainWindow", u"On", None))
         self.label.setText(QCoreApplication.translate("MainWindow", u"Enregistrement des donn\u00e9es", None))
         self.label_51.setText(QCoreApplication.translate("MainWindow", u"Ports disponibles", None))
         self.pushButton_Refresh.setText(QCoreApplication.translate("MainWindow", u"Rafraichir", None))
         self.label_22.setText(QCoreApplication.translate("MainWindow", u"Appareils connect\u00e9s", None))
+        self.label_91.setText(QCoreApplication.translate("MainWindow", u"Activer les mesures de performance", None))
+        self.pushButton_DiagnosticsOnOff.setText(QCoreApplication.translate("MainWindow", u"Off", None))
+        self.pushButton_DiagnosticsReset.setText(QCoreApplication.translate("MainWindow", u"R\u00e9initialiser", None))
+        self.pushButton_DiagnosticsDump.setText(QCoreApplication.translate("MainWindow", u"Exporter", None))
+        self.label_92.setText(QCoreApplication.translate("MainWindow", u"Diagnostics", None))
+        self.label_97.setText(QCoreApplication.translate("MainWindow", u"Canal A", None))
+        self.lineEdit_FilterA.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Aucun filtre", None))
+        self.label_98.setText(QCoreApplication.translate("MainWindow", u"Canal B", None))
+        self.lineEdit_FilterB.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Aucun filtre", None))
+        self.label_99.setText(QCoreApplication.translate("MainWindow", u"Canal C", None))
+        self.lineEdit_FilterC.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Aucun filtre", None))
+        self.label_100.setText(QCoreApplication.translate("MainWindow", u"Filtres s\u00e9par\u00e9s par \u00ab ; \u00bb : average(N), fir(c0, c1, ...), biquad(b0, b1, b2, a1, a2), lowpass(Hz, Q), dc(p\u00f4le)", None))
+        self.label_101.setText(QCoreApplication.translate("MainWindow", u"Filtres", None))
+        self.label_102.setText(QCoreApplication.translate("MainWindow", u"M1", None))
+        self.lineEdit_MathM1.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Aucune expression", None))
+        self.label_103.setText(QCoreApplication.translate("MainWindow", u"M2", None))
+        self.lineEdit_MathM2.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Aucune expression", None))
+        self.label_104.setText(QCoreApplication.translate("MainWindow", u"Expressions des voies A, B, C : + - * /, abs(), sqrt(), par exemple \u00ab A - B \u00bb ou \u00ab (A - B) / 0.1 \u00bb. Une voie calcul\u00e9e n'est \u00e9valu\u00e9e que si elle est affich\u00e9e.", None))
+        self.label_105.setText(QCoreApplication.translate("MainWindow", u"Voies calcul\u00e9es", None))
+        self.label_106.setText(QCoreApplication.translate("MainWindow", u"Activer l'enregistreur", None))
+        self.pushButton_RecorderOnOff.setText(QCoreApplication.translate("MainWindow", u"Off", None))
+        self.pushButton_RecorderTrigger.setText(QCoreApplication.translate("MainWindow", u"D\u00e9clencher", None))
+        self.label_107.setText(QCoreApplication.translate("MainWindow", u"Avant l'\u00e9v\u00e9nement", None))
+        self.label_108.setText(QCoreApplication.translate("MainWindow", u"s", None))
+        self.label_109.setText(QCoreApplication.translate("MainWindow", u"Apr\u00e8s l'\u00e9v\u00e9nement", None))
+        self.label_110.setText(QCoreApplication.translate("MainWindow", u"s", None))
+        self.label_111.setText(QCoreApplication.translate("MainWindow", u"D\u00e9clenchement sur niveau", None))
+        self.label_112.setText(QCoreApplication.translate("MainWindow", u"mV", None))
+        self.label_RecorderStatus.setText(QCoreApplication.translate("MainWindow", u"Aucun instantan\u00e9", None))
+        self.label_114.setText(QCoreApplication.translate("MainWindow", u"Enregistreur d'\u00e9v\u00e9nements", None))
+        self.label_115.setText(QCoreApplication.translate("MainWindow", u"Budget m\u00e9moire", None))
+        self.spinBox_memoryBudget.setSpecialValueText(QCoreApplication.translate("MainWindow", u"Illimit\u00e9", None))
+        self.label_116.setText(QCoreApplication.translate("MainWindow", u"Mo", None))
+        self.label_MemoryUsage.setText(QCoreApplication.translate("MainWindow", u"Utilisation : -", None))
+        self.label_117.setText(QCoreApplication.translate("MainWindow", u"M\u00e9moire", None))
+        self.label_119.setText(QCoreApplication.translate("MainWindow", u"Voies lentes", None))
+        self.pushButton_SlowA.setText(QCoreApplication.translate("MainWindow", u"A", None))
+        self.pushButton_SlowB.setText(QCoreApplication.translate("MainWindow", u"B", None))
+        self.pushButton_SlowC.setText(QCoreApplication.translate("MainWindow", u"C", None))
+        self.label_120.setText(QCoreApplication.translate("MainWindow", u"P\u00e9riode d'agr\u00e9gation", None))
+        self.label_121.setText(QCoreApplication.translate("MainWindow", u"s", None))
+        self.label_122.setText(QCoreApplication.translate("MainWindow", u"Les voies lentes sont r\u00e9duites \u00e0 leur moyenne, minimum et maximum par p\u00e9riode avant l'affichage et l'enregistrement (dossier slow).", None))
+        self.label_118.setText(QCoreApplication.translate("MainWindow", u"Cadence des voies", None))
+        self.label_124.setText(QCoreApplication.translate("MainWindow", u"Voie", None))
+        self.label_125.setText(QCoreApplication.translate("MainWindow", u"Fen\u00eatre", None))
+        self.label_126.setText(QCoreApplication.translate("MainWindow", u"ms", None))
+        self.label_127.setText(QCoreApplication.translate("MainWindow", u"R\u00e9manence", None))
+        self.label_128.setText(QCoreApplication.translate("MainWindow", u"s", None))
+        self.label_129.setText(QCoreApplication.translate("MainWindow", u"Densit\u00e9 des tensions de la voie selon leur position dans la fen\u00eatre, affich\u00e9e \u00e0 c\u00f4t\u00e9 de la courbe.", None))
+        self.label_123.setText(QCoreApplication.translate("MainWindow", u"Persistance", None))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.Paramtres), QCoreApplication.translate("MainWindow", u"Param\u00e8tres", None))
     # retranslateUi
 
@@ -0,0 +1,262 @@
+import concurrent.futures
+import datetime
+import gzip
+import os
+import shutil
+import threading
+import logger
+from logger import log_action
+
+
+def compress_file(file_path):
+    """
+    Compresses a closed log file with gzip and removes the original.
+
+    The compressed file is written under a temporary name and renamed once complete, so a
+    reader never sees a truncated archive. Runs in a worker process of the archiver.
+
+    On Windows the original cannot be removed while a reader has it open: it is left in place
+    and removed by a later scan, without compressing it again. The readers only list the
+    compressed file of a stem, see logger.list_log_files().
+
+    Args:
+        file_path (str): The path of the file to compress.
+
+    Returns:
+        tuple: The path of the compressed file, the original and the compressed sizes in bytes.
+    """
+    compressed_path = file_path + '.gz'
+    original_size = os.path.getsize(file_path)
+    if not os.path.exists(compressed_path):
+        temporary_path = compressed_path + '.tmp'
+        with open(file_path, 'rb') as source, gzip.open(temporary_path, 'wb', compresslevel=6) as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+        os.replace(temporary_path, compressed_path)
+    try:
+        os.remove(file_path)
+    except PermissionError:
+        pass
+    return compressed_path, original_size, os.path.getsize(compressed_path)
+
+
+def get_closed_files(root):
+    """
+    Returns the CSV log files that are no longer written to.
+
+    The files of the slow channels, in the logger.SLOW_FOLDER sub-folder of each day, are
+    included. In the folders of today, the latest CSV file is still open by the logger and is
+    skipped.
+
+    Args:
+        root (str): The log folder containing one folder per day.
+
+    Returns:
+        list: The paths of the closed CSV files.
+    """
+    today = datetime.date.today().strftime("%Y-%m-%d")
+    closed = []
+    for day in get_day_folders(root):
+        for directory in (os.path.join(root, day), os.path.join(root, day, logger.SLOW_FOLDER)):
+            if not os.path.isdir(directory):
+                continue
+            latest = logger.get_latest_csv_file(directory) if day == today else None
+            for file in os.listdir(directory):
+                if file.endswith('.csv') and file != latest:
+                    closed.append(os.path.join(directory, file))
+    return closed
+
+
+def get_day_folders(root):
+    """
+    Returns the day folders of the log folder, oldest first.
+
+    Args:
+        root (str): The log folder containing one folder per day.
+
+    Returns:
+        list: The names of the day folders.
+    """
+    if not os.path.isdir(root):
+        return []
+    days = []
+    for name in os.listdir(root):
+        try:
+            datetime.datetime.strptime(name, "%Y-%m-%d")
+        except ValueError:
+            continue
+        if os.path.isdir(os.path.join(root, name)):
+            days.append(name)
+    return sorted(days)
+
+
+def get_folder_size(directory):
+    """
+    Returns the total size of the files in a folder and its sub-folders.
+
+    Args:
+        directory (str): The folder path.
+
+    Returns:
+        int: The size in bytes.
+    """
+    size = 0
+    for folder, _, files in os.walk(directory):
+        for file in files:
+            try:
+                size += os.path.getsize(os.path.join(folder, file))
+            except OSError:
+                pass
+    return size
+
+
+def enforce_retention(root, max_bytes, max_age_days):
+    """
+    Deletes whole day folders, oldest first, until the log folder fits the quota and no folder
+    is older than the retention age. The folder of today is never deleted.
+
+    Args:
+        root (str): The log folder containing one folder per day.
+        max_bytes (int): The disk quota in bytes, 0 for no quota.
+        max_age_days (int): The retention age in days, 0 to keep every day.
+
+    Returns:
+        tuple: The deleted day folders and the remaining size of the log folder in bytes.
+    """
+    today = datetime.date.today()
+    days = get_day_folders(root)
+    sizes = {day: get_folder_size(os.path.join(root, day)) for day in days}
+    total = sum(sizes.values())
+    deleted = []
+    for day in days:
+        if day == today.strftime("%Y-%m-%d"):
+            break
+        age = (today - datetime.datetime.strptime(day, "%Y-%m-%d").date()).days
+        too_old = max_age_days and age > max_age_days
+        too_big = max_bytes and total > max_bytes
+        if not too_old and not too_big:
+            break
+        shutil.rmtree(os.path.join(root, day), ignore_errors=True)
+        total -= sizes[day]
+        deleted.append(day)
+    return deleted, total
+
+
+class LogArchiver:
+    """
+    Compresses the closed log files and enforces the disk quota in the background.
+
+    A thread scans the log folder every `interval` seconds and hands the work to a process
+    pool, so that compression does not compete with the GUI and the acquisition for the GIL.
+
+    Attributes:
+        root (str): The log folder containing one folder per day.
+        max_bytes (int): The disk quota in bytes, 0 for no quota.
+        max_age_days (int): The retention age in days, 0 to keep every day.
+        interval (float): The time between two scans in seconds.
+    """
+
+    def __init__(self, root=logger.path, max_bytes=0, max_age_days=0, interval=60.0, workers=2):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.interval = interval
+        self.workers = workers
+        self.executor = None
+        self.pending = set()
+        self.over_quota = False
+        self.wakeup = threading.Event()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """
+        Starts the process pool and the scanning thread.
+        """
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def set_quota(self, max_bytes=None, max_age_days=None):
+        """
+        Changes the disk quota and the retention age, and applies them right away.
+
+        Args:
+            max_bytes (int): The disk quota in bytes, 0 for no quota (default: unchanged).
+            max_age_days (int): The retention age in days, 0 to keep every day (default: unchanged).
+
+        Returns:
+            None
+        """
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if max_age_days is not None:
+            self.max_age_days = max_age_days
+        self.wakeup.set()
+
+    def run(self):
+        """
+        Scans the log folder until the archiver is stopped.
+        """
+        while self.running:
+            try:
+                self.scan()
+            except Exception as e:
+                log_action("Log archiving failed: " + str(e), 'error')
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+
+    def scan(self):
+        """
+        Submits the closed files for compression, then applies the quota.
+        """
+        for file_path in get_closed_files(self.root):
+            if file_path not in self.pending:
+                self.pending.add(file_path)
+                future = self.executor.submit(compress_file, file_path)
+                future.add_done_callback(
+                    lambda future, file_path=file_path: self.compressed(file_path, future))
+        if self.max_bytes or self.max_age_days:
+            future = self.executor.submit(
+                enforce_retention, self.root, self.max_bytes, self.max_age_days)
+            future.add_done_callback(self.retention_applied)
+
+    def compressed(self, file_path, future):
+        """
+        Logs the result of a compression job.
+        """
+        self.pending.discard(file_path)
+        if future.cancelled():
+            return
+        if isinstance(future.exception(), FileNotFoundError):
+            return
+        if future.exception() is not None:
+            log_action("Compression of " + file_path + " failed: " +
+                       str(future.exception()), 'error')
+
+    def retention_applied(self, future):
+        """
+        Logs the day folders deleted by a retention job.
+        """
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            log_action("Log retention failed: " + str(future.exception()), 'error')
+            return
+        deleted, total = future.result()
+        for day in deleted:
+            log_action("Deleted the logs of " + day + " to respect the disk quota and retention age")
+        over_quota = bool(self.max_bytes) and total > self.max_bytes
+        if over_quota and not self.over_quota:
+            log_action("The logs of today exceed the disk quota", 'warning')
+        self.over_quota = over_quota
+
+    def stop(self):
+        """
+        Stops the scanning thread and the process pool, the running jobs are completed.
+        """
+        self.running = False
+        self.wakeup.set()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
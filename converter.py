@@ -0,0 +1,364 @@
+import argparse
+import concurrent.futures
+import datetime
+import gzip
+import os
+import shutil
+import numpy as np
+import logger
+import logindex
+from archiver import get_day_folders
+
+# Converts the CSV logs to one '.npy' file per column:
+#   <output>/<YYYY-MM-DD>/<N>/Time.npy        datetime64[us], local time as in the CSV files
+#   <output>/<YYYY-MM-DD>/<N>/Channel_A.npy   float64
+#   ...
+#   <output>/<YYYY-MM-DD>/<N>/manifest.txt    written last, marks the conversion as complete
+# Plain CSV files are split in byte ranges parsed in parallel, compressed files are parsed by
+# a single worker. Each range is saved as a part as soon as it is parsed, so an interrupted
+# conversion resumes from the parts and files already done.
+CHUNK_SIZE = 64 * 1024 * 1024
+READ_SIZE = 16 * 1024 * 1024
+
+
+def read_columns(file_path):
+    """
+    Returns the column names of a CSV log file.
+
+    Args:
+        file_path (str): The path of the '.csv' or '.csv.gz' file.
+
+    Returns:
+        list: The names of the header row.
+    """
+    with logger.open_log_file(file_path) as file:
+        return file.readline().strip().split(',')
+
+
+def split_file(file_path, chunk_size):
+    """
+    Splits a plain CSV file in byte ranges starting at the beginning of a line.
+
+    Args:
+        file_path (str): The path of the '.csv' file.
+        chunk_size (int): The approximate size of a range in bytes.
+
+    Returns:
+        list: The (start, end) positions of the ranges, the end of the last one is the file size.
+    """
+    size = os.path.getsize(file_path)
+    starts = [0]
+    with open(file_path, 'rb') as file:
+        while starts[-1] + chunk_size < size:
+            file.seek(starts[-1] + chunk_size)
+            file.readline()
+            if file.tell() >= size:
+                break
+            starts.append(file.tell())
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def parse_lines(lines, dtype):
+    """
+    Parses CSV rows in a structured array.
+
+    Args:
+        lines (list): The rows, without the header.
+        dtype (numpy.dtype): The structured type of a row.
+
+    Returns:
+        numpy.ndarray: The parsed rows.
+    """
+    if not lines:
+        return np.empty(0, dtype=dtype)
+    return np.loadtxt(lines, delimiter=',', dtype=dtype, ndmin=1)
+
+
+def convert_part(file_path, start, end, part_dir, columns):
+    """
+    Parses a byte range of a CSV log file and saves one '.npy' file per column.
+
+    Runs in a worker process. The part is written in a temporary folder renamed once
+    complete, so a part folder that exists is always complete.
+
+    Args:
+        file_path (str): The path of the '.csv' or '.csv.gz' file.
+        start (int): The position of the first row of the range in bytes.
+        end (int): The end of the range in bytes, None to read until the end of the file.
+        part_dir (str): The folder of the part.
+        columns (list): The column names of the file.
+
+    Returns:
+        int: The number of parsed rows.
+
+    Raises:
+        ValueError: If the number of parsed rows differs from the number of lines.
+    """
+    dtype = np.dtype([(columns[0], 'datetime64[us]')] +
+                     [(column, 'f8') for column in columns[1:]])
+    opener = gzip.open if file_path.endswith('.gz') else open
+    parts = []
+    lines_count = 0
+    with opener(file_path, 'rb') as file:
+        file.seek(start)
+        remaining = None if end is None else end - start
+        carry = b''
+        first = start == 0
+        while remaining is None or remaining > 0:
+            data = file.read(READ_SIZE if remaining is None else min(READ_SIZE, remaining))
+            if not data:
+                break
+            if remaining is not None:
+                remaining -= len(data)
+            data = carry + data
+            cut = data.rfind(b'\n') + 1
+            data, carry = data[:cut], data[cut:]
+            lines = data.decode('ascii').splitlines()
+            if first and lines:
+                lines = lines[1:]
+                first = False
+            lines_count += len(lines)
+            parts.append(parse_lines(lines, dtype))
+        if carry.strip():
+            raise ValueError(file_path + ": incomplete last row")
+    table = np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+    if len(table) != lines_count:
+        raise ValueError(file_path + ": parsed " + str(len(table)) +
+                         " rows out of " + str(lines_count))
+    temporary_dir = part_dir + '.tmp'
+    shutil.rmtree(temporary_dir, ignore_errors=True)
+    os.makedirs(temporary_dir)
+    for column in columns:
+        np.save(os.path.join(temporary_dir, column + '.npy'), table[column])
+    os.replace(temporary_dir, part_dir)
+    return len(table)
+
+
+def assemble(output_dir, part_dirs, columns, source, expected_rows):
+    """
+    Concatenates the parts of a file in one '.npy' file per column and writes the manifest.
+
+    Runs in a worker process. The columns are copied part by part into memory-mapped
+    files, so a file never has to fit in memory.
+
+    Args:
+        output_dir (str): The output folder of the file.
+        part_dirs (list): The folders of the parts, in order.
+        columns (list): The column names of the file.
+        source (str): The path of the converted CSV file.
+        expected_rows (int): The number of rows according to the index, None if unknown.
+
+    Returns:
+        int: The number of rows of the file.
+
+    Raises:
+        ValueError: If the number of rows differs from the index of the file.
+    """
+    counts = [len(np.load(os.path.join(part_dir, columns[0] + '.npy'), mmap_mode='r'))
+              for part_dir in part_dirs]
+    rows = sum(counts)
+    if expected_rows is not None and rows != expected_rows:
+        raise ValueError(source + ": converted " + str(rows) + " rows, the index has " +
+                         str(expected_rows))
+    for column in columns:
+        first = np.load(os.path.join(part_dirs[0], column + '.npy'), mmap_mode='r')
+        target = np.lib.format.open_memmap(os.path.join(output_dir, column + '.npy.tmp'),
+                                           mode='w+', dtype=first.dtype, shape=(rows,))
+        position = 0
+        for part_dir, count in zip(part_dirs, counts):
+            target[position:position + count] = np.load(
+                os.path.join(part_dir, column + '.npy'), mmap_mode='r')
+            position += count
+        target.flush()
+        del target
+        os.replace(os.path.join(output_dir, column + '.npy.tmp'),
+                   os.path.join(output_dir, column + '.npy'))
+    write_manifest(output_dir, source, rows)
+    shutil.rmtree(os.path.join(output_dir, 'parts'), ignore_errors=True)
+    return rows
+
+
+def get_stem(source):
+    """
+    Returns the name of a CSV log file without its extensions, 'N' for 'N.csv' and 'N.csv.gz'.
+    """
+    return os.path.basename(source).split('.')[0]
+
+
+def get_uncompressed_size(source):
+    """
+    Returns the size of a CSV log file once uncompressed, in bytes.
+
+    The size of a compressed file is read from the end of its gzip stream, modulo 2**32,
+    which the log files never reach.
+    """
+    if not source.endswith('.gz'):
+        return os.path.getsize(source)
+    with open(source, 'rb') as file:
+        file.seek(-4, os.SEEK_END)
+        return int.from_bytes(file.read(4), 'little')
+
+
+def write_manifest(output_dir, source, rows):
+    """
+    Writes the manifest of a converted file.
+
+    The source is recorded by its stem, so the file stays converted once the archiver has
+    compressed it.
+    """
+    with open(os.path.join(output_dir, 'manifest.txt'), 'w') as file:
+        file.write(f"source = {get_stem(source)}\n")
+        file.write(f"size = {get_uncompressed_size(source)}\n")
+        file.write(f"rows = {rows}\n")
+
+
+def read_manifest(output_dir):
+    """
+    Reads the manifest of a converted file.
+
+    Returns:
+        dict: The manifest entries, empty if the file is not converted.
+    """
+    manifest = {}
+    path = os.path.join(output_dir, 'manifest.txt')
+    if os.path.exists(path):
+        with open(path, 'r') as file:
+            for line in file:
+                key, value = line.strip().split(" = ")
+                manifest[key] = value
+    return manifest
+
+
+def is_converted(output_dir, source, expected_rows=None):
+    """
+    Returns True if a CSV file was completely converted and has not changed since.
+
+    The file and its compressed form are the same source: they are compared by their stem and
+    the number of rows of their index, or their uncompressed size if they have no index.
+
+    Args:
+        output_dir (str): The output folder of the file.
+        source (str): The path of the '.csv' or '.csv.gz' file.
+        expected_rows (int): The number of rows of the index of the file (default: None, no index).
+
+    Returns:
+        bool: True if the file is already converted.
+    """
+    manifest = read_manifest(output_dir)
+    if manifest.get('source') != get_stem(source):
+        return False
+    if expected_rows is not None:
+        return manifest.get('rows') == str(expected_rows)
+    return manifest.get('size') == str(get_uncompressed_size(source))
+
+
+def list_sources(logs, days):
+    """
+    Returns the CSV log files to convert, the file of today still being written excluded.
+
+    Args:
+        logs (str): The log folder containing one folder per day.
+        days (list): The day folders to convert, all of them if empty.
+
+    Returns:
+        list: The (day, path) of the files.
+    """
+    today = datetime.date.today().strftime("%Y-%m-%d")
+    sources = []
+    for day in days or get_day_folders(logs):
+        for folder in (day, os.path.join(day, logger.SLOW_FOLDER)):
+            directory = os.path.join(logs, folder)
+            if not os.path.isdir(directory):
+                continue
+            latest = logger.get_latest_csv_file(directory) if day == today else None
+            for file_path in logger.list_log_files(directory):
+                if os.path.basename(file_path) != latest:
+                    sources.append((folder, file_path))
+    return sources
+
+
+def convert(logs, output, days=None, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Converts the CSV logs to columnar '.npy' files with a process pool.
+
+    Args:
+        logs (str): The log folder containing one folder per day.
+        output (str): The output folder.
+        days (list): The day folders to convert, all of them if empty (default: None).
+        workers (int): The number of worker processes (default: the number of CPUs).
+        chunk_size (int): The approximate size in bytes of the ranges parsed in parallel.
+
+    Returns:
+        tuple: The number of converted files, of files already converted and of failures.
+    """
+    converted = skipped = failed = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        parts_left = {}
+        assemblies = []
+        futures = {}
+        for day, source in list_sources(logs, days):
+            output_dir = os.path.join(output, day, get_stem(source))
+            chunks = logindex.read_index(source)
+            expected_rows = sum(chunk['rows'] for chunk in chunks) if chunks else None
+            if is_converted(output_dir, source, expected_rows):
+                skipped += 1
+                continue
+            columns = read_columns(source)
+            ranges = [(0, None)] if source.endswith('.gz') else split_file(source, chunk_size)
+            # The parts of a previous run are only reused if the source has not changed since
+            parts_dir = os.path.join(output_dir, 'parts', os.path.basename(source) + '-' +
+                                     str(os.path.getsize(source)))
+            part_dirs = [os.path.join(parts_dir, f"{start:015d}") for start, _ in ranges]
+            job = (output_dir, part_dirs, columns, source, expected_rows)
+            parts_left[source] = 0
+            for (start, end), part_dir in zip(ranges, part_dirs):
+                if os.path.isdir(part_dir):
+                    continue
+                os.makedirs(os.path.dirname(part_dir), exist_ok=True)
+                futures[executor.submit(convert_part, source, start, end, part_dir, columns)] = job
+                parts_left[source] += 1
+            if parts_left[source] == 0:
+                assemblies.append(executor.submit(assemble, *job))
+        for future in concurrent.futures.as_completed(futures):
+            job = futures[future]
+            source = job[3]
+            if future.exception() is not None:
+                print("Failed: " + str(future.exception()))
+                if parts_left[source] >= 0:
+                    failed += 1
+                parts_left[source] = -1
+                continue
+            if parts_left[source] > 0:
+                parts_left[source] -= 1
+                if parts_left[source] == 0:
+                    assemblies.append(executor.submit(assemble, *job))
+        for future in concurrent.futures.as_completed(assemblies):
+            if future.exception() is not None:
+                print("Failed: " + str(future.exception()))
+                failed += 1
+            else:
+                converted += 1
+    return converted, skipped, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Converts the CSV logs to one numpy '.npy' file per column.")
+    parser.add_argument('days', nargs='*',
+                        help="day folders to convert (YYYY-MM-DD), all of them by default")
+    parser.add_argument('--logs', default=logger.path, help="log folder")
+    parser.add_argument('--output', default='./logs_npy/', help="output folder")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of worker processes, the number of CPUs by default")
+    parser.add_argument('--chunk-mb', type=int, default=CHUNK_SIZE // (1024 * 1024),
+                        help="size of the ranges of a file parsed in parallel")
+    args = parser.parse_args()
+    converted, skipped, failed = convert(args.logs, args.output, args.days, args.workers,
+                                         max(1, args.chunk_mb) * 1024 * 1024)
+    print(f"{converted} files converted, {skipped} already converted, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
@@ -0,0 +1,298 @@
+import datetime
+import heapq
+import itertools
+import math
+import os
+import struct
+import numpy as np
+import logger
+import logindex
+
+# Export of the values of a set of channels over a time window, to CSV or binary.
+# The window is read from the logs for the part older than the values held in memory by the
+# plot, then from these values, and written chunk by chunk: neither the logs nor the export
+# ever have to fit in memory. The logged rows aggregated over an interval are exported with
+# the mean of the interval. The slow channels are logged in the SLOW_FOLDER sub-folder of the
+# day folders, their rows are merged in time order with the rows of the other channels.
+#
+# Binary export layout, all little-endian:
+#   magic (4s), version (B), channels (B), length of the names (H), then the comma separated
+#   channel names (UTF-8), followed by one record per row of channels + 1 float64: the time
+#   (POSIX timestamp) then the value of each channel in millivolts, NaN if it is missing.
+MAGIC = b'AIMX'
+VERSION = 1
+HEADER = struct.Struct('<4sBBH')
+CHUNK_ROWS = 10000
+
+
+class CsvWriter:
+    """
+    Writes the exported rows to a CSV file with the layout of the logs.
+    """
+
+    def __init__(self, file_path, names):
+        self.file = open(file_path, 'w', newline='')
+        self.file.write(','.join(['Time'] + list(names)) + '\r\n')
+
+    def write(self, times, values):
+        """
+        Writes a chunk of rows.
+
+        Args:
+            times (numpy.ndarray): The time of each row, as a POSIX timestamp.
+            values (numpy.ndarray): The values of the rows, one row per channel.
+
+        Returns:
+            None
+        """
+        self.file.write(''.join(logger.format_time(row_time) + ',' + ','.join(map(str, row)) + '\r\n'
+                                for row_time, row in zip(times.tolist(), values.T.tolist())))
+
+    def close(self):
+        self.file.close()
+
+
+class BinaryWriter:
+    """
+    Writes the exported rows to a binary file, see the layout above.
+    """
+
+    def __init__(self, file_path, names):
+        names = ','.join(names).encode('utf-8')
+        self.channels = names.count(b',') + 1 if names else 0
+        self.file = open(file_path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.channels, len(names)))
+        self.file.write(names)
+
+    def write(self, times, values):
+        """
+        Writes a chunk of rows.
+
+        Args:
+            times (numpy.ndarray): The time of each row, as a POSIX timestamp.
+            values (numpy.ndarray): The values of the rows, one row per channel.
+
+        Returns:
+            None
+        """
+        records = np.empty((times.size, 1 + self.channels), dtype='<f8')
+        records[:, 0] = times
+        records[:, 1:] = values.T
+        self.file.write(records.tobytes())
+
+    def close(self):
+        self.file.close()
+
+
+WRITERS = {
+    'csv': CsvWriter,
+    'binary': BinaryWriter,
+}
+
+
+def read_binary(file_path):
+    """
+    Reads a binary export file.
+
+    Args:
+        file_path (str): The path of the binary file.
+
+    Returns:
+        tuple: The names of the channels (list), the times (numpy.ndarray) and the values
+        (numpy.ndarray, one row per channel).
+
+    Raises:
+        ValueError: If the file is not a binary export.
+    """
+    with open(file_path, 'rb') as file:
+        header = file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(file_path + ": truncated header")
+        magic, version, channels, length = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(file_path + ": not a binary export file")
+        names = file.read(length).decode('utf-8').split(',') if length else []
+        records = np.fromfile(file, dtype='<f8')
+    records = records[:records.size - records.size % (1 + channels)].reshape(-1, 1 + channels)
+    return names, records[:, 0], records[:, 1:].T
+
+
+def log_rows(directory, columns, start, end):
+    """
+    Iterates over the logged values of channels in the log files of a folder.
+
+    Args:
+        directory (str): The folder of the log files.
+        columns (list): The column names of the channels, e.g. 'Channel_A'.
+        start (float): The start of the window, as a POSIX timestamp.
+        end (float): The end of the window, excluded, as a POSIX timestamp.
+
+    Yields:
+        tuple: The time of the row (float) and the values of the channels (list of float),
+        NaN for the channels missing from its file.
+    """
+    if not os.path.isdir(directory):
+        return
+    for file_path in logger.list_log_files(directory):
+        names = logger.read_header(file_path)[1:]
+        positions = [names.index(name) if name in names else None for name in columns]
+        if all(position is None for position in positions):
+            continue
+        for timestamp, values in logindex.query_file(
+                file_path, logindex.read_index(file_path), start, end):
+            if timestamp >= end:
+                break
+            yield timestamp, [math.nan if position is None else values[position]
+                              for position in positions]
+
+
+def log_chunks(root, columns, start, end, chunk_rows=CHUNK_ROWS):
+    """
+    Iterates over the logged values of channels between two times, in chunks.
+
+    The channels are matched by name against the header of each log file, a channel missing
+    from a file is exported as NaN for its rows. The rows of the slow channels are read from
+    the SLOW_FOLDER sub-folder of each day folder.
+
+    Args:
+        root (str): The log folder containing one folder per day.
+        columns (list): The column names of the channels, e.g. 'Channel_A'.
+        start (float): The start of the window, as a POSIX timestamp.
+        end (float): The end of the window, excluded, as a POSIX timestamp.
+        chunk_rows (int): The maximum number of rows of a chunk (default: CHUNK_ROWS).
+
+    Yields:
+        tuple: The times (numpy.ndarray) and the values (numpy.ndarray, one row per channel)
+        of the rows of a chunk.
+    """
+    times = []
+    rows = []
+    day = datetime.date.fromtimestamp(start)
+    while start < end and day <= datetime.date.fromtimestamp(end):
+        directory = os.path.join(root, day.strftime("%Y-%m-%d"))
+        day += datetime.timedelta(days=1)
+        for timestamp, row in heapq.merge(
+                log_rows(directory, columns, start, end),
+                log_rows(os.path.join(directory, logger.SLOW_FOLDER), columns, start, end),
+                key=lambda entry: entry[0]):
+            times.append(timestamp)
+            rows.append(row)
+            if len(times) >= chunk_rows:
+                yield np.array(times), np.array(rows).T
+                times = []
+                rows = []
+    if times:
+        yield np.array(times), np.array(rows).T
+
+
+def memory_chunks(times, values, chunk_rows=CHUNK_ROWS):
+    """
+    Iterates over values held in memory, in chunks.
+
+    Args:
+        times (numpy.ndarray): The time of each row, as a POSIX timestamp.
+        values (numpy.ndarray): The values of the rows, one row per channel.
+        chunk_rows (int): The maximum number of rows of a chunk (default: CHUNK_ROWS).
+
+    Yields:
+        tuple: The times and the values of the rows of a chunk.
+    """
+    for i in range(0, times.size, chunk_rows):
+        yield times[i:i + chunk_rows], values[:, i:i + chunk_rows]
+
+
+def add_logged_rows(memory, columns, logged, start, end):
+    """
+    Adds to the values held in memory the rows of the channels they lack, read from the logs.
+
+    The channels missing from memory are the slow ones, logged one row per period, so their
+    rows over the part of the window held in memory are read at once.
+
+    Args:
+        memory (tuple): The times and the values (one row per channel of `columns`, NaN for
+            the missing channels) held in memory.
+        columns (list): The column names of the channels.
+        logged (list): The column names of the channels missing from memory.
+        start (float): The time of the first row held in memory, as a POSIX timestamp.
+        end (float): The end of the window, as a POSIX timestamp.
+
+    Returns:
+        tuple: The times and the values of the rows of both, in time order, NaN for the
+        channels without value in a row.
+    """
+    times, values = memory
+    chunks = list(log_chunks(logger.path, logged, start, end))
+    if not chunks:
+        return memory
+    merged_times = np.concatenate([times] + [chunk_times for chunk_times, _ in chunks])
+    merged = np.full((len(columns), merged_times.size), np.nan)
+    merged[:, :times.size] = values
+    merged[[columns.index(name) for name in logged], times.size:] = np.concatenate(
+        [chunk_values for _, chunk_values in chunks], axis=1)
+    order = np.argsort(merged_times, kind='stable')
+    return merged_times[order], merged[:, order]
+
+
+def export_window(file_path, kind, columns, start, end, memory=None, progress=None,
+                  cancelled=None, logged=()):
+    """
+    Exports the values of channels between two times to a file.
+
+    The file is written under a temporary name and renamed once complete, a cancelled or
+    failed export leaves no file behind.
+
+    Args:
+        file_path (str): The path of the exported file.
+        kind (str): The format of the file, a key of WRITERS ('csv' or 'binary').
+        columns (list): The column names of the channels, e.g. 'Channel_A'.
+        start (float): The start of the window, as a POSIX timestamp.
+        end (float): The end of the window, as a POSIX timestamp.
+        memory (tuple): The times and the values (one row per channel) held in memory for the
+            end of the window, used instead of the logs from their first time (default: None).
+        progress (callable): Called with the exported fraction of the window, between 0 and 1
+            (default: None).
+        cancelled (callable): Returns True to stop the export, checked between the chunks
+            (default: None).
+        logged (list): The columns missing from `memory`, read from the logs over the whole
+            window (default: none).
+
+    Returns:
+        int: The number of exported rows, or None if the export was cancelled.
+    """
+    memory_start = end
+    if memory is not None and memory[0].size:
+        memory_start = float(memory[0][0])
+    chunks = log_chunks(logger.path, columns, start, min(end, memory_start))
+    if memory is not None:
+        if logged:
+            memory = add_logged_rows(memory, columns, logged, memory_start, end)
+        chunks = itertools.chain(chunks, memory_chunks(*memory))
+    temporary_path = file_path + '.part'
+    writer = WRITERS[kind](temporary_path, columns)
+    rows = 0
+    completed = False
+    try:
+        for times, values in chunks:
+            if cancelled is not None and cancelled():
+                return None
+            writer.write(times, values)
+            rows += times.size
+            if progress is not None and end > start:
+                progress(min(1.0, (float(times[-1]) - start) / (end - start)))
+        completed = True
+    finally:
+        writer.close()
+        if not completed:
+            remove_file(temporary_path)
+    os.replace(temporary_path, file_path)
+    if progress is not None:
+        progress(1.0)
+    return rows
+
+
+def remove_file(file_path):
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
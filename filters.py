@@ -0,0 +1,334 @@
+import math
+import numpy as np
+
+# Streaming digital filters applied to the acquired blocks, one chain per channel.
+# A chain is described by a string of filters separated by ';', applied from left to right:
+#   average(16)                    moving average over 16 samples
+#   fir(0.25, 0.5, 0.25)           FIR filter with the given coefficients
+#   biquad(b0, b1, b2, a1, a2)     IIR biquad section, a0 normalized to 1
+#   lowpass(50) / lowpass(50, 0.7) second order low-pass biquad, cutoff in Hz and quality factor
+#   dc(0.995)                      DC removal, the argument is the pole (closer to 1: lower cutoff)
+# The state of every filter is carried from one block to the next, so a chain gives the same
+# result as if the whole acquisition was filtered at once. The first sample of the first block
+# is taken as the past of the signal, so the filters start without transient.
+# Every filter preallocates its scratch buffers for the block size, nothing is allocated per block.
+SEGMENT_SIZE = 256
+
+
+class MovingAverage:
+    """
+    Moving average over `length` samples, computed with a running sum.
+
+    Attributes:
+        length (int): The number of averaged samples.
+    """
+
+    def __init__(self, length):
+        if length < 1:
+            raise ValueError("average: the length must be at least 1")
+        self.length = int(length)
+        self.size = None
+        self.primed = False
+
+    def setup(self, block_size, sample_interval):
+        """
+        Allocates the scratch buffers for blocks of `block_size` samples.
+
+        Args:
+            block_size (int): The number of samples of a block.
+            sample_interval (float): The time between two samples in seconds.
+
+        Returns:
+            None
+        """
+        self.size = block_size
+        self.primed = False
+        # The last length - 1 samples of the previous block followed by the block
+        self.buffer = np.zeros(self.length - 1 + block_size)
+        self.sums = np.zeros(self.length + block_size)
+
+    def process(self, values, out):
+        """
+        Filters a block of samples.
+
+        Args:
+            values (numpy.ndarray): The samples of the block.
+            out (numpy.ndarray): The filtered samples, may be `values` itself.
+
+        Returns:
+            None
+        """
+        history = self.length - 1
+        if not self.primed:
+            self.buffer[:history] = values[0]
+            self.primed = True
+        self.buffer[history:] = values
+        np.cumsum(self.buffer, out=self.sums[1:])
+        np.subtract(self.sums[self.length:], self.sums[:self.size], out=out)
+        out /= self.length
+        self.buffer[:history] = self.buffer[self.buffer.size - history:]
+
+
+class FIR:
+    """
+    Finite impulse response filter, out[n] = sum(coefficients[k] * values[n - k]).
+
+    Attributes:
+        coefficients (numpy.ndarray): The coefficients of the filter.
+    """
+
+    def __init__(self, coefficients):
+        if len(coefficients) < 1:
+            raise ValueError("fir: at least one coefficient is needed")
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.reversed = np.ascontiguousarray(self.coefficients[::-1])
+        self.size = None
+        self.primed = False
+
+    def setup(self, block_size, sample_interval):
+        """
+        Allocates the scratch buffers for blocks of `block_size` samples.
+        """
+        self.size = block_size
+        self.primed = False
+        taps = self.coefficients.size
+        self.buffer = np.zeros(taps - 1 + block_size)
+        # One row per output sample, the samples it is computed from, without copy
+        self.windows = np.lib.stride_tricks.sliding_window_view(self.buffer, taps)
+
+    def process(self, values, out):
+        """
+        Filters a block of samples.
+
+        Args:
+            values (numpy.ndarray): The samples of the block.
+            out (numpy.ndarray): The filtered samples, may be `values` itself.
+
+        Returns:
+            None
+        """
+        history = self.coefficients.size - 1
+        if not self.primed:
+            self.buffer[:history] = values[0]
+            self.primed = True
+        self.buffer[history:] = values
+        np.matmul(self.windows, self.reversed, out=out)
+        self.buffer[:history] = self.buffer[self.buffer.size - history:]
+
+
+class Biquad:
+    """
+    Second order IIR section:
+    out[n] = b0 values[n] + b1 values[n-1] + b2 values[n-2] - a1 out[n-1] - a2 out[n-2].
+
+    The recursion is not computed sample by sample: the output of a segment of the block is
+    the response to the segment from a zero state, a product with the lower triangular matrix
+    of the impulse response, plus the free response to the last two outputs of the previous
+    segment. Both are precomputed for segments of SEGMENT_SIZE samples.
+
+    Attributes:
+        b (tuple): The feedforward coefficients b0, b1, b2.
+        a (tuple): The feedback coefficients a1, a2.
+    """
+
+    def __init__(self, b0, b1, b2, a1, a2):
+        self.b = (b0, b1, b2)
+        self.a = (a1, a2)
+        self.size = None
+        self.primed = False
+
+    def setup(self, block_size, sample_interval):
+        """
+        Allocates the scratch buffers and precomputes the responses of the recursion.
+        """
+        self.size = block_size
+        self.primed = False
+        a1, a2 = self.a
+        length = min(block_size, SEGMENT_SIZE)
+        impulse = np.zeros(length)
+        free1 = np.zeros(length)
+        free2 = np.zeros(length)
+        # Impulse response, then the responses to out[-1] = 1 and to out[-2] = 1
+        for response, first, previous, before in ((impulse, 1.0, 0.0, 0.0),
+                                                  (free1, 0.0, 1.0, 0.0),
+                                                  (free2, 0.0, 0.0, 1.0)):
+            for n in range(length):
+                value = (first if n == 0 else 0.0) - a1 * previous - a2 * before
+                response[n] = value
+                previous, before = value, previous
+        rows, columns = np.indices((length, length))
+        self.response = np.where(rows >= columns, impulse[np.maximum(rows - columns, 0)], 0.0)
+        self.free1 = free1
+        self.free2 = free2
+        self.buffer = np.zeros(2 + block_size)
+        self.windows = np.lib.stride_tricks.sliding_window_view(self.buffer, 3)
+        self.reversed = np.array(self.b[::-1])
+        self.feedforward = np.zeros(block_size)
+        self.scratch = np.zeros(length)
+        self.previous = 0.0
+        self.before = 0.0
+
+    def process(self, values, out):
+        """
+        Filters a block of samples.
+
+        Args:
+            values (numpy.ndarray): The samples of the block.
+            out (numpy.ndarray): The filtered samples, may be `values` itself.
+
+        Returns:
+            None
+        """
+        if not self.primed:
+            self.buffer[:2] = values[0]
+            gain = 1.0 + self.a[0] + self.a[1]
+            steady = values[0] * sum(self.b) / gain if gain else 0.0
+            self.previous = self.before = steady
+            self.primed = True
+        self.buffer[2:] = values
+        np.matmul(self.windows, self.reversed, out=self.feedforward)
+        self.buffer[:2] = self.buffer[self.buffer.size - 2:]
+        length = self.free1.size
+        for start in range(0, self.size, length):
+            count = min(length, self.size - start)
+            segment = out[start:start + count]
+            np.matmul(self.response[:count, :count], self.feedforward[start:start + count],
+                      out=segment)
+            np.multiply(self.free1[:count], self.previous, out=self.scratch[:count])
+            segment += self.scratch[:count]
+            np.multiply(self.free2[:count], self.before, out=self.scratch[:count])
+            segment += self.scratch[:count]
+            self.before = segment[-2] if count > 1 else self.previous
+            self.previous = segment[-1]
+
+
+class LowPass(Biquad):
+    """
+    Second order low-pass Butterworth-like biquad, designed for the sample rate of the streaming.
+
+    Attributes:
+        cutoff (float): The cutoff frequency in Hz.
+        q (float): The quality factor, 0.7071 for a maximally flat response.
+    """
+
+    def __init__(self, cutoff, q=0.7071):
+        if cutoff <= 0 or q <= 0:
+            raise ValueError("lowpass: the cutoff and the quality factor must be positive")
+        super().__init__(1.0, 0.0, 0.0, 0.0, 0.0)
+        self.cutoff = cutoff
+        self.q = q
+
+    def setup(self, block_size, sample_interval):
+        """
+        Computes the coefficients for the sample rate, then allocates the scratch buffers.
+        """
+        omega = 2 * math.pi * min(self.cutoff * sample_interval, 0.49)
+        alpha = math.sin(omega) / (2 * self.q)
+        cosine = math.cos(omega)
+        a0 = 1 + alpha
+        self.b = ((1 - cosine) / 2 / a0, (1 - cosine) / a0, (1 - cosine) / 2 / a0)
+        self.a = (-2 * cosine / a0, (1 - alpha) / a0)
+        super().setup(block_size, sample_interval)
+
+
+class DCRemoval(Biquad):
+    """
+    DC removal, out[n] = values[n] - values[n-1] + pole * out[n-1].
+
+    Attributes:
+        pole (float): The pole of the filter, between 0 and 1, closer to 1 for a lower cutoff.
+    """
+
+    def __init__(self, pole=0.995):
+        if not 0 <= pole < 1:
+            raise ValueError("dc: the pole must be between 0 and 1")
+        super().__init__(1.0, -1.0, 0.0, -pole, 0.0)
+        self.pole = pole
+
+
+FILTERS = {
+    'average': (MovingAverage, 1, 1),
+    'fir': (FIR, 1, None),
+    'biquad': (Biquad, 5, 5),
+    'lowpass': (LowPass, 1, 2),
+    'dc': (DCRemoval, 0, 1),
+}
+
+
+class FilterChain:
+    """
+    The filters of a channel, applied one after the other.
+
+    Attributes:
+        spec (str): The description of the chain it was parsed from.
+        filters (list): The filters, in order.
+    """
+
+    def __init__(self, spec, filters):
+        self.spec = spec
+        self.filters = filters
+        self.size = None
+        self.sample_interval = None
+
+    def process(self, values, sample_interval):
+        """
+        Filters a block of samples in place.
+
+        Args:
+            values (numpy.ndarray): The samples of the block of the channel.
+            sample_interval (float): The time between two samples in seconds.
+
+        Returns:
+            None
+        """
+        if self.size != values.size or self.sample_interval != sample_interval:
+            for item in self.filters:
+                item.setup(values.size, sample_interval)
+            self.size = values.size
+            self.sample_interval = sample_interval
+        for item in self.filters:
+            item.process(values, values)
+
+
+def parse_chain(spec):
+    """
+    Parses the description of a filter chain.
+
+    Args:
+        spec (str): The filters separated by ';', e.g. "dc(0.995); average(16)".
+
+    Returns:
+        FilterChain: The chain, or None if the description is empty.
+
+    Raises:
+        ValueError: If a filter is unknown or has wrong arguments.
+    """
+    filters = []
+    for item in spec.split(';'):
+        item = item.strip()
+        if not item:
+            continue
+        name, parenthesis, arguments = item.partition('(')
+        name = name.strip().lower()
+        if name not in FILTERS:
+            raise ValueError("Unknown filter: " + name)
+        if parenthesis and not arguments.endswith(')'):
+            raise ValueError("Missing ')' after the arguments of " + name)
+        arguments = arguments[:-1]
+        try:
+            values = [float(value) for value in arguments.split(',') if value.strip()]
+        except ValueError:
+            raise ValueError("Invalid arguments for " + name + ": " + arguments)
+        kind, minimum, maximum = FILTERS[name]
+        if len(values) < minimum or (maximum is not None and len(values) > maximum):
+            raise ValueError("Wrong number of arguments for " + name)
+        if kind is FIR:
+            filters.append(FIR(values))
+        elif kind is MovingAverage:
+            filters.append(MovingAverage(int(values[0])))
+        else:
+            filters.append(kind(*values))
+    if not filters:
+        return None
+    return FilterChain(spec.strip(), filters)
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
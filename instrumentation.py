@@ -0,0 +1,187 @@
+import bisect
+import threading
+import time
+
+# Instrumentation is off by default. Call sites check `enabled` before reading the clock:
+#
+#     start = time.perf_counter_ns() if instrumentation.enabled else 0
+#     ...
+#     if start:
+#         instrumentation.record('stage', start)
+#
+# so that turning it off leaves a single attribute lookup on the hot path.
+enabled = False
+
+STAGES = [
+    'driver.setDataBuffers',
+    'driver.runStreaming',
+    'driver.getStreamingLatestValues',
+    'driver.stop',
+    'fetcher.emit',
+    'fetcher.filters',
+    'fetcher.recorder',
+    'fetcher.rates',
+    'plot.update_plot',
+    'plot.setData',
+    'plot.persistence',
+    'logger.log_aggregates',
+]
+
+# Upper bounds of the histogram buckets in nanoseconds (1 µs to 10 s, 1-2-5 steps).
+# The last bucket catches everything above the highest bound.
+BUCKET_BOUNDS = [mantissa * 10 ** exponent
+                 for exponent in range(3, 10) for mantissa in (1, 2, 5)] + [10 ** 10]
+
+
+class Histogram:
+    """
+    A fixed-bucket latency histogram.
+
+    The buckets are allocated once, recording a duration only increments counters.
+
+    Attributes:
+        counts (list): The number of durations recorded in each bucket.
+        count (int): The total number of recorded durations.
+        total (int): The sum of the recorded durations in nanoseconds.
+        max (int): The longest recorded duration in nanoseconds.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, duration):
+        """
+        Records a duration.
+
+        Args:
+            duration (int): The duration in nanoseconds.
+
+        Returns:
+            None
+        """
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, duration)] += 1
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def percentile(self, percent):
+        """
+        Returns the upper bound of the bucket holding the given percentile.
+
+        Args:
+            percent (float): The percentile, between 0 and 100.
+
+        Returns:
+            int: The duration in nanoseconds, or 0 if nothing was recorded.
+        """
+        if self.count == 0:
+            return 0
+        rank = percent / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def reset(self):
+        """
+        Clears all the recorded durations.
+        """
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+
+histograms = {stage: Histogram() for stage in STAGES}
+histograms_lock = threading.Lock()
+
+
+def set_enabled(value):
+    """
+    Turns the instrumentation on or off.
+
+    Args:
+        value (bool): True to record durations, False to skip all timing.
+
+    Returns:
+        None
+    """
+    global enabled
+    enabled = bool(value)
+
+
+def record(stage, start):
+    """
+    Records the time elapsed since `start` for the given stage.
+
+    Args:
+        stage (str): The name of the stage, one of STAGES.
+        start (int): The value of time.perf_counter_ns() when the stage started.
+
+    Returns:
+        None
+    """
+    duration = time.perf_counter_ns() - start
+    with histograms_lock:
+        histograms[stage].add(duration)
+
+
+def reset():
+    """
+    Clears the histograms of all stages.
+    """
+    with histograms_lock:
+        for histogram in histograms.values():
+            histogram.reset()
+
+
+def summary():
+    """
+    Returns one line per stage with its count, mean, p50, p99 and max durations.
+
+    Returns:
+        list: The summary lines, durations are in microseconds.
+    """
+    lines = []
+    with histograms_lock:
+        for stage, histogram in histograms.items():
+            if histogram.count == 0:
+                lines.append(f"{stage}: -")
+                continue
+            lines.append(f"{stage}: n={histogram.count}"
+                         f" mean={histogram.total / histogram.count / 1000:.1f}µs"
+                         f" p50={histogram.percentile(50) / 1000:.0f}µs"
+                         f" p99={histogram.percentile(99) / 1000:.0f}µs"
+                         f" max={histogram.max / 1000:.0f}µs")
+    return lines
+
+
+def dump(file_path):
+    """
+    Writes the summary and the raw bucket counts of all stages to a file.
+
+    Args:
+        file_path (str): The path of the file to write.
+
+    Returns:
+        str: The path of the written file.
+    """
+    with open(file_path, 'w') as file:
+        file.write(time.strftime("%Y-%m-%d %H:%M:%S") + "\n")
+        for line in summary():
+            file.write(line + "\n")
+        file.write("\nbucket_upper_bound_ns;" + ";".join(STAGES) + "\n")
+        with histograms_lock:
+            for index in range(len(BUCKET_BOUNDS) + 1):
+                bound = str(BUCKET_BOUNDS[index]) if index < len(BUCKET_BOUNDS) else "inf"
+                file.write(bound + ";" + ";".join(
+                    str(histograms[stage].counts[index]) for stage in STAGES) + "\n")
+    return file_path
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
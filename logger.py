@@ -1,68 +1,364 @@
 import csv
+import gzip
+import io
 import os
 import datetime
+import time
+import atexit
+import queue
+import sys
+import threading
+import numpy as np
+import instrumentation
+import logindex
 
 path = './logs/'
 header = ['Time', 'Channel_A', 'Channel_B', 'Channel_C']
+time_format = "%Y-%m-%d %H:%M:%S.%f"
 
-def log_action(action):
+# Index of the CSV file currently written by log_aggregates(), see logindex
+index_writer = None
+
+# The channels of the slow rate class are logged by log_aggregates() in this sub-folder of the
+# day folder, one row per period with the mean, minimum, maximum and count of each channel
+SLOW_FOLDER = 'slow'
+slow_file = None
+
+# Actions are queued by log_action() and written by a background thread,
+# see action_writer()
+ACTION_FLUSH_INTERVAL = 1.0
+# Maximum time flush_actions() waits for the writer in seconds
+ACTION_FLUSH_TIMEOUT = 5.0
+# Estimated size in bytes of a queued action, for the memory budget
+ACTION_SIZE = 256
+action_queue = queue.Queue()
+action_writer_thread = None
+action_writer_lock = threading.Lock()
+
+def log_action(action, level='info'):
     """
     Logs the given action to a file.
 
+    The action is queued and written by a background thread, entries of level 'error' are
+    flushed to the disk immediately.
+
     Parameters:
     - action (str): The action to be logged.
+    - level (str): 'info', 'warning' or 'error' (default: 'info').
 
     Returns:
     None
     """
-    directory = create_folder()
-    file_path = os.path.join(directory, 'actions.txt')
-    with open(file_path, 'a') as file:
-        current_time = datetime.datetime.now().strftime("%H:%M:%S")
-        file.write(f"[{current_time}] - {action}\n")
+    start_action_writer()
+    action_queue.put((datetime.datetime.now(), action, level))
 
-def log_values(values, max_size_mb=15):
+def get_pending_bytes(level=0):
     """
-    Logs the given values to a file.
+    Returns the estimated bytes held by the actions waiting to be written.
 
     Parameters:
-    - values (list): The values to be logged.
+    - level (int): The degradation level of the memory budget, not used.
+
+    Returns:
+    int: The estimated size of the queued actions in bytes.
+    """
+    return action_queue.qsize() * ACTION_SIZE
+
+def flush_actions():
+    """
+    Blocks until all the queued actions are written to the disk, at most
+    ACTION_FLUSH_TIMEOUT seconds.
+
+    Returns:
+    None
+    """
+    if action_writer_thread is None or not action_writer_thread.is_alive():
+        return
+    done = threading.Event()
+    action_queue.put(done)
+    done.wait(ACTION_FLUSH_TIMEOUT)
+
+def close_action_log():
+    """
+    Writes the queued actions and stops the background writer.
+
+    Returns:
+    None
+    """
+    global action_writer_thread
+    with action_writer_lock:
+        if action_writer_thread is None:
+            return
+        action_queue.put(None)
+        action_writer_thread.join()
+        action_writer_thread = None
+
+def start_action_writer():
+    """
+    Starts the background writer of the actions if it is not running, or restarts it if it
+    stopped unexpectedly.
+
+    Returns:
+    None
+    """
+    global action_writer_thread
+    if action_writer_thread is not None and action_writer_thread.is_alive():
+        return
+    with action_writer_lock:
+        if action_writer_thread is None or not action_writer_thread.is_alive():
+            action_writer_thread = threading.Thread(
+                target=action_writer, daemon=True)
+            action_writer_thread.start()
+
+def action_writer():
+    """
+    Writes the queued actions to 'actions.txt' in the folder of their day.
+
+    The file stays open between entries and is reopened in the new day folder when the date
+    changes. It is flushed after error entries, on flush_actions() and whenever the queue has
+    been idle for ACTION_FLUSH_INTERVAL seconds. An entry that cannot be written (locked file,
+    full disk) is reported on stderr and the file is reopened for the next one.
+
+    Returns:
+    None
+    """
+    file = None
+    day = None
+    try:
+        while True:
+            try:
+                item = action_queue.get(timeout=ACTION_FLUSH_INTERVAL)
+            except queue.Empty:
+                item = False
+            if item is None:
+                break
+            try:
+                if item is False or isinstance(item, threading.Event):
+                    if file is not None:
+                        file.flush()
+                    continue
+                moment, action, level = item
+                if moment.date() != day:
+                    if file is not None:
+                        file.close()
+                        file = None
+                    file = open(os.path.join(create_folder(moment.date()), 'actions.txt'), 'a')
+                    day = moment.date()
+                current_time = moment.strftime("%H:%M:%S")
+                if level == 'info':
+                    file.write(f"[{current_time}] - {action}\n")
+                else:
+                    file.write(f"[{current_time}] - {level.capitalize()} - {action}\n")
+                if level == 'error':
+                    file.flush()
+            except OSError as e:
+                print(f"Error writing the action log: {e}", file=sys.stderr)
+                file = close_quietly(file)
+                day = None
+            finally:
+                if isinstance(item, threading.Event):
+                    item.set()
+    finally:
+        close_quietly(file)
+
+def close_quietly(file):
+    """
+    Closes a file, ignoring the errors of writing its buffered data.
+
+    Parameters:
+    - file (file): The file, or None.
+
+    Returns:
+    None
+    """
+    if file is None:
+        return None
+    try:
+        file.close()
+    except OSError as e:
+        print(f"Error writing the action log: {e}", file=sys.stderr)
+    return None
+
+atexit.register(close_action_log)
+
+def log_aggregates(times, mean, minimum, maximum, samples, names, max_size_mb=15, slow=False):
+    """
+    Logs the mean, minimum, maximum and number of samples of channels, one row per interval.
+
+    Each channel has four columns, e.g. 'Channel_A', 'Channel_A_Min', 'Channel_A_Max' and
+    'Channel_A_Count', see aggregate_columns(). The rows are indexed in a '.idx' file next
+    to the CSV file, see logindex, except for the slow channels, logged to the SLOW_FOLDER
+    sub-folder of the day folder.
+
+    Parameters:
+    - times (numpy.ndarray): The start time of each interval as a POSIX timestamp.
+    - mean (numpy.ndarray): The mean of each channel and interval, one row per channel.
+    - minimum (numpy.ndarray): The minimum of each channel and interval.
+    - maximum (numpy.ndarray): The maximum of each channel and interval.
+    - samples (numpy.ndarray): The number of samples of each interval.
+    - names (list): The names of the channels.
     - max_size_mb (int): The maximum size of the log file in MB.
+    - slow (bool): True for the channels of the slow rate class (default: False).
 
     Returns:
     None
     """
-    directory = create_folder()
-    if check_csv_file_size(directory, max_size_mb):
-        file_path = add_csv_file(directory)
+    global slow_file
+    start = time.perf_counter_ns() if instrumentation.enabled else 0
+    columns = aggregate_columns(names)
+    if slow:
+        directory = os.path.join(create_folder(), SLOW_FOLDER)
+        os.makedirs(directory, exist_ok=True)
+        current = slow_file[0] if slow_file is not None and slow_file[1] == columns else None
+        file_path = get_csv_file(directory, columns, max_size_mb, current)
+        slow_file = (file_path, columns)
     else:
-        latest_file = get_latest_csv_file(directory)
-        file_path = os.path.join(directory, latest_file)
-    
-    write_values(file_path, values)
+        file_path = get_values_file(max_size_mb, columns[1:])
+    rows = np.empty((times.size, len(columns) - 1))
+    rows[:, 0::4] = mean.T
+    rows[:, 1::4] = minimum.T
+    rows[:, 2::4] = maximum.T
+    rows[:, 3::4] = samples[:, np.newaxis]
+    with open(file_path, 'a', newline='') as file:
+        offset = file.tell()
+        lines = []
+        for row_time, row, count in zip(times.tolist(), rows.tolist(), samples.tolist()):
+            # The counts are written as integers
+            row[3::4] = [count] * len(names)
+            line = format_time(row_time) + ',' + ','.join(map(str, row)) + '\r\n'
+            if not slow:
+                index_writer.add(row_time, offset, row, offset + len(line))
+            offset += len(line)
+            lines.append(line)
+        file.write(''.join(lines))
+    if start:
+        instrumentation.record('logger.log_aggregates', start)
+
+def aggregate_columns(names):
+    """
+    Returns the header of the rows written by log_aggregates().
+
+    Parameters:
+    - names (list): The names of the channels.
 
-def create_folder():
+    Returns:
+    list: 'Time', then the mean, minimum, maximum and count column of each channel.
+    """
+    columns = ['Time']
+    for name in names:
+        columns += [name, name + '_Min', name + '_Max', name + '_Count']
+    return columns
+
+def get_values_file(max_size_mb, names):
+    """
+    Returns the CSV file the next values are logged to, moving to a new file when the
+    latest one exceeds the maximum size or has other columns.
+
+    Parameters:
+    - max_size_mb (int): The maximum size of the log file in MB.
+    - names (list): The column names of the channels of the logged rows.
+
+    Returns:
+    str: The path of the CSV file.
+    """
+    global index_writer
+    names = list(names)
+    current = None
+    if index_writer is not None and index_writer.names == names:
+        current = index_writer.file_path
+    file_path = get_csv_file(create_folder(), ['Time'] + names, max_size_mb, current)
+
+    if index_writer is None or index_writer.file_path != file_path:
+        close_values_log()
+        index_writer = logindex.IndexWriter(file_path, names)
+    return file_path
+
+def get_csv_file(directory, columns, max_size_mb, current=None):
+    """
+    Returns the CSV file of a folder the next rows are logged to.
+
+    The latest file is kept unless it exceeds the maximum size or its header differs from
+    `columns`, in which case a new file is created.
+
+    Parameters:
+    - directory (str): The folder of the CSV files.
+    - columns (list): The header of the logged rows.
+    - max_size_mb (int): The maximum size of the log file in MB.
+    - current (str): The path of a file known to have the header, to skip reading it (default: None).
+
+    Returns:
+    str: The path of the CSV file.
+    """
+    if not check_csv_file_size(directory, max_size_mb):
+        file_path = os.path.join(directory, get_latest_csv_file(directory))
+        if file_path == current or read_header(file_path) == columns:
+            return file_path
+    return add_csv_file(directory, columns)
+
+def close_values_log():
+    """
+    Indexes the rows of the current CSV file that are not indexed yet.
+
+    Returns:
+    None
+    """
+    global index_writer
+    if index_writer is not None:
+        index_writer.flush()
+        index_writer = None
+
+atexit.register(close_values_log)
+
+def format_time(timestamp):
+    """
+    Formats a POSIX timestamp as written in the Time column of the CSV files.
+
+    Args:
+        timestamp (float): The POSIX timestamp.
+
+    Returns:
+        str: The local date and time, with microseconds.
+    """
+    return datetime.datetime.fromtimestamp(timestamp).strftime(time_format)
+
+def parse_time(text):
+    """
+    Parses the Time column of the CSV files.
+
+    Args:
+        text (str): The local date and time, as written by format_time().
+
+    Returns:
+        float: The POSIX timestamp.
+    """
+    return datetime.datetime.fromisoformat(text).timestamp()
+
+def create_folder(day=None):
     """
     Creates a folder with the current date as the name.
 
+    Args:
+        day (datetime.date): The date of the folder (default: today).
+
     Returns:
         str: The path of the created folder.
     """
-    today = datetime.date.today()
-    folder_name = today.strftime("%Y-%m-%d")
+    if day is None:
+        day = datetime.date.today()
+    folder_name = day.strftime("%Y-%m-%d")
     folder_path = os.path.join(path, folder_name)
     
-    if not os.path.exists(folder_path):
-        os.makedirs(folder_path)
+    os.makedirs(folder_path, exist_ok=True)
     
     return folder_path
 
-def add_csv_file(directory):
+def add_csv_file(directory, columns=None):
     """
     Creates a new CSV file in the specified directory with a unique name.
     
     Args:
         directory (str): The directory where the CSV file should be created.
+        columns (list): The header row of the file (default: `header`).
         
     Returns:
         str: The path of the newly created CSV file.
@@ -71,32 +367,17 @@ def add_csv_file(directory):
     file_path = os.path.join(directory, file_name + ".csv")
     count = 1
     
-    while os.path.exists(file_path):
+    while os.path.exists(file_path) or os.path.exists(file_path + '.gz'):
         count += 1
         file_name = str(count)
         file_path = os.path.join(directory, file_name + ".csv")
     
     with open(file_path, 'w', newline='') as file:
         writer = csv.writer(file)
-        writer.writerow(header)
+        writer.writerow(header if columns is None else columns)
         
     return file_path
 
-def write_values(file_path, values):
-    """
-    Appends a row of values to a CSV file.
-
-    Args:
-        file_path (str): The path to the CSV file.
-        values (list): The list of values to be written as a row.
-
-    Returns:
-        None
-    """
-    with open(file_path, 'a', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(values)
-
 def check_csv_file_size(directory, max_size_mb):
     """
     Check if the size of the latest CSV file in the given directory exceeds the maximum size.
@@ -146,4 +427,77 @@ def get_latest_csv_file(directory):
                 latest_time = file_time
 
     return latest_file
+
+def list_log_files(directory):
+    """
+    Returns the CSV log files of a day folder in the order they were written.
+
+    Compressed files ('N.csv.gz') are listed along with the plain ones. A file both compressed
+    and not yet removed by the archiver is listed once, compressed.
+
+    Args:
+        directory (str): The day folder path.
+
+    Returns:
+        list: The paths of the log files.
+    """
+    files = {}
+    for file in os.listdir(directory):
+        name = file[:-3] if file.endswith('.gz') else file
+        if name.endswith('.csv') and name[:-4].isdigit():
+            number = int(name[:-4])
+            if number not in files or file.endswith('.gz'):
+                files[number] = os.path.join(directory, file)
+    return [files[number] for number in sorted(files)]
+
+def open_log_file(file_path, offset=0):
+    """
+    Opens a CSV log file for reading, whether it is compressed or not.
+
+    The file is decompressed on the fly while it is read, it never has to fit in memory.
+    Seeking into a compressed file decompresses the data before the offset.
+
+    Args:
+        file_path (str): The path of the '.csv' or '.csv.gz' file.
+        offset (int): The position in the uncompressed file to start reading from, in bytes (default: 0).
+
+    Returns:
+        file: The file object in text mode.
+    """
+    if file_path.endswith('.gz'):
+        file = gzip.open(file_path, 'rb')
+    else:
+        file = open(file_path, 'rb')
+    if offset:
+        file.seek(offset)
+    return io.TextIOWrapper(file, newline='')
+
+def read_header(file_path):
+    """
+    Returns the header row of a CSV log file, whether it is compressed or not.
+
+    Args:
+        file_path (str): The path of the '.csv' or '.csv.gz' file.
+
+    Returns:
+        list: The column names, empty if the file is empty.
+    """
+    with open_log_file(file_path) as file:
+        return next(csv.reader(file), [])
+
+def read_log_rows(file_path):
+    """
+    Iterates over the rows of a CSV log file, whether it is compressed or not.
+
+    Args:
+        file_path (str): The path of the '.csv' or '.csv.gz' file.
+
+    Yields:
+        list: The values of each row, the header row excluded.
+    """
+    with open_log_file(file_path) as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        for row in reader:
+            yield row
 # © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
@@ -0,0 +1,399 @@
+import csv
+import datetime
+import os
+import numpy as np
+import logger
+
+# Every CSV log file 'N.csv' has an index 'N.idx' next to it. The index holds one line per
+# chunk of ROWS_PER_CHUNK rows:
+#   first_time, last_time, offset, end, rows, then the min and max of each channel
+# where the times are POSIX timestamps, offset and end the positions in bytes of the first
+# row of the chunk and of the end of its last row in the uncompressed CSV file. The rows
+# after the last complete chunk are indexed when the logger moves to the next file or closes.
+ROWS_PER_CHUNK = 1000
+index_header = ['First_Time', 'Last_Time', 'Offset', 'End', 'Rows']
+
+
+def get_index_path(file_path):
+    """
+    Returns the path of the index of a CSV log file.
+
+    Args:
+        file_path (str): The path of the '.csv' or '.csv.gz' file.
+
+    Returns:
+        str: The path of the '.idx' file.
+    """
+    if file_path.endswith('.gz'):
+        file_path = file_path[:-3]
+    return file_path[:-4] + '.idx'
+
+
+class IndexWriter:
+    """
+    Builds the index of a CSV log file while the logger writes it.
+
+    Attributes:
+        file_path (str): The path of the indexed CSV file.
+        names (list): The column names of the channels of each row.
+        channels (int): The number of channels of each row.
+        rows (int): The number of rows of the current chunk.
+    """
+
+    def __init__(self, file_path, names):
+        self.file_path = file_path
+        self.index_path = get_index_path(file_path)
+        self.names = list(names)
+        channels = self.channels = len(self.names)
+        self.rows = 0
+        self.first_time = None
+        self.last_time = None
+        self.offset = 0
+        self.end = None
+        self.minimum = [0.0] * channels
+        self.maximum = [0.0] * channels
+        if not os.path.exists(self.index_path):
+            with open(self.index_path, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(index_header + [f"{bound}_{channel}"
+                                                for channel in self.names
+                                                for bound in ('Min', 'Max')])
+
+    def add(self, timestamp, offset, values, end=None):
+        """
+        Accounts for a row written to the CSV file.
+
+        Args:
+            timestamp (float): The time of the row.
+            offset (int): The position of the row in the CSV file in bytes.
+            values (list): The channel values of the row.
+            end (int): The position of the end of the row in bytes, needed if the row is not
+                written to the file yet (default: None, the size of the file).
+
+        Returns:
+            None
+        """
+        # The end is known now: once the logger moves to the next file, the archiver may
+        # compress and remove this one before the chunk is flushed
+        self.end = os.path.getsize(self.file_path) if end is None else end
+        if self.rows == 0:
+            self.first_time = timestamp
+            self.offset = offset
+            self.minimum[:] = values
+            self.maximum[:] = values
+        else:
+            for i, value in enumerate(values):
+                if value < self.minimum[i]:
+                    self.minimum[i] = value
+                elif value > self.maximum[i]:
+                    self.maximum[i] = value
+        self.last_time = timestamp
+        self.rows += 1
+        if self.rows >= ROWS_PER_CHUNK:
+            self.flush()
+
+    def flush(self):
+        """
+        Appends the current chunk to the index, if it holds any row.
+        """
+        if self.rows == 0:
+            return
+        bounds = []
+        for minimum, maximum in zip(self.minimum, self.maximum):
+            bounds += [minimum, maximum]
+        with open(self.index_path, 'a', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow([repr(self.first_time), repr(self.last_time), self.offset,
+                             self.end, self.rows] + bounds)
+        self.rows = 0
+
+
+def read_index(file_path):
+    """
+    Reads the index of a CSV log file.
+
+    Args:
+        file_path (str): The path of the '.csv' or '.csv.gz' file.
+
+    Returns:
+        list: One dict per chunk with the keys 'first_time', 'last_time', 'offset', 'end', 'rows',
+        'min' and 'max' (lists, one value per channel), or None if the file has no index.
+    """
+    index_path = get_index_path(file_path)
+    if not os.path.exists(index_path):
+        return None
+    chunks = []
+    with open(index_path, 'r', newline='') as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        for row in reader:
+            bounds = [float(value) for value in row[5:]]
+            chunks.append({
+                'first_time': float(row[0]),
+                'last_time': float(row[1]),
+                'offset': int(row[2]),
+                'end': int(row[3]),
+                'rows': int(row[4]),
+                'min': bounds[0::2],
+                'max': bounds[1::2],
+            })
+    return chunks
+
+
+def query(directory, start, end):
+    """
+    Iterates over the logged rows of a day folder between two times.
+
+    The indexes are used to skip the files outside of the window and to seek directly to the
+    first chunk of the window. Files without an index are scanned from their beginning.
+
+    Args:
+        directory (str): The day folder.
+        start (float): The start of the window, as a POSIX timestamp.
+        end (float): The end of the window, as a POSIX timestamp.
+
+    Yields:
+        tuple: The time of the row (float) and its channel values (list of float).
+    """
+    for file_path in logger.list_log_files(directory):
+        yield from query_file(file_path, read_index(file_path), start, end)
+
+
+def query_file(file_path, chunks, start, end):
+    """
+    Iterates over the logged rows of a CSV log file between two times.
+
+    Args:
+        file_path (str): The path of the '.csv' or '.csv.gz' file.
+        chunks (list): The index of the file, as returned by read_index().
+        start (float): The start of the window, as a POSIX timestamp.
+        end (float): The end of the window, as a POSIX timestamp.
+
+    Yields:
+        tuple: The time of the row (float) and its channel values (list of float).
+    """
+    if not chunks:
+        yield from read_rows(file_path, None, start, end)
+        return
+    if chunks[0]['first_time'] > end:
+        return
+    if chunks[-1]['last_time'] < start and not has_tail(file_path, chunks):
+        return
+    offset = next((chunk['offset'] for chunk in chunks
+                   if chunk['last_time'] >= start), chunks[-1]['end'])
+    yield from read_rows(file_path, offset, start, end)
+
+
+def has_tail(file_path, chunks):
+    """
+    Returns True if rows were logged after the last indexed chunk of a file.
+
+    Compressed files are closed, their index is complete.
+    """
+    return not file_path.endswith('.gz') and os.path.getsize(file_path) > chunks[-1]['end']
+
+
+def read_rows(file_path, offset, start, end):
+    """
+    Reads the rows of a CSV log file between two times.
+
+    Args:
+        file_path (str): The path of the '.csv' or '.csv.gz' file.
+        offset (int): The position to read from in bytes, None to read from the beginning.
+        start (float): The start of the window, as a POSIX timestamp.
+        end (float): The end of the window, as a POSIX timestamp.
+
+    Yields:
+        tuple: The time of the row (float) and its channel values (list of float).
+    """
+    with logger.open_log_file(file_path, offset or 0) as file:
+        reader = csv.reader(file)
+        if offset is None:
+            next(reader, None)
+        for row in reader:
+            timestamp = logger.parse_time(row[0])
+            if timestamp < start:
+                continue
+            if timestamp > end:
+                return
+            yield timestamp, [float(value) for value in row[1:]]
+
+
+def query_min_max(directory, start, end, channel, exact=False):
+    """
+    Returns the minimum and maximum of a channel between two times.
+
+    The extremes are read from the 'X_Min' and 'X_Max' columns of the channel in the rows
+    aggregated by logger.log_aggregates(), or from its 'X' column in rows of single samples,
+    see get_positions(). The files of the slow channels, in the logger.SLOW_FOLDER sub-folder,
+    are searched too.
+
+    Without `exact`, the answer comes from the indexes alone: the chunks overlapping the
+    window are combined, so the extremes of a few rows just outside of the window may be
+    included. With `exact`, only the chunks crossing the edges of the window are read.
+    Rows not yet indexed and files without an index are always read.
+
+    Args:
+        directory (str): The day folder.
+        start (float): The start of the window, as a POSIX timestamp.
+        end (float): The end of the window, as a POSIX timestamp.
+        channel (str): The column name of the channel, e.g. 'Channel_A'.
+        exact (bool): True to read the rows of the edge chunks (default: False).
+
+    Returns:
+        tuple: The minimum and the maximum, or None if no row is in the window.
+    """
+    minimum = None
+    maximum = None
+
+    def merge(low, high):
+        nonlocal minimum, maximum
+        minimum = low if minimum is None else min(minimum, low)
+        maximum = high if maximum is None else max(maximum, high)
+
+    files = logger.list_log_files(directory)
+    if os.path.isdir(os.path.join(directory, logger.SLOW_FOLDER)):
+        files += logger.list_log_files(os.path.join(directory, logger.SLOW_FOLDER))
+    for file_path in files:
+        low, high = get_positions(logger.read_header(file_path)[1:], [channel])[0]
+        if low is None:
+            continue
+        chunks = read_index(file_path)
+        if not chunks:
+            for _, values in read_rows(file_path, None, start, end):
+                merge(values[low], values[high])
+            continue
+        for chunk in chunks:
+            if chunk['last_time'] < start or chunk['first_time'] > end:
+                continue
+            inside = start <= chunk['first_time'] and chunk['last_time'] <= end
+            if inside or not exact:
+                merge(chunk['min'][low], chunk['max'][high])
+                continue
+            for timestamp, values in read_rows(file_path, chunk['offset'], start, end):
+                if timestamp > chunk['last_time']:
+                    break
+                merge(values[low], values[high])
+        if has_tail(file_path, chunks):
+            for _, values in read_rows(file_path, chunks[-1]['end'], start, end):
+                merge(values[low], values[high])
+    if minimum is None:
+        return None
+    return minimum, maximum
+
+
+def get_positions(names, columns):
+    """
+    Returns the positions of the minimum and the maximum of channels in the rows of a log file.
+
+    The rows aggregated by logger.log_aggregates() hold the extremes of a channel 'X' in the
+    columns 'X_Min' and 'X_Max', the rows of single samples hold them in the column 'X'.
+
+    Args:
+        names (list): The header of the file, without the Time column.
+        columns (list): The column names of the channels.
+
+    Returns:
+        list: A tuple of the positions of the minimum and of the maximum per channel, both
+        None if the channel is not in the file.
+    """
+    positions = []
+    for name in columns:
+        if name + '_Min' in names and name + '_Max' in names:
+            positions.append((names.index(name + '_Min'), names.index(name + '_Max')))
+        elif name in names:
+            positions.append((names.index(name), names.index(name)))
+        else:
+            positions.append((None, None))
+    return positions
+
+
+def query_envelope(root, start, end, bins, columns=None):
+    """
+    Returns the min/max envelope of all the channels between two times, for display.
+
+    The window is divided in `bins` intervals of equal duration and the minimum and maximum
+    of each interval are returned, so the cost of drawing the result does not depend on the
+    length of the window. When a file has at least one indexed chunk per interval, the
+    envelope is built from the index alone, otherwise the rows of the window are read. The
+    files of the slow channels, in the logger.SLOW_FOLDER sub-folder of each day, are read too.
+
+    Args:
+        root (str): The log folder containing one folder per day.
+        start (float): The start of the window, as a POSIX timestamp.
+        end (float): The end of the window, as a POSIX timestamp.
+        bins (int): The number of intervals, typically the width of the plot in pixels.
+        columns (list): The column names of the channels to return, matched against the header
+            of each file, so files logged with other channels are combined correctly (default:
+            the channels of the files, by position).
+
+    Returns:
+        tuple: The times (numpy.ndarray) and the values (numpy.ndarray, one row per channel)
+        of the envelope, two points per interval holding data, NaN for a channel without
+        data in the interval. Both are empty if nothing was logged in the window.
+    """
+    edges = np.linspace(start, end, bins + 1)
+    low = None
+    high = None
+    if columns is not None:
+        low = np.full((len(columns), bins), np.inf)
+        high = np.full((len(columns), bins), -np.inf)
+
+    def accumulate(times, lows, highs, positions):
+        nonlocal low, high
+        if low is None:
+            low = np.full((lows.shape[0], bins), np.inf)
+            high = np.full((lows.shape[0], bins), -np.inf)
+        index = np.clip(np.searchsorted(edges, times, 'right') - 1, 0, bins - 1)
+        for channel in range(low.shape[0]):
+            low_position, high_position = ((channel, channel) if positions is None
+                                           else positions[channel])
+            if low_position is None or low_position >= lows.shape[0]:
+                continue
+            np.minimum.at(low[channel], index, lows[low_position])
+            np.maximum.at(high[channel], index, highs[high_position])
+
+    day = datetime.date.fromtimestamp(start)
+    while day <= datetime.date.fromtimestamp(end):
+        directory = os.path.join(root, day.strftime("%Y-%m-%d"))
+        day += datetime.timedelta(days=1)
+        if not os.path.isdir(directory):
+            continue
+        files = logger.list_log_files(directory)
+        if os.path.isdir(os.path.join(directory, logger.SLOW_FOLDER)):
+            files += logger.list_log_files(os.path.join(directory, logger.SLOW_FOLDER))
+        for file_path in files:
+            chunks = read_index(file_path)
+            inside = [chunk for chunk in chunks or []
+                      if chunk['last_time'] >= start and chunk['first_time'] <= end]
+            positions = None
+            if columns is not None:
+                positions = get_positions(logger.read_header(file_path)[1:], columns)
+                if all(position is None for position, _ in positions):
+                    continue
+            if len(inside) >= bins:
+                accumulate(np.array([chunk['first_time'] for chunk in inside]),
+                           np.array([chunk['min'] for chunk in inside]).T,
+                           np.array([chunk['max'] for chunk in inside]).T, positions)
+                if not has_tail(file_path, chunks):
+                    continue
+                rows = read_rows(file_path, chunks[-1]['end'], start, end)
+            else:
+                rows = query_file(file_path, chunks, start, end)
+            rows = list(rows)
+            if rows:
+                values = np.array([values for _, values in rows]).T
+                accumulate(np.array([timestamp for timestamp, _ in rows]), values, values,
+                           positions)
+    if low is None:
+        return np.empty(0), np.empty((0, 0))
+    filled = np.isfinite(low).any(axis=0)
+    centers = (edges[:-1] + edges[1:]) / 2
+    times = np.repeat(centers[filled], 2)
+    values = np.empty((low.shape[0], times.size))
+    values[:, 0::2] = low[:, filled]
+    values[:, 1::2] = high[:, filled]
+    # A channel without data in an interval others have data in
+    values[np.isinf(values)] = np.nan
+    return times, values
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
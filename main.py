@@ -1,12 +1,18 @@
 import sys
 import os
 import ctypes
+import datetime
+import instrumentation
+import filters
 from plotting import PicoPlotter
+from publisher import Publisher
+from archiver import LogArchiver
+from memory import MemoryBudget
 import picoS2000aRealtimeStreaming as pico
 from settings import Settings
 from PySide6 import QtWidgets, QtCore, QtUiTools, QtGui
 from devicesLink import list_all_devices
-from logger import log_action, log_values
+from logger import log_action, create_folder, get_pending_bytes
 
 
 def loadUiWidget(uifilename, parent=None):
@@ -37,6 +43,7 @@ def init_settings_tab():
     - Sets the log path and displays it in the list widget.
     - Sets the log frequency and connects it to the settings file.
     - Sets the file size limit and connects it to the settings file.
+    - Sets the disk quota and the retention age and connects them to the settings file and the log archiver.
     - Sets the log on/off button and connects it to the settings file.
     - Refreshes the list of connected devices and displays them in the list widget.
 
@@ -80,6 +87,38 @@ def init_settings_tab():
         lambda value: settings.write_to_settings_file('fileSizeLimit', value))
     spinBox_fileSizeLimit.valueChanged.connect(lambda: log_action(
         "File size limit is set to " + str(spinBox_fileSizeLimit.value()) + " megabytes"))
+    # Disk Quota
+    spinBox_diskQuota = main_window.findChild(
+        QtWidgets.QSpinBox, "spinBox_diskQuota")
+    if not settings.does_setting_exist('diskQuota'):
+        settings.write_to_settings_file(
+            'diskQuota', spinBox_diskQuota.value())
+    else:
+        spinBox_diskQuota.setValue(
+            int(settings.read_from_settings_file('diskQuota')))
+    archiver.set_quota(max_bytes=spinBox_diskQuota.value() * 1024 ** 3)
+    spinBox_diskQuota.valueChanged.connect(
+        lambda value: settings.write_to_settings_file('diskQuota', value))
+    spinBox_diskQuota.valueChanged.connect(
+        lambda value: archiver.set_quota(max_bytes=value * 1024 ** 3))
+    spinBox_diskQuota.valueChanged.connect(lambda: log_action(
+        "Disk quota is set to " + str(spinBox_diskQuota.value()) + " gigabytes"))
+    # Retention Days
+    spinBox_retentionDays = main_window.findChild(
+        QtWidgets.QSpinBox, "spinBox_retentionDays")
+    if not settings.does_setting_exist('retentionDays'):
+        settings.write_to_settings_file(
+            'retentionDays', spinBox_retentionDays.value())
+    else:
+        spinBox_retentionDays.setValue(
+            int(settings.read_from_settings_file('retentionDays')))
+    archiver.set_quota(max_age_days=spinBox_retentionDays.value())
+    spinBox_retentionDays.valueChanged.connect(
+        lambda value: settings.write_to_settings_file('retentionDays', value))
+    spinBox_retentionDays.valueChanged.connect(
+        lambda value: archiver.set_quota(max_age_days=value))
+    spinBox_retentionDays.valueChanged.connect(lambda: log_action(
+        "Log retention is set to " + str(spinBox_retentionDays.value()) + " days"))
     # Log On/Off
     pushButton_LogOnOff = main_window.findChild(
         QtWidgets.QPushButton, "pushButton_LogOnOff")
@@ -136,6 +175,603 @@ def init_settings_tab():
         lambda: log_action("Refreshing connected devices"))
 
 
+def init_diagnostics_panel():
+    """
+    Initializes the diagnostics panel of the settings tab.
+
+    This function performs the following tasks:
+    - Sets the instrumentation on/off button and connects it to the settings file.
+    - Refreshes the latency summary and the streaming counters every second.
+    - Connects the reset and export buttons.
+
+    Parameters:
+    None
+
+    Returns:
+    None
+    """
+    settings = Settings()
+    # Instrumentation On/Off
+    pushButton_DiagnosticsOnOff = main_window.findChild(
+        QtWidgets.QPushButton, "pushButton_DiagnosticsOnOff")
+    if not settings.does_setting_exist('diagnosticsOnOff'):
+        settings.write_to_settings_file(
+            'diagnosticsOnOff', pushButton_DiagnosticsOnOff.isChecked())
+    else:
+        pushButton_DiagnosticsOnOff.setChecked(
+            settings.read_from_settings_file('diagnosticsOnOff') == 'True')
+    instrumentation.set_enabled(pushButton_DiagnosticsOnOff.isChecked())
+    pushButton_DiagnosticsOnOff.setText(
+        "On" if pushButton_DiagnosticsOnOff.isChecked() else "Off")
+    pushButton_DiagnosticsOnOff.clicked.connect(lambda: settings.write_to_settings_file(
+        'diagnosticsOnOff', pushButton_DiagnosticsOnOff.isChecked()))
+    pushButton_DiagnosticsOnOff.clicked.connect(
+        lambda: instrumentation.set_enabled(pushButton_DiagnosticsOnOff.isChecked()))
+    pushButton_DiagnosticsOnOff.clicked.connect(lambda: pushButton_DiagnosticsOnOff.setText(
+        "On" if pushButton_DiagnosticsOnOff.isChecked() else "Off"))
+    pushButton_DiagnosticsOnOff.clicked.connect(lambda: log_action(
+        "Diagnostics are turned on" if pushButton_DiagnosticsOnOff.isChecked() else "Diagnostics are turned off"))
+    # Summary
+
+    def refresh_diagnostics():
+        """
+        Refreshes the latency summary and the streaming counters in the UI.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        listWidget_Diagnostics = main_window.findChild(
+            QtWidgets.QListWidget, "listWidget_Diagnostics")
+        listWidget_Diagnostics.clear()
+        listWidget_Diagnostics.addItems(instrumentation.summary())
+        for name, value in pico.get_stream_stats().items():
+            listWidget_Diagnostics.addItem(f"{name}: {value}")
+    timer = QtCore.QTimer(main_window)
+    timer.timeout.connect(refresh_diagnostics)
+    timer.start(1000)
+    # Reset
+    pushButton_DiagnosticsReset = main_window.findChild(
+        QtWidgets.QPushButton, "pushButton_DiagnosticsReset")
+    pushButton_DiagnosticsReset.clicked.connect(instrumentation.reset)
+    pushButton_DiagnosticsReset.clicked.connect(pico.reset_stream_stats)
+    pushButton_DiagnosticsReset.clicked.connect(refresh_diagnostics)
+    # Export
+
+    def dump_diagnostics():
+        """
+        Writes the latency histograms to a file in the log folder of the day.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        file_name = "diagnostics_" + \
+            datetime.datetime.now().strftime("%H-%M-%S") + ".txt"
+        file_path = instrumentation.dump(
+            os.path.join(create_folder(), file_name))
+        log_action("Diagnostics exported to " + file_path)
+    pushButton_DiagnosticsDump = main_window.findChild(
+        QtWidgets.QPushButton, "pushButton_DiagnosticsDump")
+    pushButton_DiagnosticsDump.clicked.connect(dump_diagnostics)
+
+
+def init_device_status(data_fetcher):
+    """
+    Displays the state of the acquisition in the status bar of the main window.
+
+    Parameters:
+    - data_fetcher (DataFetcher): The acquisition thread supervising the device.
+
+    Returns:
+    None
+    """
+    statusbar = main_window.findChild(QtWidgets.QStatusBar, "statusbar")
+    messages = {
+        'idle': "PicoScope : en attente",
+        'connecting': "PicoScope : connexion en cours...",
+        'streaming': "PicoScope : acquisition en cours",
+        'reconnecting': "PicoScope : connexion perdue, nouvelle tentative en attente",
+        'stopped': "PicoScope : acquisition arrêtée",
+    }
+    data_fetcher.state_changed.connect(lambda state: statusbar.showMessage(messages[state]))
+    statusbar.showMessage(messages[data_fetcher.state])
+
+
+def init_filters_panel(data_fetcher):
+    """
+    Initializes the filters panel of the settings tab.
+
+    This function sets the filter chain of each channel from the settings file and applies the
+    chains edited in the panel to the acquisition. An invalid chain is logged and not applied.
+
+    Parameters:
+    - data_fetcher (DataFetcher): The acquisition thread the filters are applied by.
+
+    Returns:
+    None
+    """
+    settings = Settings()
+    for index, channel in enumerate(data_fetcher.channels):
+        letter = channel[-1]
+        lineEdit_Filter = main_window.findChild(
+            QtWidgets.QLineEdit, "lineEdit_Filter" + letter)
+        if lineEdit_Filter is None:
+            continue
+        if not settings.does_setting_exist('filter' + letter):
+            settings.write_to_settings_file('filter' + letter, None)
+        spec = settings.read_from_settings_file('filter' + letter)
+        lineEdit_Filter.setText('' if spec == 'None' else spec)
+
+        def apply_filter(index=index, letter=letter, lineEdit_Filter=lineEdit_Filter):
+            """
+            Parses the filter chain of a channel and applies it.
+
+            Args:
+                index (int): The position of the channel.
+                letter (str): The letter of the channel.
+                lineEdit_Filter (QLineEdit): The field of the chain.
+
+            Returns:
+                bool: True if the chain is valid.
+            """
+            spec = lineEdit_Filter.text().strip()
+            try:
+                chain = filters.parse_chain(spec)
+            except ValueError as e:
+                log_action("Invalid filter for channel " + letter + ": " + str(e), 'error')
+                return False
+            data_fetcher.set_filter(index, chain)
+            settings.write_to_settings_file('filter' + letter, spec or None)
+            return True
+        apply_filter()
+        lineEdit_Filter.editingFinished.connect(
+            lambda apply_filter=apply_filter, letter=letter, lineEdit_Filter=lineEdit_Filter:
+            apply_filter() and log_action("Filter of channel " + letter + " is set to " +
+                                          (lineEdit_Filter.text().strip() or "none")))
+
+
+def init_math_panel(plotter):
+    """
+    Initializes the math channels panel of the settings tab.
+
+    This function sets the expression of each math channel from the settings file and applies the
+    expressions edited in the panel to the plot. An invalid expression is logged and not applied.
+
+    Parameters:
+    - plotter (PicoPlotter): The plot the math channels are displayed on.
+
+    Returns:
+    None
+    """
+    settings = Settings()
+    for name in plotter.math_channels:
+        lineEdit_Math = main_window.findChild(
+            QtWidgets.QLineEdit, "lineEdit_Math" + name)
+        if lineEdit_Math is None:
+            continue
+        if not settings.does_setting_exist('math' + name):
+            settings.write_to_settings_file('math' + name, None)
+        text = settings.read_from_settings_file('math' + name)
+        lineEdit_Math.setText('' if text == 'None' else text)
+
+        def apply_math(name=name, lineEdit_Math=lineEdit_Math):
+            """
+            Compiles the expression of a math channel and applies it.
+
+            Args:
+                name (str): The name of the math channel.
+                lineEdit_Math (QLineEdit): The field of the expression.
+
+            Returns:
+                bool: True if the expression is valid.
+            """
+            text = lineEdit_Math.text().strip()
+            try:
+                plotter.set_math_channel(name, text)
+            except ValueError as e:
+                log_action("Invalid expression for " + name + ": " + str(e), 'error')
+                return False
+            settings.write_to_settings_file('math' + name, text or None)
+            return True
+        apply_math()
+        lineEdit_Math.editingFinished.connect(
+            lambda apply_math=apply_math, name=name, lineEdit_Math=lineEdit_Math:
+            apply_math() and log_action("Math channel " + name + " is set to " +
+                                        (lineEdit_Math.text().strip() or "none")))
+
+
+def init_recorder_panel(recorder):
+    """
+    Initializes the flight recorder panel of the settings tab.
+
+    This function performs the following tasks:
+    - Sets the recorder on/off button and connects it to the settings file.
+    - Sets the durations kept before and after an event and connects them to the settings file.
+    - Sets the channel and the level of the level trigger and connects them to the settings file.
+    - Connects the manual trigger button and refreshes the last snapshot every second.
+
+    Parameters:
+    - recorder (FlightRecorder): The flight recorder of the acquisition.
+
+    Returns:
+    None
+    """
+    settings = Settings()
+    # Recorder On/Off
+    pushButton_RecorderOnOff = main_window.findChild(
+        QtWidgets.QPushButton, "pushButton_RecorderOnOff")
+    if not settings.does_setting_exist('recorderOnOff'):
+        settings.write_to_settings_file(
+            'recorderOnOff', pushButton_RecorderOnOff.isChecked())
+    else:
+        pushButton_RecorderOnOff.setChecked(
+            settings.read_from_settings_file('recorderOnOff') == 'True')
+    pushButton_RecorderOnOff.setText(
+        "On" if pushButton_RecorderOnOff.isChecked() else "Off")
+    pushButton_RecorderOnOff.clicked.connect(lambda: settings.write_to_settings_file(
+        'recorderOnOff', pushButton_RecorderOnOff.isChecked()))
+    pushButton_RecorderOnOff.clicked.connect(
+        lambda checked: recorder.configure(enabled=checked))
+    pushButton_RecorderOnOff.clicked.connect(lambda: pushButton_RecorderOnOff.setText(
+        "On" if pushButton_RecorderOnOff.isChecked() else "Off"))
+    pushButton_RecorderOnOff.clicked.connect(lambda: log_action(
+        "Flight recorder is turned on" if pushButton_RecorderOnOff.isChecked() else "Flight recorder is turned off"))
+    # Durations
+    durations = {}
+    for setting, name, text in (('preTrigger', "doubleSpinBox_preTrigger", "before"),
+                                ('postTrigger', "doubleSpinBox_postTrigger", "after")):
+        doubleSpinBox = main_window.findChild(QtWidgets.QDoubleSpinBox, name)
+        if not settings.does_setting_exist(setting):
+            settings.write_to_settings_file(setting, doubleSpinBox.value())
+        else:
+            doubleSpinBox.setValue(float(settings.read_from_settings_file(setting)))
+        doubleSpinBox.valueChanged.connect(
+            lambda value, setting=setting: settings.write_to_settings_file(setting, value))
+        doubleSpinBox.valueChanged.connect(
+            lambda value, text=text: log_action(
+                "Flight recorder keeps " + str(value) + " seconds " + text + " an event"))
+        durations[setting] = doubleSpinBox
+    durations['preTrigger'].valueChanged.connect(
+        lambda value: recorder.configure(pre_seconds=value))
+    durations['postTrigger'].valueChanged.connect(
+        lambda value: recorder.configure(post_seconds=value))
+    # Level Trigger
+    comboBox_TriggerChannel = main_window.findChild(
+        QtWidgets.QComboBox, "comboBox_TriggerChannel")
+    comboBox_TriggerChannel.addItem("Aucun")
+    comboBox_TriggerChannel.addItems(recorder.channels)
+    if not settings.does_setting_exist('triggerChannel'):
+        settings.write_to_settings_file('triggerChannel', comboBox_TriggerChannel.currentIndex())
+    else:
+        comboBox_TriggerChannel.setCurrentIndex(
+            int(settings.read_from_settings_file('triggerChannel')))
+    comboBox_TriggerChannel.currentIndexChanged.connect(
+        lambda index: settings.write_to_settings_file('triggerChannel', index))
+    comboBox_TriggerChannel.currentIndexChanged.connect(
+        lambda index: recorder.configure(level_channel=index - 1 if index > 0 else None))
+    comboBox_TriggerChannel.currentIndexChanged.connect(lambda: log_action(
+        "Flight recorder level trigger is set to " + comboBox_TriggerChannel.currentText()))
+    doubleSpinBox_triggerLevel = main_window.findChild(
+        QtWidgets.QDoubleSpinBox, "doubleSpinBox_triggerLevel")
+    if not settings.does_setting_exist('triggerLevel'):
+        settings.write_to_settings_file('triggerLevel', doubleSpinBox_triggerLevel.value())
+    else:
+        doubleSpinBox_triggerLevel.setValue(
+            float(settings.read_from_settings_file('triggerLevel')))
+    doubleSpinBox_triggerLevel.valueChanged.connect(
+        lambda value: settings.write_to_settings_file('triggerLevel', value))
+    doubleSpinBox_triggerLevel.valueChanged.connect(
+        lambda value: recorder.configure(level_mv=value))
+    doubleSpinBox_triggerLevel.valueChanged.connect(lambda: log_action(
+        "Flight recorder trigger level is set to " + str(doubleSpinBox_triggerLevel.value()) + " mV"))
+    index = comboBox_TriggerChannel.currentIndex()
+    recorder.configure(pushButton_RecorderOnOff.isChecked(), durations['preTrigger'].value(),
+                       durations['postTrigger'].value(), index - 1 if index > 0 else None,
+                       doubleSpinBox_triggerLevel.value())
+    # Manual Trigger
+    pushButton_RecorderTrigger = main_window.findChild(
+        QtWidgets.QPushButton, "pushButton_RecorderTrigger")
+    pushButton_RecorderTrigger.clicked.connect(lambda: recorder.trigger("manual"))
+    pushButton_RecorderTrigger.clicked.connect(lambda: log_action(
+        "Flight recorder triggered manually" if recorder.enabled else
+        "Flight recorder triggered manually while turned off", 'info' if recorder.enabled else 'warning'))
+    # Last Snapshot
+    label_RecorderStatus = main_window.findChild(QtWidgets.QLabel, "label_RecorderStatus")
+
+    def refresh_recorder():
+        """
+        Shows the number of snapshots and the last one in the UI.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if recorder.last_snapshot is not None:
+            label_RecorderStatus.setText(str(recorder.snapshots) + " instantané(s), dernier : " +
+                                         os.path.basename(recorder.last_snapshot))
+    timer = QtCore.QTimer(main_window)
+    timer.timeout.connect(refresh_recorder)
+    timer.start(1000)
+
+
+def init_rates_panel(data_fetcher):
+    """
+    Initializes the channel rates panel of the settings tab.
+
+    This function sets the slow channels and their aggregation period from the settings file,
+    connects the panel to the settings file and applies the changes to the acquisition.
+
+    Parameters:
+    - data_fetcher (DataFetcher): The acquisition thread the slow channels are aggregated by.
+
+    Returns:
+    None
+    """
+    settings = Settings()
+    buttons = {}
+    for index, channel in enumerate(data_fetcher.channels):
+        letter = channel[-1]
+        pushButton_Slow = main_window.findChild(QtWidgets.QPushButton, "pushButton_Slow" + letter)
+        if pushButton_Slow is None:
+            continue
+        if not settings.does_setting_exist('slow' + letter):
+            settings.write_to_settings_file('slow' + letter, pushButton_Slow.isChecked())
+        else:
+            pushButton_Slow.setChecked(settings.read_from_settings_file('slow' + letter) == 'True')
+        pushButton_Slow.clicked.connect(
+            lambda checked, letter=letter: settings.write_to_settings_file('slow' + letter, checked))
+        pushButton_Slow.clicked.connect(lambda checked, letter=letter: log_action(
+            "Channel " + letter + " is set to " + ("slow" if checked else "fast")))
+        buttons[index] = pushButton_Slow
+    doubleSpinBox_slowPeriod = main_window.findChild(
+        QtWidgets.QDoubleSpinBox, "doubleSpinBox_slowPeriod")
+    if not settings.does_setting_exist('slowPeriod'):
+        settings.write_to_settings_file('slowPeriod', doubleSpinBox_slowPeriod.value())
+    else:
+        doubleSpinBox_slowPeriod.setValue(float(settings.read_from_settings_file('slowPeriod')))
+    doubleSpinBox_slowPeriod.valueChanged.connect(
+        lambda value: settings.write_to_settings_file('slowPeriod', value))
+    doubleSpinBox_slowPeriod.valueChanged.connect(lambda value: log_action(
+        "Slow channels period is set to " + str(value) + " seconds"))
+
+    def apply_rates():
+        """
+        Applies the slow channels and their period to the acquisition.
+        """
+        data_fetcher.set_rates([index for index, button in buttons.items() if button.isChecked()],
+                               doubleSpinBox_slowPeriod.value())
+    apply_rates()
+    for button in buttons.values():
+        button.clicked.connect(apply_rates)
+    doubleSpinBox_slowPeriod.valueChanged.connect(apply_rates)
+
+
+def init_persistence_panel(plotter):
+    """
+    Initializes the persistence panel of the settings tab.
+
+    This function sets the channel of the persistence display, the duration of its sweep and its
+    decay time constant from the settings file, connects them to the settings file and applies
+    them to the plot.
+
+    Parameters:
+    - plotter (PicoPlotter): The plot the persistence display is shown next to.
+
+    Returns:
+    None
+    """
+    settings = Settings()
+    comboBox_PersistenceChannel = main_window.findChild(
+        QtWidgets.QComboBox, "comboBox_PersistenceChannel")
+    comboBox_PersistenceChannel.addItem("Aucune")
+    comboBox_PersistenceChannel.addItems([channel[-1] for channel in plotter.channels])
+    doubleSpinBox_persistenceWindow = main_window.findChild(
+        QtWidgets.QDoubleSpinBox, "doubleSpinBox_persistenceWindow")
+    doubleSpinBox_persistenceDecay = main_window.findChild(
+        QtWidgets.QDoubleSpinBox, "doubleSpinBox_persistenceDecay")
+    if not settings.does_setting_exist('persistenceChannel'):
+        settings.write_to_settings_file(
+            'persistenceChannel', comboBox_PersistenceChannel.currentIndex())
+    else:
+        comboBox_PersistenceChannel.setCurrentIndex(
+            int(settings.read_from_settings_file('persistenceChannel')))
+    for setting, doubleSpinBox in (('persistenceWindow', doubleSpinBox_persistenceWindow),
+                                   ('persistenceDecay', doubleSpinBox_persistenceDecay)):
+        if not settings.does_setting_exist(setting):
+            settings.write_to_settings_file(setting, doubleSpinBox.value())
+        else:
+            doubleSpinBox.setValue(float(settings.read_from_settings_file(setting)))
+        doubleSpinBox.valueChanged.connect(
+            lambda value, setting=setting: settings.write_to_settings_file(setting, value))
+    comboBox_PersistenceChannel.currentIndexChanged.connect(
+        lambda index: settings.write_to_settings_file('persistenceChannel', index))
+    comboBox_PersistenceChannel.currentIndexChanged.connect(lambda: log_action(
+        "Persistence display is set to " + comboBox_PersistenceChannel.currentText()))
+    doubleSpinBox_persistenceWindow.valueChanged.connect(lambda value: log_action(
+        "Persistence window is set to " + str(value) + " ms"))
+    doubleSpinBox_persistenceDecay.valueChanged.connect(lambda value: log_action(
+        "Persistence decay is set to " + str(value) + " seconds"))
+
+    def apply_persistence():
+        """
+        Applies the settings of the panel to the persistence display.
+        """
+        index = comboBox_PersistenceChannel.currentIndex()
+        plotter.set_persistence(index - 1 if index > 0 else None,
+                                doubleSpinBox_persistenceWindow.value() / 1000,
+                                doubleSpinBox_persistenceDecay.value())
+    apply_persistence()
+    comboBox_PersistenceChannel.currentIndexChanged.connect(apply_persistence)
+    doubleSpinBox_persistenceWindow.valueChanged.connect(apply_persistence)
+    doubleSpinBox_persistenceDecay.valueChanged.connect(apply_persistence)
+
+
+def init_export_panel(plotter):
+    """
+    Initializes the export panel of the TestBench tab.
+
+    This function performs the following tasks:
+    - Sets the export window to the last hour and the formats of the export.
+    - Exports the checked channels over the window to the chosen file on a background thread,
+      showing its progress.
+    - Connects the cancel button and cancels the export running when the application quits.
+
+    Parameters:
+    - plotter (PicoPlotter): The plot, whose buffers hold the most recent values.
+
+    Returns:
+    None
+    """
+    dateTimeEdit_ExportStart = main_window.findChild(
+        QtWidgets.QDateTimeEdit, "dateTimeEdit_ExportStart")
+    dateTimeEdit_ExportEnd = main_window.findChild(
+        QtWidgets.QDateTimeEdit, "dateTimeEdit_ExportEnd")
+    comboBox_ExportFormat = main_window.findChild(QtWidgets.QComboBox, "comboBox_ExportFormat")
+    pushButton_Export = main_window.findChild(QtWidgets.QPushButton, "pushButton_Export")
+    pushButton_ExportCancel = main_window.findChild(
+        QtWidgets.QPushButton, "pushButton_ExportCancel")
+    progressBar_Export = main_window.findChild(QtWidgets.QProgressBar, "progressBar_Export")
+    label_ExportStatus = main_window.findChild(QtWidgets.QLabel, "label_ExportStatus")
+    buttons = [main_window.findChild(QtWidgets.QPushButton, "pushButton_Export" + channel[-1])
+               for channel in plotter.channels]
+    formats = [("CSV", 'csv', 'export.csv', "Fichiers CSV (*.csv)"),
+               ("Binaire", 'binary', 'export.bin', "Fichiers binaires (*.bin)")]
+    comboBox_ExportFormat.addItems([text for text, _, _, _ in formats])
+    now = QtCore.QDateTime.currentDateTime()
+    for dateTimeEdit, dateTime in ((dateTimeEdit_ExportStart, now.addSecs(-3600)),
+                                   (dateTimeEdit_ExportEnd, now)):
+        dateTimeEdit.setDisplayFormat("dd/MM/yyyy HH:mm:ss")
+        dateTimeEdit.setDateTime(dateTime)
+
+    def start_export():
+        """
+        Asks for the exported file and starts the export of the checked channels.
+        """
+        start = dateTimeEdit_ExportStart.dateTime().toMSecsSinceEpoch() / 1000
+        end = dateTimeEdit_ExportEnd.dateTime().toMSecsSinceEpoch() / 1000
+        columns = [plotter.data_fetcher.names[i] for i, button in enumerate(buttons)
+                   if button.isChecked()]
+        if end <= start or not columns:
+            label_ExportStatus.setText("Choisissez une fenêtre et au moins une voie")
+            return
+        _, kind, file_name, file_filter = formats[comboBox_ExportFormat.currentIndex()]
+        file_path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            main_window, "Exporter", os.path.abspath(file_name), file_filter)
+        if not file_path:
+            return
+        log_action("Exporting " + ", ".join(columns) + " from " +
+                   dateTimeEdit_ExportStart.dateTime().toString() + " to " +
+                   dateTimeEdit_ExportEnd.dateTime().toString() + " to " + file_path)
+        worker = plotter.export_window(file_path, kind, columns, start, end)
+        worker.progress_changed.connect(progressBar_Export.setValue)
+        worker.export_finished.connect(lambda rows: label_ExportStatus.setText(
+            "Export annulé" if rows is None else str(rows) + " lignes exportées"))
+        worker.export_failed.connect(
+            lambda error: label_ExportStatus.setText("Erreur : " + error))
+        worker.finished.connect(lambda: pushButton_Export.setEnabled(True))
+        worker.finished.connect(lambda: pushButton_ExportCancel.setEnabled(False))
+        progressBar_Export.setValue(0)
+        label_ExportStatus.setText("Export en cours (journaux seulement, historique agrégé)..."
+                                   if plotter.aggregate else "Export en cours...")
+        pushButton_Export.setEnabled(False)
+        pushButton_ExportCancel.setEnabled(True)
+
+    def cancel_export():
+        """
+        Cancels the running export, if any.
+        """
+        for worker in list(plotter.exporters):
+            worker.cancel()
+
+    def stop_export():
+        """
+        Cancels the running export and waits for its thread, when the application quits.
+        """
+        for worker in list(plotter.exporters):
+            worker.cancel()
+            worker.wait()
+    pushButton_Export.clicked.connect(start_export)
+    pushButton_ExportCancel.clicked.connect(cancel_export)
+    pushButton_ExportCancel.clicked.connect(lambda: log_action("Export is cancelled"))
+    app.aboutToQuit.connect(stop_export)
+
+
+def init_memory_panel(plotter, publisher):
+    """
+    Initializes the memory panel of the settings tab.
+
+    This function performs the following tasks:
+    - Sets the memory budget and connects it to the settings file.
+    - Registers the buffers and queues of the application with the memory budget.
+    - Checks the budget every second and shows the memory used by each consumer.
+
+    Parameters:
+    - plotter (PicoPlotter): The plot, degraded when the budget is exceeded.
+    - publisher (Publisher): The live data publisher, or None.
+
+    Returns:
+    None
+    """
+    settings = Settings()
+    budget = MemoryBudget()
+    budget.register("Tracé", plotter.memory_usage)
+    budget.register("Acquisition", plotter.data_fetcher.memory_usage)
+    budget.register("Enregistreur", plotter.data_fetcher.recorder.memory_usage)
+    budget.register("Journal", get_pending_bytes)
+    if publisher is not None:
+        budget.register("Diffusion", publisher.memory_usage)
+    budget.add_listener(plotter.set_memory_level)
+    # Memory Budget
+    spinBox_memoryBudget = main_window.findChild(
+        QtWidgets.QSpinBox, "spinBox_memoryBudget")
+    if not settings.does_setting_exist('memoryBudget'):
+        settings.write_to_settings_file(
+            'memoryBudget', spinBox_memoryBudget.value())
+    else:
+        spinBox_memoryBudget.setValue(
+            int(settings.read_from_settings_file('memoryBudget')))
+    budget.set_budget(spinBox_memoryBudget.value() * 1024 ** 2)
+    spinBox_memoryBudget.valueChanged.connect(
+        lambda value: settings.write_to_settings_file('memoryBudget', value))
+    spinBox_memoryBudget.valueChanged.connect(
+        lambda value: budget.set_budget(value * 1024 ** 2))
+    spinBox_memoryBudget.valueChanged.connect(lambda: log_action(
+        "Memory budget is set to " + str(spinBox_memoryBudget.value()) + " megabytes"))
+    # Usage
+
+    def refresh_memory():
+        """
+        Checks the memory budget and shows the memory used in the UI.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        total = budget.check()
+        label_MemoryUsage = main_window.findChild(
+            QtWidgets.QLabel, "label_MemoryUsage")
+        label_MemoryUsage.setText(
+            f"Utilisation : {total / 1024 ** 2:.1f} Mo, niveau de dégradation {budget.level}")
+        listWidget_Memory = main_window.findChild(
+            QtWidgets.QListWidget, "listWidget_Memory")
+        listWidget_Memory.clear()
+        for name, usage in budget.usage().items():
+            listWidget_Memory.addItem(f"{name}: {usage / 1024 ** 2:.1f} Mo")
+    refresh_memory()
+    timer = QtCore.QTimer(main_window)
+    timer.timeout.connect(refresh_memory)
+    timer.start(1000)
+
+
 if __name__ == '__main__':
     # Init app
     if os.name == 'nt':
@@ -154,18 +790,66 @@ if __name__ == '__main__':
     # Log
     log_action("Application started")
 
+    # Log archiving
+    archiver = LogArchiver()
+    archiver.start()
+    app.aboutToQuit.connect(archiver.stop)
+
     # Settings
     init_settings_tab()
+    init_diagnostics_panel()
     
-    # Plotting
+    # Plotting, the device is opened in the background by the data fetcher
     try:
-        pico.open_pico()
         listWidget_testBench = main_window.findChild(QtWidgets.QWidget, "listWidget_testBench")
         channels = ['PS2000A_CHANNEL_A', 'PS2000A_CHANNEL_B', 'PS2000A_CHANNEL_C']
-        plotter = PicoPlotter(channels, "PicoScope", listWidget_testBench)
+        # Live data publisher
+        settings = Settings()
+        if not settings.does_setting_exist('publisherAddress'):
+            settings.write_to_settings_file('publisherAddress', '127.0.0.1:50000')
+        publisher = Publisher(settings.read_from_settings_file(
+            'publisherAddress'), channels)
+        try:
+            publisher.start()
+        except (OSError, OverflowError) as e:
+            log_action("Live data publisher unavailable: " + str(e))
+            publisher = None
+        else:
+            app.aboutToQuit.connect(publisher.stop)
+        plotter = PicoPlotter(channels, "PicoScope",
+                              listWidget_testBench, publisher, ['M1', 'M2'])
+        # The plot is embedded in the main window, its close event is not received
+        app.aboutToQuit.connect(plotter.stop)
+        init_device_status(plotter.data_fetcher)
+        # Logging of the acquired values, one aggregated row per log interval, feeds the plot history
+        plotter.data_fetcher.set_logging(
+            settings.read_from_settings_file('logOnOff') == 'True',
+            int(settings.read_from_settings_file('fileSizeLimit')),
+            float(settings.read_from_settings_file('logFrequency')))
+        main_window.findChild(QtWidgets.QPushButton, "pushButton_LogOnOff").clicked.connect(
+            lambda checked: plotter.data_fetcher.set_logging(enabled=checked))
+        main_window.findChild(QtWidgets.QSpinBox, "spinBox_fileSizeLimit").valueChanged.connect(
+            lambda value: plotter.data_fetcher.set_logging(max_size_mb=value))
+        main_window.findChild(QtWidgets.QDoubleSpinBox, "spinBox_logFrequency").valueChanged.connect(
+            lambda value: plotter.data_fetcher.set_logging(interval=value))
+        # Filters of the acquired values
+        init_filters_panel(plotter.data_fetcher)
+        # Slow channels
+        init_rates_panel(plotter.data_fetcher)
+        # Math channels
+        init_math_panel(plotter)
+        # Persistence display
+        init_persistence_panel(plotter)
+        # Export of a time window
+        init_export_panel(plotter)
+        # Flight recorder
+        init_recorder_panel(plotter.data_fetcher.recorder)
+        # Memory budget
+        init_memory_panel(plotter, publisher)
         
     except Exception as e:
         print("Error : "+str(e))
+        log_action("Error : "+str(e), 'error')
         
     main_window.show()
     sys.exit(app.exec())
@@ -0,0 +1,219 @@
+import ast
+import numpy as np
+
+# Math channels are computed from the acquired channels with an expression such as
+#   A - B            differential voltage
+#   (A - B) / 0.1    current through a 0.1 ohm shunt
+#   abs(A) * 2.5     scaled absolute value
+# The acquired channels are named after their letter. An expression is compiled once in a
+# list of numpy operations writing into preallocated buffers, and evaluated only when a
+# consumer asks for the values of a block; the result is kept until the block is refilled.
+OPERATORS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+}
+FUNCTIONS = {
+    'abs': np.absolute,
+    'sqrt': np.sqrt,
+}
+
+
+class Expression:
+    """
+    An expression over the acquired channels compiled in numpy operations.
+
+    Attributes:
+        text (str): The expression.
+        program (list): The operations, each a numpy function, its operands and its target.
+            An operand is ('channel', row), ('constant', value) or ('register', number), the
+            target of the last operation is ('out', None).
+    """
+
+    def __init__(self, text, channels):
+        """
+        Compiles an expression.
+
+        Args:
+            text (str): The expression.
+            channels (list): The letters of the acquired channels, in the order of the rows of
+                the values the expression is evaluated on.
+
+        Raises:
+            ValueError: If the expression is invalid.
+        """
+        self.text = text.strip()
+        self.channels = channels
+        self.program = []
+        self.registers = 0
+        try:
+            tree = ast.parse(self.text, mode='eval')
+        except SyntaxError as e:
+            raise ValueError("Invalid expression: " + str(e.msg))
+        result = self.compile(tree.body)
+        if not self.program or self.program[-1][2] != result:
+            # The expression is a channel or a constant, it is copied to the output
+            self.program.append((np.positive, [result], result))
+        self.program[-1] = self.program[-1][:2] + (('out', None),)
+        self.scratch = None
+
+    def compile(self, node):
+        """
+        Appends the operations computing a node to the program.
+
+        Args:
+            node (ast.AST): The node of the expression.
+
+        Returns:
+            tuple: The operand holding the value of the node.
+
+        Raises:
+            ValueError: If the node is not supported.
+        """
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return ('constant', float(node.value))
+        if isinstance(node, ast.Name):
+            if node.id not in self.channels:
+                raise ValueError("Unknown channel: " + node.id)
+            return ('channel', self.channels.index(node.id))
+        if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+            operands = [self.compile(node.left), self.compile(node.right)]
+            function = OPERATORS[type(node.op)]
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            operands = [self.compile(node.operand)]
+            function = np.negative if isinstance(node.op, ast.USub) else np.positive
+        elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and
+              node.func.id in FUNCTIONS and len(node.args) == 1 and not node.keywords):
+            operands = [self.compile(node.args[0])]
+            function = FUNCTIONS[node.func.id]
+        else:
+            raise ValueError("Unsupported expression: " + ast.unparse(node))
+        if all(kind == 'constant' for kind, _ in operands):
+            return ('constant', float(function(*[value for _, value in operands])))
+        target = ('register', self.registers)
+        self.registers += 1
+        self.program.append((function, operands, target))
+        return target
+
+    def evaluate(self, values, out):
+        """
+        Evaluates the expression on a block of samples.
+
+        The registers are allocated on the first evaluation and again only if the length of
+        the blocks changes.
+
+        Args:
+            values (numpy.ndarray): The values of the acquired channels, one row per channel.
+            out (numpy.ndarray): The result, one value per sample.
+
+        Returns:
+            numpy.ndarray: `out`.
+        """
+        if self.scratch is None or self.scratch.shape[1] != out.size:
+            self.scratch = np.empty((self.registers, out.size))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for function, operands, (kind, number) in self.program:
+                arguments = [values[value] if source == 'channel' else
+                             self.scratch[value] if source == 'register' else value
+                             for source, value in operands]
+                function(*arguments, out=out if kind == 'out' else self.scratch[number])
+        return out
+
+
+class MathChannels:
+    """
+    The math channels of the acquisition and the cache of their values per block.
+
+    The values are computed from the filtered values of a block of the buffer pool the first
+    time a consumer asks for them, then kept until `invalidate` is called for the block.
+
+    Attributes:
+        channels (list): The letters of the acquired channels.
+        depth (int): The number of blocks of the buffer pool.
+        block_size (int): The number of samples per channel of a block.
+    """
+
+    def __init__(self, channels, depth, block_size):
+        self.channels = channels
+        self.depth = depth
+        self.block_size = block_size
+        # Replaced rather than modified, so the acquisition thread can iterate over it
+        self.entries = {}
+
+    def set(self, name, text):
+        """
+        Defines, redefines or removes a math channel.
+
+        Args:
+            name (str): The name of the math channel.
+            text (str): The expression, empty or None to remove the channel.
+
+        Returns:
+            Expression: The compiled expression, or None if the channel is removed.
+
+        Raises:
+            ValueError: If the expression is invalid.
+        """
+        entries = dict(self.entries)
+        if not text or not text.strip():
+            entries.pop(name, None)
+            self.entries = entries
+            return None
+        expression = Expression(text, self.channels)
+        entries[name] = (expression, np.empty((self.depth, self.block_size)), [False] * self.depth)
+        self.entries = entries
+        return expression
+
+    def get(self, name):
+        """
+        Returns the compiled expression of a math channel, or None if it is not defined.
+        """
+        entry = self.entries.get(name)
+        return None if entry is None else entry[0]
+
+    def values(self, name, block, values):
+        """
+        Returns the values of a math channel for a block, computed on the first request.
+
+        Args:
+            name (str): The name of the math channel.
+            block (int): The number of the block in the buffer pool.
+            values (numpy.ndarray): The values of the acquired channels for the block.
+
+        Returns:
+            numpy.ndarray: The values of the math channel, or None if it is not defined.
+        """
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        expression, results, valid = entry
+        if not valid[block]:
+            expression.evaluate(values, results[block])
+            valid[block] = True
+        return results[block]
+
+    def memory_usage(self):
+        """
+        Returns the bytes held by the cached values and the registers of the math channels.
+        """
+        total = 0
+        for expression, results, _ in self.entries.values():
+            total += results.nbytes
+            if expression.scratch is not None:
+                total += expression.scratch.nbytes
+        return total
+
+    def invalidate(self, block):
+        """
+        Forgets the values computed for a block, called when the block is refilled.
+
+        Args:
+            block (int): The number of the block in the buffer pool.
+
+        Returns:
+            None
+        """
+        for _, _, valid in self.entries.values():
+            valid[block] = False
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
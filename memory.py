@@ -0,0 +1,106 @@
+from logger import log_action
+
+# Degradation levels applied when the memory held by the application exceeds the budget.
+# Each consumer adapts its buffers to the level, see PicoPlotter.memory_levels.
+LEVELS = [
+    "full resolution",
+    "reduced history",
+    "decimated history",
+    "aggregated history",
+]
+
+
+class MemoryBudget:
+    """
+    Keeps the memory held by the buffers and queues of the application within a budget.
+
+    Every consumer registers a function returning the bytes it holds at a degradation level,
+    so the budget picks the lowest level at which everything fits before changing anything.
+    The listeners are called with the new level when it changes. The budget is checked by
+    the caller, typically every second from the GUI thread.
+
+    Attributes:
+        budget (int): The memory budget in bytes, 0 for no budget.
+        level (int): The current degradation level, an index of LEVELS.
+    """
+
+    def __init__(self, budget=0):
+        self.budget = budget
+        self.level = 0
+        self.consumers = {}
+        self.listeners = []
+
+    def register(self, name, usage):
+        """
+        Adds a consumer of memory.
+
+        Args:
+            name (str): The name of the consumer, as displayed.
+            usage (callable): A function of the degradation level returning the bytes held by
+                the consumer at that level.
+
+        Returns:
+            None
+        """
+        self.consumers[name] = usage
+
+    def add_listener(self, listener):
+        """
+        Adds a function called with the new degradation level when it changes.
+        """
+        self.listeners.append(listener)
+
+    def set_budget(self, budget):
+        """
+        Changes the memory budget, applied at the next check.
+
+        Args:
+            budget (int): The memory budget in bytes, 0 for no budget.
+
+        Returns:
+            None
+        """
+        self.budget = budget
+
+    def usage(self, level=None):
+        """
+        Returns the bytes held by each consumer.
+
+        Args:
+            level (int): The degradation level (default: the current level).
+
+        Returns:
+            dict: The bytes held by each consumer, by name.
+        """
+        level = self.level if level is None else level
+        return {name: usage(level) for name, usage in self.consumers.items()}
+
+    def check(self):
+        """
+        Moves to the lowest degradation level at which the consumers fit in the budget.
+
+        The level is not raised further once the next level frees no memory, even if the
+        consumers still exceed the budget.
+
+        Returns:
+            int: The total bytes held by the consumers at the resulting level.
+        """
+        level = 0
+        total = sum(self.usage(level).values())
+        while self.budget and total > self.budget and level < len(LEVELS) - 1:
+            lower = sum(self.usage(level + 1).values())
+            if lower >= total:
+                # The next level frees nothing, it would only lose resolution
+                break
+            level += 1
+            total = lower
+        if level != self.level:
+            if level > self.level:
+                log_action("Memory budget exceeded, switching to " + LEVELS[level], 'warning')
+            else:
+                log_action("Memory budget available, switching back to " + LEVELS[level])
+            self.level = level
+            for listener in self.listeners:
+                listener(level)
+        return total
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
@@ -0,0 +1,139 @@
+import math
+import numpy as np
+
+# Persistence display of a channel, as on a digital phosphor oscilloscope: the samples are
+# counted in a fixed-size image, one column per position of the sample in a sweep of `window`
+# seconds and one row per voltage interval. A sweep of fewer samples than `width` has one
+# column per sample, so that no column is left without samples. The sweeps are free-running
+# (no trigger), each block adds its samples with numpy.bincount and the image decays
+# exponentially with a time constant, so the cost of a block depends on the size of the block
+# and of the image only, not on the number of sweeps accumulated.
+
+
+class Persistence:
+    """
+    The density of the values of a channel versus their time in a sweep, with exponential decay.
+
+    Attributes:
+        width (int): The maximum number of columns of the image, positions in the sweep.
+        height (int): The number of rows of the image, voltage intervals.
+        window (float): The duration of a sweep in seconds.
+        low (float): The voltage of the bottom of the image in millivolts.
+        high (float): The voltage of the top of the image in millivolts.
+        time_constant (float): The time for the counts to decay by a factor e, in seconds.
+        image (numpy.ndarray): The decayed counts, indexed [column, row], with one column per
+            sample of a sweep if a sweep has fewer than `width` samples.
+        changed (bool): True if samples were added since the flag was cleared.
+    """
+
+    def __init__(self, width=256, height=128, window=0.05, low=-2000.0, high=2000.0,
+                 time_constant=1.0):
+        self.width = width
+        self.height = height
+        self.window = window
+        self.low = low
+        self.high = high
+        self.time_constant = time_constant
+        self.image = np.zeros((width, height))
+        self.changed = False
+        self.size = None
+        self.interval = None
+        self.phase = 0
+
+    def configure(self, window=None, low=None, high=None, time_constant=None):
+        """
+        Changes the settings of the display and clears the image.
+
+        Args:
+            window (float): The duration of a sweep in seconds (default: unchanged).
+            low (float): The voltage of the bottom of the image in millivolts (default: unchanged).
+            high (float): The voltage of the top of the image in millivolts (default: unchanged).
+            time_constant (float): The decay time constant in seconds (default: unchanged).
+
+        Returns:
+            None
+        """
+        if window is not None:
+            self.window = window
+        if low is not None:
+            self.low = low
+        if high is not None:
+            self.high = high
+        if time_constant is not None:
+            self.time_constant = time_constant
+        self.size = None
+        self.clear()
+
+    def clear(self):
+        """
+        Forgets the accumulated counts.
+        """
+        self.image[:] = 0.0
+        self.phase = 0
+        self.changed = True
+
+    def setup(self, block_size, interval):
+        """
+        Allocates the scratch buffers for blocks of `block_size` samples.
+
+        Args:
+            block_size (int): The number of samples of a block.
+            interval (float): The time between two samples in seconds.
+
+        Returns:
+            None
+        """
+        self.size = block_size
+        self.interval = interval
+        self.samples = max(1, int(round(self.window / interval)))
+        self.phase %= self.samples
+        width = min(self.width, self.samples)
+        if self.image.shape[0] != width:
+            self.image = np.zeros((width, self.height))
+            self.changed = True
+        self.positions = np.arange(block_size)
+        self.columns = np.empty(block_size, dtype=np.intp)
+        self.rows = np.empty(block_size, dtype=np.intp)
+        self.scaled = np.empty(block_size)
+        self.scale = self.height / (self.high - self.low)
+        self.decay = math.exp(-block_size * interval / self.time_constant)
+
+    def add(self, values, interval):
+        """
+        Adds a block of samples to the image, after the decay of the previous counts.
+
+        Args:
+            values (numpy.ndarray): The samples of the block in millivolts.
+            interval (float): The time between two samples in seconds.
+
+        Returns:
+            None
+        """
+        if self.size != values.size or self.interval != interval:
+            self.setup(values.size, interval)
+        np.add(self.positions, self.phase, out=self.columns)
+        np.remainder(self.columns, self.samples, out=self.columns)
+        self.columns *= self.image.shape[0]
+        self.columns //= self.samples
+        np.subtract(values, self.low, out=self.scaled)
+        self.scaled *= self.scale
+        np.clip(self.scaled, 0, self.height - 1, out=self.scaled)
+        self.rows[:] = self.scaled
+        self.columns *= self.height
+        self.columns += self.rows
+        counts = np.bincount(self.columns, minlength=self.image.size)
+        self.image *= self.decay
+        self.image += counts.reshape(self.image.shape)
+        self.phase = (self.phase + values.size) % self.samples
+        self.changed = True
+
+    def memory_usage(self):
+        """
+        Returns the bytes held by the image and the scratch buffers.
+        """
+        total = self.image.nbytes
+        if self.size is not None:
+            total += (self.positions.nbytes + self.columns.nbytes + self.rows.nbytes +
+                      self.scaled.nbytes)
+        return total
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
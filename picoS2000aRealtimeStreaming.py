@@ -1,8 +1,13 @@
+import collections
 import ctypes
 import numpy as np
 from picosdk.ps2000a import ps2000a as ps
 from pico_sdk import PicoDevice
-from picosdk.functions import adc2mV, assert_pico_ok
+from picosdk.functions import assert_pico_ok
+from picosdk.constants import PICO_STATUS
+from logger import log_action
+import instrumentation
+import threading
 import time
 
 # Global variables to hold the device handle and channel range
@@ -10,6 +15,32 @@ chandle = ctypes.c_int16()
 channel_range = None
 maxADC = ctypes.c_int16()
 
+# Streaming state, see start_streaming(). The callback object is kept here so that it
+# lives as long as the driver may call it.
+pool = None
+streaming_callback_pointer = None
+sample_interval = 0.0
+next_index = 0
+
+# Streaming accounting, updated by the driver callback and by the consumers
+# of the acquired data (see get_stream_stats())
+WARNING_INTERVAL = 5.0
+stats_lock = threading.Lock()
+stream_stats = {
+    'callbacks': 0,
+    'samples': 0,
+    'emptyCallbacks': 0,
+    'gaps': 0,
+    'overflows': {},
+    'lastCallbackInterval': 0.0,
+    'maxCallbackInterval': 0.0,
+    'queueDepth': 0,
+    'maxQueueDepth': 0,
+    'droppedBlocks': 0,
+}
+last_callback_time = None
+last_warning_time = {}
+
 def close_pico():
     """
     Closes the PicoScope device.
@@ -56,64 +87,386 @@ def open_pico():
     assert_pico_ok(status["maximumValue"])
 
 
-def get_value(channel):
+class BufferPool:
+    """
+    Preallocated buffers for the streaming acquisition.
+
+    The driver writes into one buffer per channel registered once with
+    ps2000aSetDataBuffers. The streaming callback copies the delivered samples into the block
+    being filled, one of `depth` preallocated blocks rotated between the callback and the
+    consumers: when a block is full it becomes ready and the callback continues in a free one,
+    while a consumer reads the ready block through a read-only view until it releases it.
+    Nothing is allocated per block once the pool exists, see tests/test_pool.py.
+
+    If no block is free when one is filled, the oldest ready block is recycled (or, if the
+    consumers hold all the other blocks, the block just filled is overwritten) and the loss is
+    counted with record_dropped().
+
+    The blocks are numbered by the acquired sample they start with, counted from the start of
+    the streaming: the time of a block is derived from its number, so it does not jitter with
+    the latency of the callbacks, and the numbers of the dropped blocks are missing.
+
+    Attributes:
+        channels (list): The names of the channels.
+        block_size (int): The number of samples per channel of a block.
+        depth (int): The number of blocks, 2 for double buffering, 3 for triple buffering.
+        driver_buffer (numpy.ndarray): The buffers registered with the driver, one row per channel.
+        start_time (float): The time of the first acquired sample, as a POSIX timestamp.
+        sample (int): The number of the first sample of the next block to fill.
     """
-    Get the voltage value from the specified channel.
+
+    def __init__(self, channels, block_size, depth=3, driver_size=100000):
+        self.channels = channels
+        self.block_size = block_size
+        self.depth = depth
+        self.driver_buffer = np.zeros((len(channels), driver_size), dtype=np.int16)
+        self.blocks = np.zeros((depth, len(channels), block_size), dtype=np.int16)
+        self.views = []
+        for block in self.blocks:
+            view = block.view()
+            view.flags.writeable = False
+            self.views.append(view)
+        self.numbers = [0] * depth
+        self.start_time = time.time()
+        self.sample = 0
+        self.free = collections.deque(range(1, depth))
+        self.ready = collections.deque()
+        self.filling = 0
+        self.filled = 0
+        self.condition = threading.Condition()
+
+    def write(self, startIndex, noOfSamples):
+        """
+        Copies samples delivered by the driver into the blocks. Called by the streaming callback.
+
+        Args:
+            startIndex (int): The index of the first sample in the driver buffer.
+            noOfSamples (int): The number of samples delivered.
+
+        Returns:
+            None
+        """
+        while noOfSamples > 0:
+            count = min(noOfSamples, self.block_size - self.filled)
+            self.blocks[self.filling, :, self.filled:self.filled + count] = \
+                self.driver_buffer[:, startIndex:startIndex + count]
+            self.filled += count
+            startIndex += count
+            noOfSamples -= count
+            if self.filled == self.block_size:
+                self.swap()
+
+    def swap(self):
+        """
+        Marks the block being filled as ready and continues in another block.
+        """
+        with self.condition:
+            self.numbers[self.filling] = self.sample
+            self.sample += self.block_size
+            self.filled = 0
+            if self.free:
+                self.ready.append(self.filling)
+                self.filling = self.free.popleft()
+            elif self.ready:
+                self.ready.append(self.filling)
+                self.filling = self.ready.popleft()
+                record_dropped()
+            else:
+                record_dropped()
+                return
+            self.condition.notify()
+
+    def acquire(self, timeout=None):
+        """
+        Takes the oldest ready block.
+
+        Args:
+            timeout (float): The maximum time to wait for a block in seconds, None to wait
+                forever, 0 not to wait.
+
+        Returns:
+            int: The number of the block, or None if no block was ready in time.
+        """
+        with self.condition:
+            if not self.ready and timeout != 0:
+                self.condition.wait(timeout)
+            if not self.ready:
+                return None
+            return self.ready.popleft()
+
+    def view(self, block):
+        """
+        Returns the read-only view of an acquired block.
+
+        Args:
+            block (int): The number of the block.
+
+        Returns:
+            numpy.ndarray: The int16 ADC counts, one row per channel.
+        """
+        return self.views[block]
+
+    def timestamp(self, block):
+        """
+        Returns the time of the first sample of an acquired block, as a POSIX timestamp.
+        """
+        return self.start_time + self.numbers[block] * sample_interval
+
+    def number(self, block):
+        """
+        Returns the number of the first sample of an acquired block since the start of the streaming.
+        """
+        return self.numbers[block]
+
+    def release(self, block):
+        """
+        Gives back an acquired block once its consumers are done with it.
+
+        Args:
+            block (int): The number of the block.
+
+        Returns:
+            None
+        """
+        with self.condition:
+            self.free.append(block)
+
+
+def start_streaming(channels, block_size=250, depth=3):
+    """
+    Registers the buffers of the channels and starts the continuous streaming.
+
+    The buffers are registered and the callback is created once, poll_streaming() then
+    only fetches the new samples into the pool.
 
     Args:
-        channel (int): The channel number.
+        channels (list): The names of the channels to acquire.
+        block_size (int): The number of samples per channel of a block (default: 250).
+        depth (int): The number of blocks of the pool (default: 3).
 
     Returns:
-        float: The voltage value.
+        BufferPool: The pool the acquired blocks are read from.
 
     Raises:
         AssertionError: If there is an error in setting the data buffers or running streaming.
-
     """
-    global chandle, channel_range, maxADC
-    buffer = np.zeros(shape=1, dtype=np.int16)
+    global chandle, pool, streaming_callback_pointer, sample_interval, next_index
+    pool = BufferPool(channels, block_size, depth)
     status = {}
-
-    status["setDataBuffers"] = ps.ps2000aSetDataBuffers(chandle,
-                                                        ps.PS2000A_CHANNEL[channel],
-                                                        buffer.ctypes.data_as(
-                                                            ctypes.POINTER(ctypes.c_int16)),
-                                                        None,
-                                                        1,
-                                                        0,
-                                                        ps.PS2000A_RATIO_MODE['PS2000A_RATIO_MODE_NONE'])
-    assert_pico_ok(status["setDataBuffers"])
+    driver_size = pool.driver_buffer.shape[1]
+    for row, channel in enumerate(channels):
+        start = time.perf_counter_ns() if instrumentation.enabled else 0
+        status["setDataBuffers"] = ps.ps2000aSetDataBuffers(chandle,
+                                                            ps.PS2000A_CHANNEL[channel],
+                                                            pool.driver_buffer[row].ctypes.data_as(
+                                                                ctypes.POINTER(ctypes.c_int16)),
+                                                            None,
+                                                            driver_size,
+                                                            0,
+                                                            ps.PS2000A_RATIO_MODE['PS2000A_RATIO_MODE_NONE'])
+        if start:
+            instrumentation.record('driver.setDataBuffers', start)
+        assert_pico_ok(status["setDataBuffers"])
     sampleInterval = ctypes.c_int32(250)
     sampleUnits = ps.PS2000A_TIME_UNITS['PS2000A_US']
 
+    start = time.perf_counter_ns() if instrumentation.enabled else 0
     status["runStreaming"] = ps.ps2000aRunStreaming(chandle,
                                                     ctypes.byref(
                                                         sampleInterval),
                                                     sampleUnits,
                                                     0,
-                                                    1,
-                                                    1,
+                                                    0,
+                                                    0,
                                                     1,
                                                     ps.PS2000A_RATIO_MODE['PS2000A_RATIO_MODE_NONE'],
-                                                    1)
+                                                    driver_size)
+    if start:
+        instrumentation.record('driver.runStreaming', start)
     assert_pico_ok(status["runStreaming"])
+    sample_interval = sampleInterval.value * 1e-6
+    pool.start_time = time.time()
+    next_index = 0
+    streaming_callback_pointer = ps.StreamingReadyType(streaming_callback)
+    return pool
 
-    wasCalledBack = False
 
-    def streaming_callback(handle, noOfSamples, startIndex, overflow, triggerAt, triggered, autoStop, param):
-        nonlocal wasCalledBack
-        wasCalledBack = True
+def streaming_callback(handle, noOfSamples, startIndex, overflow, triggerAt, triggered, autoStop, param):
+    """
+    Called by the driver during poll_streaming() with the position of the new samples.
+    """
+    global next_index
+    record_callback(noOfSamples, startIndex, next_index, overflow)
+    next_index = (startIndex + noOfSamples) % pool.driver_buffer.shape[1]
+    pool.write(startIndex, noOfSamples)
 
-    cFuncPtr = ps.StreamingReadyType(streaming_callback)
-    while not wasCalledBack:
-        status["getStreamingLastestValues"] = ps.ps2000aGetStreamingLatestValues(
-            chandle, cFuncPtr, None)
 
-    voltage = adc2mV(buffer, channel_range, maxADC)
-    status["stop"] = ps.ps2000aStop(chandle)
-    assert_pico_ok(status["stop"])
+def poll_streaming():
+    """
+    Asks the driver for the samples acquired since the last call and copies them into the pool.
+
+    Returns:
+        None
+
+    Raises:
+        PicoSDKCtypesError: If the driver reports an error other than being busy, e.g. when
+            the device is disconnected.
+    """
+    start = time.perf_counter_ns() if instrumentation.enabled else 0
+    status = ps.ps2000aGetStreamingLatestValues(chandle, streaming_callback_pointer, None)
+    if start:
+        instrumentation.record('driver.getStreamingLatestValues', start)
+    if status != PICO_STATUS['PICO_BUSY']:
+        assert_pico_ok(status)
+
+
+def stop_streaming():
+    """
+    Stops the continuous streaming.
+
+    Returns:
+        None
+
+    Raises:
+        AssertionError: If the driver fails to stop.
+    """
+    start = time.perf_counter_ns() if instrumentation.enabled else 0
+    status = ps.ps2000aStop(chandle)
+    if start:
+        instrumentation.record('driver.stop', start)
+    assert_pico_ok(status)
+
 
-    return voltage[0]
+def get_conversion():
+    """
+    Returns the parameters needed to convert ADC counts to millivolts.
+
+    Returns:
+        tuple: The full scale of the channel range in millivolts and the maximum ADC count,
+        a count converts to count * range_mv / max_adc millivolts.
+    """
+    global channel_range, maxADC
+    return ps.PICO_VOLTAGE_RANGE[channel_range] * 1000, maxADC.value
+
+
+def record_callback(noOfSamples, startIndex, expectedIndex, overflow):
+    """
+    Records the accounting information reported by a streaming callback.
+
+    Args:
+        noOfSamples (int): The number of samples delivered by the driver.
+        startIndex (int): The index in the buffer of the first delivered sample.
+        expectedIndex (int): The index the previous callback ended at.
+        overflow (int): The overflow bit field, one bit per channel.
+
+    Returns:
+        None
+    """
+    global last_callback_time
+    now = time.perf_counter()
+    with stats_lock:
+        stream_stats['callbacks'] += 1
+        stream_stats['samples'] += noOfSamples
+        if noOfSamples == 0:
+            stream_stats['emptyCallbacks'] += 1
+        if last_callback_time is not None:
+            interval = now - last_callback_time
+            stream_stats['lastCallbackInterval'] = interval
+            stream_stats['maxCallbackInterval'] = max(
+                stream_stats['maxCallbackInterval'], interval)
+        last_callback_time = now
+        gap = noOfSamples > 0 and startIndex != expectedIndex
+        if gap:
+            stream_stats['gaps'] += 1
+        overflowed = [name for name, index in ps.PS2000A_CHANNEL.items()
+                      if name.startswith('PS2000A_CHANNEL_') and overflow & (1 << index)]
+        for channel in overflowed:
+            stream_stats['overflows'][channel] = stream_stats['overflows'].get(
+                channel, 0) + 1
+    if gap:
+        warn('gap', "Streaming gap detected: expected sample index " +
+             str(expectedIndex) + ", got " + str(startIndex))
+    for channel in overflowed:
+        warn('overflow ' + channel, "Overflow on " + channel)
+
+
+def record_queue_depth(depth):
+    """
+    Records the number of acquired blocks waiting to be consumed.
+
+    Args:
+        depth (int): The current depth of the consumer queue.
+
+    Returns:
+        None
+    """
+    with stats_lock:
+        stream_stats['queueDepth'] = depth
+        stream_stats['maxQueueDepth'] = max(
+            stream_stats['maxQueueDepth'], depth)
+
+
+def record_dropped(count=1):
+    """
+    Records acquired blocks that were dropped before reaching the consumers.
+
+    Args:
+        count (int): The number of dropped blocks (default: 1).
+
+    Returns:
+        None
+    """
+    with stats_lock:
+        stream_stats['droppedBlocks'] += count
+        dropped = stream_stats['droppedBlocks']
+    warn('dropped', "Data dropped: " + str(dropped) +
+         " blocks lost since the last reset")
+
+
+def warn(kind, message):
+    """
+    Logs a streaming warning, at most once every WARNING_INTERVAL seconds per kind.
+
+    Args:
+        kind (str): The kind of warning, used for rate limiting.
+        message (str): The message to be logged.
+
+    Returns:
+        None
+    """
+    now = time.monotonic()
+    if now - last_warning_time.get(kind, -WARNING_INTERVAL) < WARNING_INTERVAL:
+        return
+    last_warning_time[kind] = now
+    log_action(message, 'warning')
+
+
+def get_stream_stats():
+    """
+    Returns a snapshot of the streaming counters.
+
+    Returns:
+        dict: The callback count, delivered and empty callbacks, sample gaps, per-channel
+        overflow counts, callback cadence (seconds), consumer queue depth and dropped blocks.
+    """
+    with stats_lock:
+        snapshot = dict(stream_stats)
+        snapshot['overflows'] = dict(stream_stats['overflows'])
+    return snapshot
+
+
+def reset_stream_stats():
+    """
+    Resets all the streaming counters to zero.
+
+    Returns:
+        None
+    """
+    global last_callback_time
+    with stats_lock:
+        for key, value in stream_stats.items():
+            stream_stats[key] = {} if isinstance(value, dict) else type(value)()
+        last_callback_time = None
 
 
 def get_pico_list():
@@ -1,48 +1,419 @@
 import picoS2000aRealtimeStreaming as pico
+import export
+import instrumentation
+import logger
+import logindex
+from logger import log_action
+from mathchannels import MathChannels
+from persistence import Persistence
+from rates import Aggregator
+from recorder import FlightRecorder
 from PySide6 import QtWidgets
-from PySide6.QtCore import QThread, Signal
+from PySide6.QtCore import Qt, QRectF, QThread, QTimer, Signal
 import pyqtgraph as pg
+import numpy as np
+import threading
+import time
 
 
 class DataFetcher(QThread):
-    data_fetched = Signal(list)
+    data_fetched = Signal(float, int, int)
+    state_changed = Signal(str)
+    block_size = 250
+    depth = 3
+    # Reconnection to the device, see run()
+    reconnect_delay = 1.0
+    max_reconnect_delay = 60.0
+    stall_timeout = 2.0
 
-    def __init__(self, channels):
+    def __init__(self, channels, publisher=None):
         """
         Initialize the Plotting class.
 
         Args:
             channels (list): A list of channels.
+            publisher (Publisher): The live data publisher the raw blocks are sent to (default: None).
 
         Attributes:
             channels (list): A list of channels.
             running (bool): A flag indicating if the plotting is running.
+            state (str): The state of the acquisition: 'idle', 'connecting', 'streaming', 'reconnecting' or 'stopped'.
+            received (int): The number of blocks received since the streaming last started.
+            range_mv (float): The full scale of the channels in millivolts, 0 until the streaming starts.
+            pending (int): The number of emitted blocks not yet consumed by the plot.
+            generation (int): The number of the buffer pool the emitted blocks belong to, incremented when
+                the streaming stops, so the blocks still queued for the plot are recognized as stale.
+            logging (bool): A flag indicating if the values are logged.
+            max_size_mb (int): The maximum size of a log file in MB.
+            log_interval (float): The duration aggregated in each logged row in seconds.
+            filters (list): The filter chain of each channel, None for an unfiltered channel.
+            millivolts (numpy.ndarray): The filtered values of each block of the buffer pool.
+            math (MathChannels): The math channels, evaluated on request from `millivolts`.
+            recorder (FlightRecorder): The flight recorder the raw blocks are kept in.
+            names (list): The column names of the channels in the logs.
+            rates (tuple): The positions of the slow channels and their aggregation period in seconds.
+            aggregator (Aggregator): The aggregator of the slow channels, None if all channels are fast.
+            log_aggregator (Aggregator): The aggregator of the logged rows of the fast channels.
         """
         super().__init__()
         self.channels = channels
+        self.publisher = publisher
         self.running = True
+        self.state = 'idle'
+        self.received = 0
+        self.range_mv = 0
+        self.logging = False
+        self.max_size_mb = 15
+        self.log_interval = 1.0
+        self.log_aggregator = None
+        self.log_config = None
+        self.pending = 0
+        self.pending_lock = threading.Lock()
+        self.generation = 0
+        self.filters = [None] * len(channels)
+        self.millivolts = None
+        self.math = MathChannels([channel[-1] for channel in channels], self.depth, self.block_size)
+        self.recorder = FlightRecorder([channel[-1] for channel in channels])
+        self.names = ['Channel_' + channel[-1] for channel in channels]
+        self.rates = ((), 1.0)
+        self.aggregator_rates = None
+        self.aggregator = None
+        self.fast_rows = list(range(len(channels)))
 
     def run(self):
         """
-        Continuously fetches data from the specified channels and emits the fetched data.
+        Supervises the device: opens it, streams from it and reconnects after an error.
 
-        This method runs in a loop until the `running` flag is set to False. It fetches data from each channel
-        using the `get_value` method of the `pico` object. The fetched data is then emitted using the `data_fetched`
-        signal. After emitting the data, the method sleeps for 25 milliseconds using the `msleep` method.
+        The device is opened in this thread, so the GUI does not wait for the driver. When opening fails,
+        or when the streaming fails or stalls (no block for `stall_timeout` seconds, e.g. the USB cable was
+        unplugged), the streaming is stopped, the device closed and opened again after a delay doubled at
+        every failed attempt, from `reconnect_delay` up to `max_reconnect_delay` seconds. The delay is reset
+        once blocks are received again. Every change of state is logged and emitted with `state_changed`.
+        """
+        delay = self.reconnect_delay
+        while self.running:
+            self.set_state('connecting')
+            try:
+                pico.open_pico()
+            except Exception as e:
+                log_action(f"Error opening the device: {e}", 'error')
+                self.close_device()
+                delay = self.wait_reconnect(delay)
+                continue
+            log_action("Device opened")
+            try:
+                self.stream()
+            except Exception as e:
+                print(f"Error fetching data: {e}")
+                log_action(f"Error fetching data: {e}", 'error')
+            finally:
+                self.stop_device()
+            if self.received:
+                delay = self.reconnect_delay
+            if self.running:
+                delay = self.wait_reconnect(delay)
+        self.set_state('stopped')
+
+    def stream(self):
+        """
+        Continuously fetches blocks of samples from the specified channels and emits them.
+
+        This method starts the streaming with `pico.start_streaming` and runs in a loop until the `running` flag
+        is set to False. Each block filled in the buffer pool is kept by the flight recorder, published as raw ADC counts if a publisher is
+        set, converted to millivolts into the preallocated `millivolts` buffer of the block, filtered by the
+        filter chain of each channel and logged if `logging` is set, then its number is emitted with its time
+        and the `generation` of the pool using the `data_fetched` signal. The plot reads the filtered values
+        of the block and releases it.
 
-        If an exception occurs while fetching the data, the error message is printed and the `running` flag is set
-        to False, terminating the loop.
+        The slow channels are reduced by the `aggregator` to the mean, minimum and maximum of each period:
+        they are logged one row per period in separate files, and displayed from the periods. The fast
+        channels are logged one row per `log_interval`, see `log`.
+
+        If the consumer already holds all the blocks it can without starving the driver, the block is released
+        right away and counted with `pico.record_dropped` instead of being queued.
 
         Note: This method assumes that the `channels` attribute is a list of valid channel names.
 
+        Raises:
+            Exception: If the driver fails, or RuntimeError if no block is received for `stall_timeout` seconds.
         """
+        self.received = 0
+        pool = pico.start_streaming(self.channels, self.block_size, self.depth)
+        self.set_state('streaming')
+        range_mv, max_adc = pico.get_conversion()
+        scale = range_mv / max_adc
+        self.range_mv = range_mv
+        if self.publisher is not None:
+            self.publisher.range_mv = range_mv
+            self.publisher.max_adc = max_adc
+        self.recorder.start(pico.sample_interval, pool.block_size, range_mv, max_adc)
+        self.millivolts = np.empty((pool.depth, len(self.channels), pool.block_size))
+        self.aggregator_rates = None
+        self.log_config = None
+        last_block = time.monotonic()
         while self.running:
-            try:
-                values = [pico.get_value(channel) for channel in self.channels]
-                self.data_fetched.emit(values)
-            except Exception as e:
-                print(f"Error fetching data: {e}")
-                self.running = False
+            pico.poll_streaming()
+            block = pool.acquire(timeout=0)
+            if block is None:
+                if time.monotonic() - last_block > self.stall_timeout:
+                    raise RuntimeError(f"no data from the device for {self.stall_timeout} s")
+                self.msleep(5)
+                continue
+            last_block = time.monotonic()
+            self.received += 1
+            timestamp = pool.timestamp(block)
+            raw = pool.view(block)
+            start = time.perf_counter_ns() if instrumentation.enabled else 0
+            self.recorder.add(raw, timestamp)
+            if start:
+                instrumentation.record('fetcher.recorder', start)
+            if self.publisher is not None:
+                self.publisher.publish(raw, timestamp, pico.sample_interval, pool.number(block))
+            values = self.millivolts[block]
+            np.multiply(raw, scale, out=values)
+            start = time.perf_counter_ns() if instrumentation.enabled else 0
+            for i, chain in enumerate(self.filters):
+                if chain is not None:
+                    chain.process(values[i], pico.sample_interval)
+            if start:
+                instrumentation.record('fetcher.filters', start)
+            self.math.invalidate(block)
+            if self.rates is not self.aggregator_rates:
+                self.setup_rates(self.rates, pool)
+            if self.aggregator is not None:
+                start = time.perf_counter_ns() if instrumentation.enabled else 0
+                self.aggregator.process(values, timestamp, pico.sample_interval, block)
+                if start:
+                    instrumentation.record('fetcher.rates', start)
+            if self.logging:
+                self.log(timestamp, block, values)
+            with self.pending_lock:
+                queued = self.pending < pool.depth - 1
+                if queued:
+                    self.pending += 1
+                pico.record_queue_depth(self.pending)
+            if queued:
+                start = time.perf_counter_ns() if instrumentation.enabled else 0
+                self.data_fetched.emit(timestamp, block, self.generation)
+                if start:
+                    instrumentation.record('fetcher.emit', start)
+            else:
+                pool.release(block)
+                pico.record_dropped()
+
+    def stop_device(self):
+        """
+        Stops the streaming and closes the device, once the plot has consumed the emitted blocks.
+
+        The blocks still queued for the plot belong to the current buffer pool, which is replaced when
+        the streaming starts again, so they are waited for (at most one second). The blocks the plot has
+        not consumed by then are invalidated: the `generation` changes and `pending` is reset, the plot
+        ignores them instead of reading the buffers of the next pool.
+
+        Returns:
+            None
+        """
+        deadline = time.monotonic() + 1.0
+        while self.pending > 0 and time.monotonic() < deadline:
+            self.msleep(5)
+        with self.pending_lock:
+            self.generation += 1
+            self.pending = 0
+            pico.record_queue_depth(0)
+        try:
+            pico.stop_streaming()
+        except Exception as e:
+            log_action(f"Error stopping the streaming: {e}", 'error')
+        self.close_device()
+
+    def close_device(self):
+        """
+        Closes the device, ignoring the errors of a device already gone.
+
+        Returns:
+            None
+        """
+        try:
+            pico.close_pico()
+        except Exception as e:
+            log_action(f"Error closing the device: {e}", 'warning')
+        else:
+            log_action("Device closed")
+
+    def wait_reconnect(self, delay):
+        """
+        Waits before the next attempt to open the device, unless the fetcher is stopped.
+
+        Args:
+            delay (float): The time to wait in seconds.
+
+        Returns:
+            float: The delay before the attempt after this one, doubled up to `max_reconnect_delay`.
+        """
+        self.set_state('reconnecting')
+        log_action(f"Reconnecting to the device in {delay:g} s")
+        deadline = time.monotonic() + delay
+        while self.running and time.monotonic() < deadline:
+            self.msleep(100)
+        return min(2 * delay, self.max_reconnect_delay)
+
+    def set_state(self, state):
+        """
+        Changes the state of the acquisition, logs it and emits it with `state_changed`.
+
+        Args:
+            state (str): 'connecting', 'streaming', 'reconnecting' or 'stopped'.
+
+        Returns:
+            None
+        """
+        if state == self.state:
+            return
+        log_action(f"Acquisition state: {self.state} -> {state}")
+        self.state = state
+        self.state_changed.emit(state)
+
+    def log(self, timestamp, block, values):
+        """
+        Logs a block, the fast channels one row per `log_interval` and the slow channels one row per period.
+
+        Each row holds the mean, minimum, maximum and number of samples of every channel over its interval,
+        computed by an Aggregator over all the samples received, so the volume of the logs does not depend
+        on the sample rate while the short excursions are kept in the minimums and maximums. A row is
+        written once its interval is over.
+
+        Args:
+            timestamp (float): The time of the first sample of the block.
+            block (int): The number of the block in the buffer pool.
+            values (numpy.ndarray): The filtered values of the block, one row per channel.
+
+        Returns:
+            None
+        """
+        config = (tuple(self.fast_rows), self.log_interval)
+        if config != self.log_config:
+            self.log_aggregator = None
+            if self.fast_rows:
+                self.log_aggregator = Aggregator(self.fast_rows, self.log_interval, pico.sample_interval,
+                                                 self.block_size, self.depth)
+            self.log_config = config
+        if self.log_aggregator is not None and self.log_aggregator.process(
+                values, timestamp, pico.sample_interval, block):
+            logger.log_aggregates(*self.log_aggregator.results(block),
+                                  [self.names[row] for row in self.fast_rows], self.max_size_mb)
+        if self.aggregator is not None and self.aggregator.counts[block]:
+            logger.log_aggregates(*self.aggregator.results(block),
+                                  [self.names[row] for row in self.aggregator.rows],
+                                  self.max_size_mb, slow=True)
+
+    def set_rates(self, slow, period):
+        """
+        Sets the rate class of the channels, applied from the next block on.
+
+        Args:
+            slow (list): The positions of the slow channels in `channels`.
+            period (float): The aggregation period of the slow channels in seconds.
+
+        Returns:
+            None
+        """
+        self.rates = (tuple(sorted(slow)), period)
+
+    def setup_rates(self, rates, pool):
+        """
+        Allocates the aggregator of the slow channels for the current rates, called by the
+        acquisition thread. The unfinished period of the previous aggregator is dropped.
+
+        Args:
+            rates (tuple): The positions of the slow channels and their aggregation period.
+            pool (BufferPool): The buffer pool of the streaming.
+
+        Returns:
+            None
+        """
+        slow, period = rates
+        self.fast_rows = [row for row in range(len(self.channels)) if row not in slow]
+        if slow:
+            self.aggregator = Aggregator(slow, period, pico.sample_interval, pool.block_size,
+                                         pool.depth)
+            log_action("Slow channels " + ", ".join(self.names[row] for row in slow) +
+                       f" aggregated every {period} s")
+        else:
+            self.aggregator = None
+        self.aggregator_rates = rates
+
+    def set_logging(self, enabled=None, max_size_mb=None, interval=None):
+        """
+        Turns the logging of the fetched values on or off and sets the size of the log files and
+        the interval of the logged rows.
+
+        Args:
+            enabled (bool): True to log the values (default: unchanged).
+            max_size_mb (int): The maximum size of a log file in MB (default: unchanged).
+            interval (float): The duration aggregated in each logged row in seconds (default: unchanged).
+
+        Returns:
+            None
+        """
+        if enabled is not None:
+            self.logging = enabled
+        if max_size_mb is not None:
+            self.max_size_mb = max_size_mb
+        if interval is not None:
+            self.log_interval = interval
+
+    def set_filter(self, channel, chain):
+        """
+        Sets the filter chain of a channel, applied from the next block on.
+
+        The chain starts from the next block, its state is not shared with the previous chain.
+
+        Args:
+            channel (int): The position of the channel in `channels`.
+            chain (FilterChain): The filter chain, None to stop filtering the channel.
+
+        Returns:
+            None
+        """
+        self.filters[channel] = chain
+
+    def memory_usage(self, level=0):
+        """
+        Returns the bytes held by the buffer pool of the streaming, the filtered values, the
+        math channels and the aggregators.
+
+        Args:
+            level (int): The degradation level of the memory budget, not used.
+
+        Returns:
+            int: The size of the buffers in bytes.
+        """
+        total = self.math.memory_usage()
+        for aggregator in (self.aggregator, self.log_aggregator):
+            if aggregator is not None:
+                total += aggregator.memory_usage()
+        if self.millivolts is not None:
+            total += self.millivolts.nbytes
+        if pico.pool is not None:
+            total += pico.pool.driver_buffer.nbytes + pico.pool.blocks.nbytes
+        return total
+
+    def consumed(self, generation):
+        """
+        Marks one emitted block as consumed by the plot.
+
+        Args:
+            generation (int): The generation the block was emitted with, the blocks of a previous
+                generation are no longer counted in `pending`.
+
+        Returns:
+            None
+        """
+        with self.pending_lock:
+            if generation != self.generation:
+                return
+            self.pending -= 1
+            pico.record_queue_depth(self.pending)
 
     def stop(self):
         """
@@ -53,8 +424,116 @@ class DataFetcher(QThread):
         self.running = False
 
 
+class HistoryLoader(QThread):
+    history_loaded = Signal(int, object, object)
+
+    def __init__(self, request, start, end, bins, columns=None):
+        """
+        Initialize the HistoryLoader.
+
+        Args:
+            request (int): The number of the request, sent back with the result.
+            start (float): The start of the window to load, as a POSIX timestamp.
+            end (float): The end of the window to load, as a POSIX timestamp.
+            bins (int): The number of points the window is displayed on.
+            columns (list): The column names of the channels to load (default: all the logged channels).
+        """
+        super().__init__()
+        self.request = request
+        self.start_time = start
+        self.end_time = end
+        self.bins = bins
+        self.columns = columns
+
+    def run(self):
+        """
+        Loads the min/max envelope of the logged values in the window and emits it with the
+        `history_loaded` signal.
+        """
+        try:
+            times, values = logindex.query_envelope(
+                logger.path, self.start_time, self.end_time, self.bins, self.columns)
+        except Exception as e:
+            log_action(f"Error loading the plot history: {e}", 'error')
+            return
+        self.history_loaded.emit(self.request, times, values)
+
+
+class ExportWorker(QThread):
+    progress_changed = Signal(int)
+    export_finished = Signal(object)
+    export_failed = Signal(str)
+
+    def __init__(self, file_path, kind, columns, start, end, memory=None, logged=()):
+        """
+        Initialize the ExportWorker.
+
+        Args:
+            file_path (str): The path of the exported file.
+            kind (str): The format of the file, 'csv' or 'binary'.
+            columns (list): The column names of the exported channels.
+            start (float): The start of the window to export, as a POSIX timestamp.
+            end (float): The end of the window to export, as a POSIX timestamp.
+            memory (tuple): A copy of the times and values held in memory for the end of the
+                window (default: None, the window is read from the logs only).
+            logged (list): The columns missing from `memory`, read from the logs over the whole
+                window (default: none).
+        """
+        super().__init__()
+        self.file_path = file_path
+        self.kind = kind
+        self.columns = columns
+        self.start_time = start
+        self.end_time = end
+        self.memory = memory
+        self.logged = logged
+        self.cancelled = False
+
+    def run(self):
+        """
+        Writes the export chunk by chunk, reporting the progress in percent with the
+        `progress_changed` signal, then emits the number of exported rows with the
+        `export_finished` signal (None if the export was cancelled).
+        """
+        try:
+            rows = export.export_window(self.file_path, self.kind, self.columns,
+                                        self.start_time, self.end_time, self.memory,
+                                        self.report, lambda: self.cancelled, self.logged)
+        except Exception as e:
+            log_action(f"Error exporting to {self.file_path}: {e}", 'error')
+            self.export_failed.emit(str(e))
+            return
+        if rows is None:
+            log_action(f"Export to {self.file_path} cancelled")
+        else:
+            log_action(f"Exported {rows} rows to {self.file_path}")
+        self.export_finished.emit(rows)
+
+    def report(self, fraction):
+        self.progress_changed.emit(int(100 * fraction))
+
+    def cancel(self):
+        """
+        Stops the export after the chunk being written, the partial file is removed.
+        """
+        self.cancelled = True
+
+
 class PicoPlotter(QtWidgets.QMainWindow):
-    def __init__(self, channels, title, parent):
+    # History size in points, decimation and aggregation (min/max per block) of the buffers
+    # at each degradation level of the memory budget, see memory.LEVELS. Each level holds
+    # fewer points than the previous one, the decimated and aggregated levels still covering
+    # a longer time than the reduced history.
+    memory_levels = [
+        (100000, 1, False),
+        (25000, 1, False),
+        (10000, 4, False),
+        (2500, 1, True),
+    ]
+    # Number of periods of the slow channels kept, each displayed as its minimum and maximum
+    slow_history_size = 10000
+
+    def __init__(self, channels, title, parent, publisher=None, math_channels=()):
         """
         Initialize the PlottingWidget.
 
@@ -62,18 +541,56 @@ class PicoPlotter(QtWidgets.QMainWindow):
             channels (list): A list of channels.
             title (str): The title of the widget.
             parent (QWidget): The parent widget.
+            publisher (Publisher): The live data publisher of the acquired values (default: None).
+            math_channels (list): The names of the math channels that can be displayed (default: none).
 
         Returns:
             None
         """
         super().__init__(parent)
         self.channels = channels
+        self.math_channels = list(math_channels)
+        self.math_stale = {name: True for name in self.math_channels}
         self.title = title
         self.widgetParent = parent
         self.initUI(parent)
-        self.data = [[] for _ in channels]
+        # The last `history_size` values are kept in the first half of buffers twice as long,
+        # so that the window is always contiguous and is shifted once every `history_size` values
+        self.history_size, self.decimation, self.aggregate = self.memory_levels[0]
+        self.times = np.empty(2 * self.history_size)
+        self.data = np.empty((len(channels) + len(self.math_channels), 2 * self.history_size))
+        # The row of each curve in `data`, None for the slow channels, kept only as periods
+        self.data_rows = list(range(self.data.shape[0]))
+        self.slow_rows = ()
+        self.first = 0
+        self.last = 0
+        # The time of the last point stored at the aggregated memory level, see export_window
+        self.aggregated_time = -np.inf
+        # The slow channels are displayed from their periods, kept like the values above
+        self.slow_times = np.empty(4 * self.slow_history_size)
+        self.slow_data = np.empty((len(channels), 4 * self.slow_history_size))
+        self.slow_first = 0
+        self.slow_last = 0
+        self.slow_aggregator = None
+        self.offsets = None
+        self.phase = 0
+        self.history_request = 0
+        self.history_loaders = []
+        self.exporters = []
+        self.history_timer = QTimer(self)
+        self.history_timer.setSingleShot(True)
+        self.history_timer.setInterval(250)
+        self.history_timer.timeout.connect(self.request_history)
+        # Persistence display of one channel, rendered at most every `persistence_timer` interval
+        self.persistence = Persistence()
+        self.persistence_channel = None
+        self.persistence_display = np.zeros_like(self.persistence.image)
+        self.persistence_timer = QTimer(self)
+        self.persistence_timer.setInterval(200)
+        self.persistence_timer.timeout.connect(self.render_persistence)
+        self.plotWidget.getViewBox().sigXRangeChanged.connect(self.view_changed)
 
-        self.data_fetcher = DataFetcher(channels)
+        self.data_fetcher = DataFetcher(channels, publisher)
         self.data_fetcher.data_fetched.connect(self.update_plot)
         self.data_fetcher.start()
 
@@ -87,40 +604,451 @@ class PicoPlotter(QtWidgets.QMainWindow):
         Returns:
             None
         """
-        layout = QtWidgets.QVBoxLayout(parent)
+        layout = QtWidgets.QHBoxLayout(parent)
 
-        self.plotWidget = pg.PlotWidget(title=self.title, parent=parent)
-        layout.addWidget(self.plotWidget)
+        self.plotWidget = pg.PlotWidget(title=self.title, parent=parent,
+                                        axisItems={'bottom': pg.DateAxisItem()})
+        layout.addWidget(self.plotWidget, 3)
 
         self.plotWidget.setTitle(self.title, color="k", size="18pt")
         self.plotWidget.showGrid(x=True, y=True)
         self.plotWidget.addLegend()
         styles = {"color": "black", "font-size": "18px"}
         self.plotWidget.setLabel('left', 'Tension (mV)', **styles)
-        self.plotWidget.setLabel('bottom', 'Temps (tick)', **styles)
+        self.plotWidget.setLabel('bottom', 'Temps', **styles)
         self.plotWidget.setBackground('w')
+
+        self.persistenceWidget = pg.PlotWidget(parent=parent)
+        self.persistenceWidget.setTitle("Persistance", color="k", size="18pt")
+        self.persistenceWidget.setLabel('left', 'Tension (mV)', **styles)
+        self.persistenceWidget.setLabel('bottom', 'Temps (ms)', **styles)
+        self.persistenceWidget.setBackground('w')
+        self.persistenceImage = pg.ImageItem()
+        self.persistenceImage.setLookupTable(pg.colormap.get('inferno').getLookupTable())
+        self.persistenceWidget.addItem(self.persistenceImage)
+        self.persistenceWidget.setVisible(False)
+        layout.addWidget(self.persistenceWidget, 2)
+
         lineThickness = 2
         colors = ['r', 'g', 'b', 'y', 'm', 'c']
         self.curves = []
+        self.history_curves = []
 
         for i, channel in enumerate(self.channels):
             curve = self.plotWidget.plot(pen=pg.mkPen(
                 colors[i], width=lineThickness), name=f"{channel}")
+            curve.setDownsampling(auto=True, method='peak')
+            curve.setClipToView(True)
             self.curves.append(curve)
+            history_curve = self.plotWidget.plot(pen=pg.mkPen(colors[i], width=1))
+            self.history_curves.append(history_curve)
+        for i, name in enumerate(self.math_channels, len(self.channels)):
+            curve = self.plotWidget.plot(pen=pg.mkPen(
+                colors[i % len(colors)], width=lineThickness, style=Qt.PenStyle.DashLine), name=name)
+            curve.setDownsampling(auto=True, method='peak')
+            curve.setClipToView(True)
+            curve.setVisible(False)
+            self.curves.append(curve)
+
+    def update_plot(self, timestamp, block, generation):
+        """
+        Update the plot with a new block of samples.
+
+        The filtered values of the block are copied into the plot buffers, then the block is
+        released to the buffer pool. Depending on the memory level, one sample out of
+        `decimation` is kept, or only the minimum and the maximum of the block. The slow
+        channels are not stored at the sample rate: their curves show the minimum and maximum
+        of their periods and are only redrawn when a period completes.
+
+        Args:
+            timestamp (float): The time of the first sample of the block.
+            block (int): The number of the block in the buffer pool of the streaming.
+            generation (int): The generation of the buffer pool of the block, see DataFetcher.
+
+        Returns:
+            None
+        """
+        if generation != self.data_fetcher.generation:
+            # Emitted before the streaming stopped, its buffers may already be replaced
+            return
+        start = time.perf_counter_ns() if instrumentation.enabled else 0
+        aggregator = self.data_fetcher.aggregator
+        slow = () if aggregator is None else tuple(aggregator.rows)
+        if slow != self.slow_rows:
+            self.set_slow_rows(slow)
+        values = self.data_fetcher.millivolts[block]
+        count = values.shape[1]
+        if self.offsets is None or self.offsets.size != count:
+            self.offsets = np.arange(count) * pico.sample_interval
+        points = 2 if self.aggregate else len(range(self.phase, count, self.decimation))
+        if self.last + points > self.times.size:
+            self.shift()
+        end = self.last + points
+        if self.aggregate:
+            self.times[self.last:end] = timestamp + self.offsets[-1] / 2
+        else:
+            np.add(self.offsets[self.phase::self.decimation], timestamp,
+                   out=self.times[self.last:end])
+        for channel, row in enumerate(self.data_rows[:len(self.channels)]):
+            if row is not None:
+                self.store(values[channel], row, end)
+        self.update_math(block, values, end)
+        self.last = end
+        self.first = max(self.first, self.last - self.history_size)
+        self.phase = (self.phase - count) % self.decimation
+        if self.persistence_channel is not None:
+            persistenceStart = time.perf_counter_ns() if start else 0
+            range_mv = self.data_fetcher.range_mv
+            if range_mv and self.persistence.high != range_mv:
+                # The full scale of the channels is known once the streaming has started
+                self.persistence.configure(low=-range_mv, high=range_mv)
+            self.persistence.add(values[self.persistence_channel], pico.sample_interval)
+            if persistenceStart:
+                instrumentation.record('plot.persistence', persistenceStart)
+        slow_updated = aggregator is not None and self.store_slow(aggregator, block)
+        pico.pool.release(block)
+        self.data_fetcher.consumed(generation)
+        for i, curve in enumerate(self.curves):
+            if not curve.isVisible():
+                continue
+            setDataStart = time.perf_counter_ns() if start else 0
+            if i in slow:
+                if not slow_updated:
+                    continue
+                curve.setData(self.slow_times[self.slow_first:self.slow_last],
+                              self.slow_data[i, self.slow_first:self.slow_last])
+            else:
+                curve.setData(self.times[self.first:self.last],
+                              self.data[self.data_rows[i], self.first:self.last])
+            if setDataStart:
+                instrumentation.record('plot.setData', setDataStart)
+        if start:
+            instrumentation.record('plot.update_plot', start)
+
+    def store(self, values, row, end):
+        """
+        Stores the values of a block in a row of the plot buffers, decimated or aggregated.
+
+        Args:
+            values (numpy.ndarray): The values of the block for the row.
+            row (int): The row of the plot buffers.
+            end (int): The end of the points of the block in the buffers.
+
+        Returns:
+            None
+        """
+        if self.aggregate:
+            self.data[row, end - 2] = values.min()
+            self.data[row, end - 1] = values.max()
+        else:
+            self.data[row, self.last:end] = values[self.phase::self.decimation]
+
+    def set_slow_rows(self, slow):
+        """
+        Reallocates the plot buffers without the rows of the slow channels.
+
+        The slow channels are kept as the periods of their aggregator only, so the memory of the
+        plot scales with the bandwidth of the channels. The points of the other channels and of
+        the math channels are kept, a channel that is no longer slow starts without points.
+
+        Args:
+            slow (tuple): The positions of the slow channels.
+
+        Returns:
+            None
+        """
+        fast = [channel for channel in range(len(self.channels)) if channel not in slow]
+        data_rows = [None] * len(self.channels)
+        for row, channel in enumerate(fast):
+            data_rows[channel] = row
+        data_rows += list(range(len(fast), len(fast) + len(self.math_channels)))
+        data = np.full((len(fast) + len(self.math_channels), self.data.shape[1]), np.nan)
+        for row, old_row in zip(data_rows, self.data_rows):
+            if row is not None and old_row is not None:
+                data[row, self.first:self.last] = self.data[old_row, self.first:self.last]
+        self.data = data
+        self.data_rows = data_rows
+        self.slow_rows = slow
+
+    def store_slow(self, aggregator, block):
+        """
+        Stores the periods of the slow channels completed by a block, as their minimum and maximum.
+
+        The periods stored for another aggregator, before the rates changed, are dropped.
+
+        Args:
+            aggregator (Aggregator): The aggregator of the slow channels.
+            block (int): The number of the block in the buffer pool.
+
+        Returns:
+            bool: True if periods were stored.
+        """
+        if aggregator is not self.slow_aggregator:
+            self.slow_aggregator = aggregator
+            self.slow_first = self.slow_last = 0
+        times, _, minimum, maximum, _ = aggregator.results(block)
+        points = 2 * times.size
+        if not points:
+            return False
+        if self.slow_last + points > self.slow_times.size:
+            count = self.slow_last - self.slow_first
+            self.slow_times[:count] = self.slow_times[self.slow_first:self.slow_last]
+            self.slow_data[:, :count] = self.slow_data[:, self.slow_first:self.slow_last]
+            self.slow_first = 0
+            self.slow_last = count
+        end = self.slow_last + points
+        self.slow_times[self.slow_last:end:2] = times
+        self.slow_times[self.slow_last + 1:end:2] = times
+        self.slow_data[aggregator.rows, self.slow_last:end:2] = minimum
+        self.slow_data[aggregator.rows, self.slow_last + 1:end:2] = maximum
+        self.slow_last = end
+        self.slow_first = max(self.slow_first, self.slow_last - 2 * self.slow_history_size)
+        return True
+
+    def update_math(self, block, values, end):
+        """
+        Copies the values of the displayed math channels for the last block into the plot buffers.
+
+        The math channels are only evaluated while their curve is visible. A curve shown again
+        or redefined is recomputed once over the whole window from the acquired channels (from
+        their minimums and maximums in aggregated mode, an approximation).
+
+        Args:
+            block (int): The number of the block in the buffer pool.
+            values (numpy.ndarray): The values of the acquired channels for the block.
+            end (int): The end of the points of the block in the buffers.
+
+        Returns:
+            None
+        """
+        for row, name in enumerate(self.math_channels, len(self.channels)):
+            expression = self.data_fetcher.math.get(name)
+            if expression is None or not self.curves[row].isVisible():
+                self.math_stale[name] = True
+                continue
+            if self.math_stale[name]:
+                # The values of the slow channels are not kept at the sample rate
+                channels = [np.full(end - self.first, np.nan) if channel_row is None else
+                            self.data[channel_row, self.first:end]
+                            for channel_row in self.data_rows[:len(self.channels)]]
+                expression.evaluate(channels, self.data[self.data_rows[row], self.first:end])
+                self.math_stale[name] = False
+            else:
+                self.store(self.data_fetcher.math.values(name, block, values),
+                           self.data_rows[row], end)
+
+    def set_math_channel(self, name, text):
+        """
+        Defines or removes a math channel and shows its curve if it is defined.
+
+        Args:
+            name (str): The name of the math channel.
+            text (str): The expression, empty to remove the math channel.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the expression is invalid.
+        """
+        expression = self.data_fetcher.math.set(name, text)
+        self.math_stale[name] = True
+        self.curves[len(self.channels) + self.math_channels.index(name)].setVisible(
+            expression is not None)
 
-    def update_plot(self, values):
+    def set_persistence(self, channel, window=None, time_constant=None):
         """
-        Update the plot with new data.
+        Shows the persistence display of a channel next to the plot, or hides it.
+
+        The image is cleared, its voltage range is the full scale of the channels, set again
+        by `update_plot` when the streaming starts.
 
         Args:
-            values (list): The new data values for each channel.
+            channel (int): The position of the channel, None to hide the display.
+            window (float): The duration of a sweep in seconds (default: unchanged).
+            time_constant (float): The decay time constant in seconds (default: unchanged).
+
+        Returns:
+            None
+        """
+        range_mv = self.data_fetcher.range_mv or self.persistence.high
+        self.persistence.configure(window, -range_mv, range_mv, time_constant)
+        self.persistence_channel = channel
+        self.persistenceWidget.setVisible(channel is not None)
+        if channel is None:
+            self.persistence_timer.stop()
+        else:
+            self.persistenceWidget.setTitle("Persistance " + self.channels[channel][-1],
+                                            color="k", size="18pt")
+            self.persistence_timer.start()
+
+    def render_persistence(self):
+        """
+        Draws the persistence image if samples were added since it was last drawn.
+
+        The counts are displayed on a logarithmic scale, so rare glitches stay visible next
+        to the dense trace.
 
         Returns:
             None
         """
-        for i, value in enumerate(values):
-            self.data[i].append(value)
-            self.curves[i].setData(self.data[i])
+        persistence = self.persistence
+        if not persistence.changed:
+            return
+        persistence.changed = False
+        if self.persistence_display.shape != persistence.image.shape:
+            self.persistence_display = np.zeros_like(persistence.image)
+        np.log1p(persistence.image, out=self.persistence_display)
+        self.persistenceImage.setImage(self.persistence_display, autoLevels=False,
+                                       levels=(0, max(float(self.persistence_display.max()), 1.0)))
+        self.persistenceImage.setRect(QRectF(0, persistence.low, persistence.window * 1000,
+                                             persistence.high - persistence.low))
+
+    def set_memory_level(self, level):
+        """
+        Adapts the plot buffers to a degradation level of the memory budget.
+
+        The buffers are reallocated with the history size of the level and the most recent
+        points are kept, the following blocks are stored with the decimation or aggregation of
+        the level.
+
+        Args:
+            level (int): The degradation level, an index of `memory_levels`.
+
+        Returns:
+            None
+        """
+        aggregate = self.aggregate
+        history_size, self.decimation, self.aggregate = self.memory_levels[level]
+        if aggregate and not self.aggregate and self.last > self.first:
+            self.aggregated_time = self.times[self.last - 1]
+        self.phase = 0
+        if history_size == self.history_size:
+            return
+        count = min(self.last - self.first, history_size)
+        times = np.empty(2 * history_size)
+        data = np.empty((self.data.shape[0], 2 * history_size))
+        times[:count] = self.times[self.last - count:self.last]
+        data[:, :count] = self.data[:, self.last - count:self.last]
+        self.history_size = history_size
+        self.times = times
+        self.data = data
+        self.first = 0
+        self.last = count
+
+    def memory_usage(self, level):
+        """
+        Returns the bytes held by the plot buffers at a degradation level of the memory budget.
+        """
+        history_size = self.memory_levels[level][0]
+        return ((1 + self.data.shape[0]) * 2 * history_size * self.data.itemsize +
+                self.slow_times.nbytes + self.slow_data.nbytes +
+                self.persistence.memory_usage() + self.persistence_display.nbytes)
+
+    def shift(self):
+        """
+        Moves the values of the window to the beginning of the buffers.
+        """
+        count = self.last - self.first
+        self.times[:count] = self.times[self.first:self.last]
+        self.data[:, :count] = self.data[:, self.first:self.last]
+        self.first = 0
+        self.last = count
+
+    def view_changed(self):
+        """
+        Schedules the loading of the history when the visible time range changes.
+
+        The loading is throttled: the range is checked at most every 250 ms.
+        """
+        if not self.history_timer.isActive():
+            self.history_timer.start()
+
+    def request_history(self):
+        """
+        Loads the part of the visible time range older than the values held in memory.
+
+        The history is read from the logs on a background thread, at the resolution of the
+        plot width, and displayed when loaded by `show_history`.
+
+        Returns:
+            None
+        """
+        start, end = self.plotWidget.getViewBox().viewRange()[0]
+        oldest = self.times[self.first] if self.last > self.first else time.time()
+        if start >= oldest:
+            return
+        self.history_request += 1
+        bins = max(1, int(self.plotWidget.getViewBox().width()))
+        loader = HistoryLoader(self.history_request, start, min(end, oldest), bins,
+                               self.data_fetcher.names)
+        loader.history_loaded.connect(self.show_history)
+        loader.finished.connect(lambda: self.history_loaders.remove(loader))
+        self.history_loaders.append(loader)
+        loader.start()
+
+    def show_history(self, request, times, values):
+        """
+        Displays the history loaded from the logs, unless a newer request was made since.
+
+        Args:
+            request (int): The number of the request.
+            times (numpy.ndarray): The times of the history.
+            values (numpy.ndarray): The values of the history, one row per channel.
+
+        Returns:
+            None
+        """
+        if request != self.history_request:
+            return
+        for i, curve in enumerate(self.history_curves):
+            if i < len(values):
+                curve.setData(times, values[i], connect='finite')
+            else:
+                curve.setData([], [])
+
+    def export_window(self, file_path, kind, columns, start, end):
+        """
+        Exports the values of channels between two times on a background thread.
+
+        The values still held in the plot buffers are copied (decimated at the decimated memory
+        level) and exported as they are, the older part of the window is read from the logs by
+        the worker. At the aggregated memory level the buffers hold the minimum and maximum of
+        each block rather than values, they are not exported and the whole window is read from
+        the logs, as are the aggregated points left in the buffers after leaving that level. The
+        slow channels are not kept at the sample rate, they are read from the logs.
+
+        Args:
+            file_path (str): The path of the exported file.
+            kind (str): The format of the file, 'csv' or 'binary'.
+            columns (list): The column names of the exported channels, e.g. 'Channel_A'.
+            start (float): The start of the window, as a POSIX timestamp.
+            end (float): The end of the window, as a POSIX timestamp.
+
+        Returns:
+            ExportWorker: The started worker, to follow its progress or cancel it.
+        """
+        rows = [self.data_rows[self.data_fetcher.names.index(name)] for name in columns]
+        logged = [name for name, row in zip(columns, rows) if row is None]
+        times = self.times[self.first:self.last]
+        first = max(int(np.searchsorted(times, start)),
+                    int(np.searchsorted(times, self.aggregated_time, 'right')))
+        last = int(np.searchsorted(times, end, 'right'))
+        memory = None
+        if self.aggregate:
+            log_action("The plot history is aggregated, the export is read from the logs only",
+                       'warning')
+        elif last > first:
+            values = np.full((len(columns), last - first), np.nan)
+            for position, row in enumerate(rows):
+                if row is not None:
+                    values[position] = self.data[row, self.first + first:self.first + last]
+            memory = (times[first:last].copy(), values)
+        worker = ExportWorker(file_path, kind, columns, start, end, memory, logged)
+        worker.finished.connect(lambda: self.exporters.remove(worker))
+        self.exporters.append(worker)
+        worker.start()
+        return worker
 
     def closeEvent(self, event):
         """
@@ -129,10 +1057,26 @@ class PicoPlotter(QtWidgets.QMainWindow):
         Args:
             event: The close event.
 
+        Returns:
+            None
+        """
+        self.stop()
+        event.accept()
+
+    def stop(self):
+        """
+        Stops the data fetching thread, which closes the device, and waits for the threads of the plot.
+
+        Also called when the application quits, the close event of an embedded window is not received.
+
         Returns:
             None
         """
         self.data_fetcher.stop()
         self.data_fetcher.wait()
-        event.accept()
+        for loader in list(self.history_loaders):
+            loader.wait()
+        for worker in list(self.exporters):
+            worker.cancel()
+            worker.wait()
 # © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
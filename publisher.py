@@ -0,0 +1,426 @@
+import collections
+import os
+import socket
+import struct
+import threading
+import time
+import numpy as np
+from logger import log_action
+
+# Frame layout, all little-endian:
+#   magic (4s), version (B), kind (B), channels (H), samples (I),
+#   sequence (Q), timestamp (d), interval (d), range_mv (I), max_adc (h), decimation (H)
+# followed by the payload. For data frames the payload is channels * samples int16 ADC counts,
+# channel-major. For info frames it is the comma separated channel names, UTF-8 encoded.
+#
+# `sequence` is the index of the first sample since the publisher started, counted by the
+# acquisition, so a subscriber detects lost samples, whether dropped by the acquisition or by
+# the publisher, when it differs from the previous sequence + samples * decimation.
+# `timestamp` is the time of the first sample (time.time()), `interval` the time between
+# two samples of the frame in seconds.
+MAGIC = b'AIMA'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHIQddIhH')
+KIND_DATA = 0
+KIND_INFO = 1
+# Sent once by the subscriber after connecting: magic (4s), policy (B)
+SUBSCRIBE = struct.Struct('<4sB')
+POLICY_DROP = 0
+POLICY_DECIMATE = 1
+MAX_DECIMATION = 64
+# The time the backlog of a subscriber must stay high before its sample rate is halved, and
+# the minimum time between two changes of its decimation, in seconds
+DECIMATION_WINDOW = 1.0
+
+
+def pack_header(kind, channels, samples, sequence=0, timestamp=0.0, interval=0.0,
+                range_mv=0, max_adc=0, decimation=1):
+    """
+    Packs a frame header.
+
+    Returns:
+        bytes: The HEADER.size bytes of the header.
+    """
+    return HEADER.pack(MAGIC, VERSION, kind, channels, samples, sequence, timestamp,
+                       interval, int(range_mv), max_adc, decimation)
+
+
+def unpack_header(data):
+    """
+    Unpacks a frame header.
+
+    Args:
+        data (bytes): The HEADER.size bytes of the header.
+
+    Returns:
+        dict: The header fields.
+
+    Raises:
+        ValueError: If the data is not an AIMA frame header of a supported version.
+    """
+    (magic, version, kind, channels, samples, sequence, timestamp,
+     interval, range_mv, max_adc, decimation) = HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not an AIMA frame header")
+    return {
+        'kind': kind,
+        'channels': channels,
+        'samples': samples,
+        'sequence': sequence,
+        'timestamp': timestamp,
+        'interval': interval,
+        'range_mv': range_mv,
+        'max_adc': max_adc,
+        'decimation': decimation,
+    }
+
+
+def parse_address(address):
+    """
+    Returns the socket family and address for a publisher address.
+
+    Args:
+        address (str): Either "host:port" for a TCP socket or a file path for a Unix socket.
+
+    Returns:
+        tuple: The socket family and the address to bind or connect to.
+
+    Raises:
+        OSError: If the address is a Unix socket path and the platform has no Unix sockets.
+    """
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit():
+        return socket.AF_INET, (host, int(port))
+    if not hasattr(socket, 'AF_UNIX'):
+        raise OSError("Unix sockets are not available on this platform: " + address)
+    return socket.AF_UNIX, address
+
+
+class SubscriberConnection:
+    """
+    The publisher side of one subscriber connection.
+
+    Blocks are queued without copy and sent by a dedicated thread, so a slow subscriber only
+    ever delays itself. When the queue is full the oldest block is dropped. With the
+    decimate policy, the connection also halves its sample rate when its backlog stays above
+    half of the queue for DECIMATION_WINDOW seconds, and doubles it again once it drains.
+
+    Attributes:
+        policy (int): POLICY_DROP or POLICY_DECIMATE.
+        decimation (int): The current decimation factor.
+        dropped (int): The number of blocks dropped for this subscriber.
+        sent (int): The number of frames sent to this subscriber.
+    """
+
+    def __init__(self, connection, publisher, queue_size):
+        self.connection = connection
+        self.publisher = publisher
+        self.queue = collections.deque(maxlen=queue_size)
+        self.condition = threading.Condition()
+        self.policy = POLICY_DROP
+        self.decimation = 1
+        self.backed_up = None
+        self.changed = 0.0
+        self.dropped = 0
+        self.sent = 0
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        """
+        Starts the sending thread.
+        """
+        self.thread.start()
+
+    def push(self, block):
+        """
+        Queues a block for this subscriber, dropping the oldest block if the queue is full.
+
+        Args:
+            block (tuple): The sequence, timestamp, interval and int16 data of the block.
+
+        Returns:
+            None
+        """
+        with self.condition:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append(block)
+            self.condition.notify()
+
+    def run(self):
+        """
+        Reads the subscription request, sends the channel names, then sends the queued blocks
+        until the subscriber disconnects or the publisher stops.
+        """
+        try:
+            self.connection.settimeout(1.0)
+            try:
+                request = self.receive(SUBSCRIBE.size)
+                magic, policy = SUBSCRIBE.unpack(request)
+                if magic == MAGIC and policy in (POLICY_DROP, POLICY_DECIMATE):
+                    self.policy = policy
+            except socket.timeout:
+                pass
+            self.connection.settimeout(None)
+            names = ','.join(self.publisher.channels).encode('utf-8')
+            self.connection.sendall(pack_header(
+                KIND_INFO, len(self.publisher.channels), len(names)) + names)
+            while self.running:
+                with self.condition:
+                    while self.running and not self.queue:
+                        self.condition.wait()
+                    blocks = list(self.queue)
+                    self.queue.clear()
+                if not self.running:
+                    break
+                self.adapt_decimation(len(blocks))
+                for block in self.merge(blocks):
+                    self.send(block)
+        except OSError:
+            pass
+        finally:
+            self.close()
+            self.publisher.remove(self)
+
+    def receive(self, size):
+        """
+        Receives exactly `size` bytes from the subscriber.
+        """
+        data = b''
+        while len(data) < size:
+            chunk = self.connection.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Subscriber disconnected")
+            data += chunk
+        return data
+
+    def adapt_decimation(self, backlog):
+        """
+        Adjusts the decimation factor to the number of blocks that waited in the queue.
+
+        The factor is doubled once the backlog has stayed above half of the queue for
+        DECIMATION_WINDOW seconds, and halved when the queue is drained, at most once per
+        DECIMATION_WINDOW seconds, so a single burst does not decimate the stream.
+
+        Args:
+            backlog (int): The number of blocks taken from the queue at once.
+
+        Returns:
+            None
+        """
+        if self.policy != POLICY_DECIMATE:
+            return
+        now = time.monotonic()
+        if backlog > self.queue.maxlen // 2:
+            if self.backed_up is None:
+                self.backed_up = now
+            elif now - self.backed_up >= DECIMATION_WINDOW and self.decimation < MAX_DECIMATION:
+                self.decimation *= 2
+                self.backed_up = now
+                self.changed = now
+            return
+        self.backed_up = None
+        if backlog <= 1 and self.decimation > 1 and now - self.changed >= DECIMATION_WINDOW:
+            self.decimation //= 2
+            self.changed = now
+
+    def merge(self, blocks):
+        """
+        Concatenates consecutive blocks so that a backlog is sent as few large frames.
+
+        Args:
+            blocks (list): The queued blocks, oldest first.
+
+        Returns:
+            list: The merged blocks.
+        """
+        runs = []
+        for block in blocks:
+            sequence, timestamp, interval, data = block
+            if runs:
+                last_sequence, _, _, last_data = runs[-1][-1]
+                if last_sequence + last_data.shape[1] == sequence:
+                    runs[-1].append(block)
+                    continue
+            runs.append([block])
+        return [run[0] if len(run) == 1 else
+                (run[0][0], run[0][1], run[0][2],
+                 np.concatenate([data for _, _, _, data in run], axis=1))
+                for run in runs]
+
+    def send(self, block):
+        """
+        Sends a block as one data frame, decimated by the current factor.
+        """
+        sequence, timestamp, interval, data = block
+        if self.decimation > 1:
+            data = data[:, ::self.decimation]
+        payload = np.ascontiguousarray(data, dtype='<i2')
+        self.connection.sendall(pack_header(
+            KIND_DATA, payload.shape[0], payload.shape[1], sequence, timestamp,
+            interval * self.decimation, self.publisher.range_mv, self.publisher.max_adc,
+            self.decimation))
+        self.connection.sendall(memoryview(payload).cast('B'))
+        self.sent += 1
+
+    def close(self):
+        """
+        Stops the sending thread and closes the connection.
+        """
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        try:
+            self.connection.close()
+        except OSError:
+            pass
+
+
+class Publisher:
+    """
+    Publishes the acquired blocks on a local socket for any number of subscribers.
+
+    Attributes:
+        address (str): "host:port" of the loopback TCP socket, or the path of a Unix socket.
+        channels (list): The names of the published channels.
+        range_mv (float): The full scale of the channels in millivolts.
+        max_adc (int): The ADC count corresponding to the full scale.
+        subscribers (list): The connected subscribers.
+    """
+
+    def __init__(self, address, channels, range_mv=0, max_adc=0, queue_size=256):
+        self.address = address
+        self.channels = channels
+        self.range_mv = range_mv
+        self.max_adc = max_adc
+        self.queue_size = queue_size
+        self.subscribers = []
+        self.subscribers_lock = threading.Lock()
+        self.sequence = 0
+        self.origin = 0
+        self.sample = 0
+        self.block_bytes = 0
+        self.running = False
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        """
+        Binds the socket and starts accepting subscribers in the background.
+
+        Raises:
+            OSError: If the socket cannot be created or bound.
+            OverflowError: If the port is out of range.
+        """
+        family, bind_address = parse_address(self.address)
+        if family != socket.AF_INET and os.path.exists(bind_address):
+            os.remove(bind_address)
+        self.server = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            if family == socket.AF_INET:
+                self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.server.bind(bind_address)
+            self.server.listen()
+        except (OSError, OverflowError):
+            self.server.close()
+            self.server = None
+            raise
+        self.running = True
+        self.thread = threading.Thread(target=self.accept_loop, daemon=True)
+        self.thread.start()
+        log_action("Live data publisher listening on " + self.address)
+
+    def accept_loop(self):
+        """
+        Accepts the subscribers until the publisher is stopped.
+        """
+        while self.running:
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                break
+            if connection.family == socket.AF_INET:
+                connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            subscriber = SubscriberConnection(connection, self, self.queue_size)
+            with self.subscribers_lock:
+                self.subscribers.append(subscriber)
+            subscriber.start()
+            log_action("Live data subscriber connected")
+
+    def publish(self, data, timestamp=None, interval=0.0, sample=None):
+        """
+        Publishes a block of samples to all the subscribers.
+
+        The block is copied once, only if there are subscribers, and the copy is shared
+        between them, so the caller can reuse its buffer right away.
+
+        Args:
+            data (numpy.ndarray): The int16 ADC counts, one row per channel.
+            timestamp (float): The time of the first sample (default: now).
+            interval (float): The time between two samples in seconds.
+            sample (int): The number of the first sample counted by the acquisition, so the
+                blocks it dropped leave a gap in the sequence (default: None, the block follows
+                the previous one).
+
+        Returns:
+            None
+        """
+        if sample is None:
+            sequence = self.sequence
+        else:
+            if sample < self.sample:
+                # The streaming restarted, its samples are counted from 0 again
+                self.origin = self.sequence
+            self.sample = sample + data.shape[1]
+            sequence = self.origin + sample
+        self.sequence = sequence + data.shape[1]
+        with self.subscribers_lock:
+            if not self.subscribers:
+                return
+            block = (sequence, time.time() if timestamp is None else timestamp,
+                     interval, data.copy())
+            self.block_bytes = data.nbytes
+            for subscriber in self.subscribers:
+                subscriber.push(block)
+
+    def memory_usage(self, level=0):
+        """
+        Returns the bytes held by the blocks queued for the subscribers.
+
+        The blocks are shared between the subscribers, so the longest queue is counted.
+
+        Args:
+            level (int): The degradation level of the memory budget, not used.
+
+        Returns:
+            int: The size of the queued blocks in bytes.
+        """
+        with self.subscribers_lock:
+            queued = max((len(subscriber.queue) for subscriber in self.subscribers), default=0)
+        return queued * self.block_bytes
+
+    def remove(self, subscriber):
+        """
+        Forgets a disconnected subscriber.
+        """
+        with self.subscribers_lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+                log_action("Live data subscriber disconnected, " +
+                           str(subscriber.dropped) + " blocks dropped")
+
+    def stop(self):
+        """
+        Disconnects all the subscribers and closes the socket, the blocks published afterwards
+        are dropped.
+        """
+        self.running = False
+        if self.server is not None:
+            self.server.close()
+        with self.subscribers_lock:
+            subscribers = list(self.subscribers)
+            self.subscribers.clear()
+        for subscriber in subscribers:
+            subscriber.close()
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
@@ -0,0 +1,192 @@
+import math
+import numpy as np
+
+# The acquired samples are reduced to one point per period (mean, minimum, maximum and number
+# of samples) for the channels of the slow rate class (temperatures, supplies) before they
+# reach the plot and the logs, and for the logged rows of all the channels, at the log interval.
+# The periods are aligned on the clock: a point covers the samples whose time t verifies
+# k * period <= t < (k + 1) * period, so the samples lost between two blocks only reduce the
+# count of their period. A period spans several blocks or a block holds several periods, the
+# samples of an unfinished period are carried to the next block.
+# The boundaries of the periods are computed in samples from the float times of the blocks, a
+# boundary within TOLERANCE samples of a sample is taken as falling on it, so the rounding of
+# the times does not move a sample to the neighbouring period.
+TOLERANCE = 0.01
+
+
+class Aggregator:
+    """
+    Reduces the samples of a set of channels to the mean, minimum, maximum and count of each period.
+
+    The results of a block are written in the slot of the block of the buffer pool, so they
+    stay valid until the block is refilled, like the filtered values of the block. Everything
+    is preallocated, nothing is allocated per block.
+
+    Attributes:
+        rows (list): The positions of the aggregated channels in the blocks.
+        period (float): The duration of a period in seconds.
+        times (numpy.ndarray): The start time of each period, per slot.
+        mean (numpy.ndarray): The mean of each channel and period, per slot.
+        minimum (numpy.ndarray): The minimum of each channel and period, per slot.
+        maximum (numpy.ndarray): The maximum of each channel and period, per slot.
+        samples (numpy.ndarray): The number of samples of each period, per slot.
+        counts (list): The number of periods completed by the block of each slot.
+    """
+
+    def __init__(self, rows, period, interval, block_size, depth):
+        """
+        Args:
+            rows (list): The positions of the aggregated channels in the blocks.
+            period (float): The duration of a period in seconds, at least `interval`.
+            interval (float): The time between two samples in seconds.
+            block_size (int): The number of samples per channel of a block.
+            depth (int): The number of blocks of the buffer pool.
+        """
+        self.rows = list(rows)
+        self.period = max(period, interval)
+        points = int(block_size * interval / self.period) + 4
+        channels = len(self.rows)
+        self.times = np.zeros((depth, points))
+        self.mean = np.zeros((depth, channels, points))
+        self.minimum = np.zeros((depth, channels, points))
+        self.maximum = np.zeros((depth, channels, points))
+        self.samples = np.zeros((depth, points), dtype=np.int64)
+        self.counts = [0] * depth
+        self.values = np.empty((channels, block_size))
+        # The segments of a block, one per period it overlaps
+        self.steps = np.arange(points, dtype=float)
+        self.edges = np.zeros(points)
+        self.starts = np.zeros(points, dtype=np.intp)
+        self.sums = np.zeros((channels, points))
+        self.lows = np.zeros((channels, points))
+        self.highs = np.zeros((channels, points))
+        self.lengths = np.zeros(points, dtype=np.int64)
+        # The unfinished period carried to the next block, `carried` samples of period `carry`
+        self.carry = 0
+        self.carried = 0
+        self.carry_sum = np.zeros(channels)
+        self.carry_low = np.zeros(channels)
+        self.carry_high = np.zeros(channels)
+
+    def process(self, values, timestamp, interval, slot):
+        """
+        Adds the samples of a block and stores the periods it completes in its slot.
+
+        Args:
+            values (numpy.ndarray): The values of the block, one row per channel of the block.
+            timestamp (float): The time of the first sample of the block.
+            interval (float): The time between two samples in seconds.
+            slot (int): The number of the block in the buffer pool.
+
+        Returns:
+            int: The number of periods completed, also kept in `counts`.
+        """
+        count = values.shape[1]
+        values = np.take(values, self.rows, axis=0, out=self.values[:, :count])
+        first = math.floor(timestamp / self.period)
+        last = math.floor((timestamp + (count - 1) * interval) / self.period)
+        # The first sample of each period after the first one, with a period more on both
+        # sides for the rounding of the times, the periods without sample being dropped
+        candidates = min(last - first + 3, self.starts.size)
+        edges = self.edges[:candidates - 1]
+        np.add(self.steps[:candidates - 1], first, out=edges)
+        edges *= self.period
+        edges -= timestamp
+        edges /= interval
+        edges -= TOLERANCE
+        np.ceil(edges, out=edges)
+        skip = int(np.searchsorted(edges, 0, 'right'))
+        stop = int(np.searchsorted(edges, count, 'left'))
+        first += skip - 1
+        if self.carried and first < self.carry:
+            # The time of the block jittered back before the carried period: its samples up
+            # to the end of the carried period are added to it, no period is emitted twice
+            skip = min(skip + self.carry - first, stop)
+            first = self.carry
+        segments = stop - skip + 1
+        starts = self.starts[:segments]
+        starts[0] = 0
+        starts[1:] = edges[skip:stop]
+        sums = self.sums[:, :segments]
+        lows = self.lows[:, :segments]
+        highs = self.highs[:, :segments]
+        lengths = self.lengths[:segments]
+        np.add.reduceat(values, starts, axis=1, out=sums)
+        np.minimum.reduceat(values, starts, axis=1, out=lows)
+        np.maximum.reduceat(values, starts, axis=1, out=highs)
+        np.subtract(starts[1:], starts[:-1], out=lengths[:-1])
+        lengths[-1] = count - starts[-1]
+        # The offset of the period of each segment from `first`
+        periods = self.steps
+        if segments > 2 and lengths.min() == 0:
+            # Boundaries rounded onto the same sample, the segments left without sample are
+            # dropped (rare, so allocating here is acceptable)
+            keep = np.flatnonzero(lengths)
+            segments = keep.size
+            periods = keep.astype(float)
+            sums[:, :segments] = sums[:, keep]
+            lows[:, :segments] = lows[:, keep]
+            highs[:, :segments] = highs[:, keep]
+            lengths[:segments] = lengths[keep]
+            sums = sums[:, :segments]
+            lows = lows[:, :segments]
+            highs = highs[:, :segments]
+            lengths = lengths[:segments]
+        points = 0
+        if self.carried:
+            if self.carry == first:
+                # The block continues the carried period
+                sums[:, 0] += self.carry_sum
+                np.minimum(lows[:, 0], self.carry_low, out=lows[:, 0])
+                np.maximum(highs[:, 0], self.carry_high, out=highs[:, 0])
+                lengths[0] += self.carried
+            else:
+                self.times[slot, 0] = self.carry * self.period
+                np.divide(self.carry_sum, self.carried, out=self.mean[slot, :, 0])
+                self.minimum[slot, :, 0] = self.carry_low
+                self.maximum[slot, :, 0] = self.carry_high
+                self.samples[slot, 0] = self.carried
+                points = 1
+        complete = segments - 1
+        if complete:
+            end = points + complete
+            times = self.times[slot, points:end]
+            np.add(periods[:complete], first, out=times)
+            times *= self.period
+            np.divide(sums[:, :complete], lengths[:complete], out=self.mean[slot, :, points:end])
+            self.minimum[slot, :, points:end] = lows[:, :complete]
+            self.maximum[slot, :, points:end] = highs[:, :complete]
+            self.samples[slot, points:end] = lengths[:complete]
+            points = end
+        self.carry = first + int(periods[segments - 1])
+        self.carried = int(lengths[-1])
+        self.carry_sum[:] = sums[:, -1]
+        self.carry_low[:] = lows[:, -1]
+        self.carry_high[:] = highs[:, -1]
+        self.counts[slot] = points
+        return points
+
+    def results(self, slot):
+        """
+        Returns the periods completed by the block of a slot.
+
+        Args:
+            slot (int): The number of the block in the buffer pool.
+
+        Returns:
+            tuple: The start times, the means, the minimums and the maximums (one row per
+            channel) and the numbers of samples of the periods.
+        """
+        points = self.counts[slot]
+        return (self.times[slot, :points], self.mean[slot, :, :points],
+                self.minimum[slot, :, :points], self.maximum[slot, :, :points],
+                self.samples[slot, :points])
+
+    def memory_usage(self):
+        """
+        Returns the bytes held by the buffers of the aggregator.
+        """
+        return (self.times.nbytes + self.mean.nbytes + self.minimum.nbytes +
+                self.maximum.nbytes + self.samples.nbytes + self.values.nbytes +
+                self.sums.nbytes + self.lows.nbytes + self.highs.nbytes)
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
@@ -0,0 +1,319 @@
+import datetime
+import os
+import queue
+import struct
+import threading
+import numpy as np
+from logger import log_action, create_folder
+
+# Snapshot file layout, all little-endian:
+#   magic (4s), version (B), channels (B), samples (I), trigger (I), timestamp (d),
+#   interval (d), range_mv (I), max_adc (h), reason length (H)
+# followed by the reason (UTF-8), the comma separated channel names (UTF-8, preceded by their
+# length as H) and channels * samples int16 ADC counts, channel-major.
+#
+# `trigger` is the index of the sample the event occurred at, `timestamp` the time of the first
+# sample (time.time()) and `interval` the time between two samples in seconds. A count converts
+# to count * range_mv / max_adc millivolts.
+MAGIC = b'AIMS'
+VERSION = 1
+HEADER = struct.Struct('<4sBBIIddIhH')
+NAMES = struct.Struct('<H')
+
+
+def write_snapshot(file_path, data, trigger, timestamp, interval, range_mv, max_adc, reason,
+                   channels):
+    """
+    Writes a snapshot file.
+
+    The file is written under a temporary name and renamed once complete.
+
+    Args:
+        file_path (str): The path of the snapshot file.
+        data (numpy.ndarray): The int16 ADC counts, one row per channel.
+        trigger (int): The index of the sample of the event.
+        timestamp (float): The time of the first sample, as a POSIX timestamp.
+        interval (float): The time between two samples in seconds.
+        range_mv (int): The full scale of the channel range in millivolts.
+        max_adc (int): The maximum ADC count.
+        reason (str): The cause of the snapshot.
+        channels (list): The names of the channels.
+
+    Returns:
+        str: The path of the snapshot file.
+    """
+    reason = reason.encode('utf-8')
+    names = ','.join(channels).encode('utf-8')
+    temporary_path = file_path + '.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, data.shape[0], data.shape[1], trigger, timestamp,
+                               interval, int(range_mv), max_adc, len(reason)))
+        file.write(reason)
+        file.write(NAMES.pack(len(names)))
+        file.write(names)
+        file.write(np.ascontiguousarray(data, dtype='<i2').tobytes())
+    os.replace(temporary_path, file_path)
+    return file_path
+
+
+def read_snapshot(file_path):
+    """
+    Reads a snapshot file.
+
+    Args:
+        file_path (str): The path of the snapshot file.
+
+    Returns:
+        dict: The header fields 'trigger', 'timestamp', 'interval', 'range_mv', 'max_adc',
+        'reason' and 'channels', and 'data', the int16 ADC counts, one row per channel.
+
+    Raises:
+        ValueError: If the file is not a snapshot.
+    """
+    with open(file_path, 'rb') as file:
+        header = file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(file_path + ": truncated header")
+        (magic, version, channels, samples, trigger, timestamp, interval, range_mv, max_adc,
+         reason_length) = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(file_path + ": not a snapshot file")
+        reason = file.read(reason_length).decode('utf-8')
+        names_length, = NAMES.unpack(file.read(NAMES.size))
+        names = file.read(names_length).decode('utf-8').split(',')
+        data = np.fromfile(file, dtype='<i2', count=channels * samples)
+    if data.size != channels * samples:
+        raise ValueError(file_path + ": truncated data")
+    return {
+        'trigger': trigger,
+        'timestamp': timestamp,
+        'interval': interval,
+        'range_mv': range_mv,
+        'max_adc': max_adc,
+        'reason': reason,
+        'channels': names,
+        'data': data.reshape(channels, samples),
+    }
+
+
+class FlightRecorder:
+    """
+    Keeps the last seconds of raw samples and saves the window around an event to disk.
+
+    Every acquired block is copied into a ring buffer holding `pre_seconds` + `post_seconds`
+    of samples and one block. When an event occurs (trigger() called from any thread or the
+    level trigger crossed), the recorder waits for `post_seconds` of samples, copies the
+    window out of the ring and hands it to a background thread that writes it to a snapshot
+    file in the day folder, so the acquisition never waits for the disk. Events occurring
+    while a window is being captured are ignored.
+
+    Attributes:
+        channels (list): The names of the channels.
+        enabled (bool): A flag indicating if the samples are recorded.
+        pre_seconds (float): The duration kept before the event in seconds.
+        post_seconds (float): The duration kept after the event in seconds.
+        level_channel (int): The position of the channel of the level trigger, None for none.
+        level_mv (float): The level of the trigger in millivolts, crossed upwards.
+        snapshots (int): The number of snapshots written.
+        last_snapshot (str): The path of the last snapshot written, None if none.
+    """
+
+    def __init__(self, channels, pre_seconds=5.0, post_seconds=1.0):
+        self.channels = channels
+        self.enabled = False
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.level_channel = None
+        self.level_mv = 0.0
+        self.snapshots = 0
+        self.last_snapshot = None
+        self.lock = threading.Lock()
+        self.requested = None
+        self.configured = False
+        self.ring = None
+        self.interval = 0.0
+        self.range_mv = 0
+        self.max_adc = 1
+        self.written = 0
+        self.event = None
+        self.writer_queue = queue.Queue()
+        self.writer_thread = None
+
+    def configure(self, enabled=None, pre_seconds=None, post_seconds=None, level_channel=-1,
+                  level_mv=None):
+        """
+        Changes the settings of the recorder, applied from the next block on.
+
+        Changing the durations empties the ring buffer.
+
+        Args:
+            enabled (bool): True to record the samples (default: unchanged).
+            pre_seconds (float): The duration kept before an event (default: unchanged).
+            post_seconds (float): The duration kept after an event (default: unchanged).
+            level_channel (int): The position of the channel of the level trigger, None to turn
+                the level trigger off (default: unchanged).
+            level_mv (float): The level of the trigger in millivolts (default: unchanged).
+
+        Returns:
+            None
+        """
+        with self.lock:
+            if enabled is not None:
+                self.enabled = enabled
+            if pre_seconds is not None:
+                self.pre_seconds = pre_seconds
+            if post_seconds is not None:
+                self.post_seconds = post_seconds
+            if level_channel != -1:
+                self.level_channel = level_channel
+            if level_mv is not None:
+                self.level_mv = level_mv
+            self.configured = False
+
+    def memory_usage(self, level=0):
+        """
+        Returns the bytes held by the ring buffer.
+
+        The ring is sized by the durations set by the user and is not reduced by the
+        degradation levels of the memory budget.
+        """
+        return 0 if self.ring is None else self.ring.nbytes
+
+    def trigger(self, reason):
+        """
+        Requests a snapshot around the latest acquired sample. Can be called from any thread.
+
+        Args:
+            reason (str): The cause of the snapshot, saved in the file.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            if self.requested is None:
+                self.requested = reason
+
+    def start(self, interval, block_size, range_mv, max_adc):
+        """
+        Sets the parameters of the streaming, called once it is started.
+
+        Args:
+            interval (float): The time between two samples in seconds.
+            block_size (int): The number of samples per channel of a block.
+            range_mv (int): The full scale of the channel range in millivolts.
+            max_adc (int): The maximum ADC count.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.interval = interval
+            self.block_size = block_size
+            self.range_mv = range_mv
+            self.max_adc = max_adc
+            self.configured = False
+
+    def setup(self):
+        """
+        Allocates the ring buffer and the trigger scratch buffers for the current settings.
+        """
+        self.pre_samples = int(round(self.pre_seconds / self.interval))
+        self.post_samples = int(round(self.post_seconds / self.interval))
+        capacity = self.pre_samples + self.post_samples + self.block_size
+        if self.ring is None or self.ring.shape[1] != capacity:
+            self.ring = np.zeros((len(self.channels), capacity), dtype=np.int16)
+            self.written = 0
+        # A signal already above the level when the recorder starts is not an event
+        self.above = np.ones(self.block_size + 1, dtype=bool)
+        self.edges = np.zeros(self.block_size, dtype=bool)
+        self.level_counts = int(np.ceil(self.level_mv * self.max_adc / self.range_mv))
+        self.event = None
+        self.configured = True
+
+    def add(self, raw, timestamp):
+        """
+        Records an acquired block and captures the window of a pending event.
+
+        Called by the acquisition thread for every block.
+
+        Args:
+            raw (numpy.ndarray): The int16 ADC counts of the block, one row per channel.
+            timestamp (float): The time of the first sample of the block.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            if not self.enabled or not self.interval:
+                return
+            if not self.configured:
+                self.setup()
+            requested, self.requested = self.requested, None
+        count = raw.shape[1]
+        position = self.written % self.ring.shape[1]
+        head = min(count, self.ring.shape[1] - position)
+        self.ring[:, position:position + head] = raw[:, :head]
+        self.ring[:, :count - head] = raw[:, head:]
+        block_start = self.written
+        self.written += count
+        if self.level_channel is not None and self.level_channel < len(self.channels):
+            np.greater_equal(raw[self.level_channel], self.level_counts, out=self.above[1:])
+            np.greater(self.above[1:], self.above[:-1], out=self.edges)
+            if self.event is None and self.edges.any():
+                index = block_start + int(self.edges.argmax())
+                self.event = (index, "level " + self.channels[self.level_channel])
+            self.above[0] = self.above[-1]
+        if self.event is None and requested is not None:
+            self.event = (self.written - 1, requested)
+        if self.event is not None and self.written >= self.event[0] + self.post_samples:
+            self.capture(block_start, timestamp)
+
+    def capture(self, block_start, timestamp):
+        """
+        Copies the window of the pending event out of the ring and queues it for writing.
+
+        Args:
+            block_start (int): The number of the first sample of the last block.
+            timestamp (float): The time of the first sample of the last block.
+
+        Returns:
+            None
+        """
+        index, reason = self.event
+        self.event = None
+        start = max(index - self.pre_samples, self.written - self.ring.shape[1], 0)
+        end = min(index + self.post_samples, self.written)
+        # The window is at most two contiguous slices of the ring, copied as they are
+        capacity = self.ring.shape[1]
+        position = start % capacity
+        head = min(end - start, capacity - position)
+        data = np.empty((self.ring.shape[0], end - start), dtype=self.ring.dtype)
+        data[:, :head] = self.ring[:, position:position + head]
+        data[:, head:] = self.ring[:, :end - start - head]
+        first_time = timestamp - (block_start - start) * self.interval
+        self.writer_queue.put((data, index - start, first_time, self.interval, self.range_mv,
+                               self.max_adc, reason))
+        if self.writer_thread is None:
+            self.writer_thread = threading.Thread(target=self.write_snapshots, daemon=True)
+            self.writer_thread.start()
+
+    def write_snapshots(self):
+        """
+        Writes the queued snapshots to the day folder.
+        """
+        while True:
+            data, trigger, first_time, interval, range_mv, max_adc, reason = \
+                self.writer_queue.get()
+            name = "snapshot_" + datetime.datetime.fromtimestamp(
+                first_time + trigger * interval).strftime("%H-%M-%S-%f") + ".bin"
+            try:
+                file_path = write_snapshot(os.path.join(create_folder(), name), data, trigger,
+                                           first_time, interval, range_mv, max_adc, reason,
+                                           self.channels)
+            except OSError as e:
+                log_action("Error writing the snapshot " + name + ": " + str(e), 'error')
+                continue
+            self.snapshots += 1
+            self.last_snapshot = file_path
+            log_action("Snapshot saved to " + file_path + " (" + reason + ")")
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
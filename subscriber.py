@@ -0,0 +1,137 @@
+import socket
+import numpy as np
+from publisher import (HEADER, SUBSCRIBE, MAGIC, KIND_DATA, KIND_INFO,
+                       POLICY_DROP, POLICY_DECIMATE, unpack_header, parse_address)
+
+
+class Subscriber:
+    """
+    Client of the live data publisher of the test bench.
+
+    Example:
+        with Subscriber("127.0.0.1:50000") as subscriber:
+            for header, data in subscriber:
+                millivolts = subscriber.to_millivolts(header, data)
+
+    Attributes:
+        address (str): "host:port" of the publisher, or the path of its Unix socket.
+        channels (list): The names of the published channels, known once connected.
+        lost_samples (int): The number of samples missed since the connection, either
+            dropped by the publisher or removed by decimation.
+    """
+
+    def __init__(self, address, decimate=False):
+        """
+        Initialize the Subscriber.
+
+        Args:
+            address (str): "host:port" of the publisher, or the path of its Unix socket.
+            decimate (bool): If True, the publisher lowers the sample rate when this
+                subscriber falls behind instead of dropping whole blocks.
+        """
+        self.address = address
+        self.decimate = decimate
+        self.channels = []
+        self.lost_samples = 0
+        self.next_sequence = None
+        self.connection = None
+
+    def connect(self):
+        """
+        Connects to the publisher and reads the channel names.
+        """
+        family, address = parse_address(self.address)
+        self.connection = socket.socket(family, socket.SOCK_STREAM)
+        self.connection.connect(address)
+        self.connection.sendall(SUBSCRIBE.pack(
+            MAGIC, POLICY_DECIMATE if self.decimate else POLICY_DROP))
+        header = unpack_header(self.receive(HEADER.size))
+        if header['kind'] != KIND_INFO:
+            raise ValueError("Expected the channel names from the publisher")
+        self.channels = self.receive(header['samples']).decode('utf-8').split(',')
+
+    def read_block(self):
+        """
+        Waits for the next block of samples.
+
+        Returns:
+            tuple: The header (dict) and the int16 ADC counts (numpy.ndarray), one row per channel.
+        """
+        while True:
+            header = unpack_header(self.receive(HEADER.size))
+            if header['kind'] != KIND_DATA:
+                self.receive(header['samples'])
+                continue
+            payload = self.receive(header['channels'] * header['samples'] * 2)
+            if self.next_sequence is not None:
+                self.lost_samples += header['sequence'] - self.next_sequence
+            self.lost_samples += header['samples'] * (header['decimation'] - 1)
+            self.next_sequence = header['sequence'] + \
+                header['samples'] * header['decimation']
+            data = np.frombuffer(payload, dtype='<i2').reshape(
+                header['channels'], header['samples'])
+            return header, data
+
+    def receive(self, size):
+        """
+        Receives exactly `size` bytes from the publisher.
+        """
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        received = 0
+        while received < size:
+            count = self.connection.recv_into(view[received:])
+            if count == 0:
+                raise ConnectionError("Publisher disconnected")
+            received += count
+        return buffer
+
+    @staticmethod
+    def to_millivolts(header, data):
+        """
+        Converts ADC counts to millivolts.
+
+        Args:
+            header (dict): The header of the block.
+            data (numpy.ndarray): The ADC counts of the block.
+
+        Returns:
+            numpy.ndarray: The voltages in millivolts.
+        """
+        return data * (header['range_mv'] / header['max_adc'])
+
+    @staticmethod
+    def timestamps(header):
+        """
+        Returns the time of each sample of a block.
+
+        Args:
+            header (dict): The header of the block.
+
+        Returns:
+            numpy.ndarray: The times in seconds since the epoch.
+        """
+        return header['timestamp'] + np.arange(header['samples']) * header['interval']
+
+    def close(self):
+        """
+        Closes the connection.
+        """
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.read_block()
+            except ConnectionError:
+                return
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
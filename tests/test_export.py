@@ -0,0 +1,85 @@
+import csv
+import datetime
+import os
+import numpy as np
+import pytest
+import export
+import logger
+
+# Noon of today, the logs are written in the folder of today
+START = datetime.datetime.combine(datetime.date.today(), datetime.time(12)).timestamp()
+
+
+@pytest.fixture
+def logs(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger, 'path', str(tmp_path / 'logs') + os.sep)
+    times = START + np.arange(10.0)
+    values = np.vstack((np.arange(10.0), -np.arange(10.0)))
+    logger.log_aggregates(times, values, values - 1, values + 1, np.full(10, 4),
+                          ['Channel_A', 'Channel_B'])
+    slow = 100 + np.arange(10.0)[np.newaxis]
+    logger.log_aggregates(times + 0.5, slow, slow, slow, np.full(10, 4), ['Channel_C'],
+                          slow=True)
+    logger.close_values_log()
+    return tmp_path
+
+
+def read_back(file_path, kind):
+    """
+    Reads an exported file.
+
+    Returns:
+        tuple: The names, the times and the values of the channels, one row per channel.
+    """
+    if kind == 'binary':
+        return export.read_binary(file_path)
+    with open(file_path, newline='') as file:
+        rows = list(csv.reader(file))
+    values = np.array([[float(value) for value in row[1:]] for row in rows[1:]]).T
+    return rows[0][1:], np.array([logger.parse_time(row[0]) for row in rows[1:]]), values
+
+
+@pytest.mark.parametrize('kind', ['csv', 'binary'])
+def test_round_trip(logs, kind):
+    memory_times = START + 10 + 0.25 * np.arange(8)
+    memory = (memory_times, np.vstack((1000 + np.arange(8.0), np.full(8, 0.1))))
+    file_path = str(logs / ('export.' + kind))
+    fractions = []
+    rows = export.export_window(file_path, kind, ['Channel_A', 'Channel_B'], START + 2,
+                                START + 20, memory, fractions.append)
+    assert rows == 16
+    names, times, values = read_back(file_path, kind)
+    assert names == ['Channel_A', 'Channel_B']
+    np.testing.assert_array_equal(times, np.concatenate((START + np.arange(2.0, 10.0),
+                                                         memory_times)))
+    np.testing.assert_array_equal(values[0], np.concatenate((np.arange(2.0, 10.0),
+                                                             1000 + np.arange(8.0))))
+    np.testing.assert_array_equal(values[1], np.concatenate((-np.arange(2.0, 10.0),
+                                                             np.full(8, 0.1))))
+    assert fractions[-1] == 1.0
+    assert not os.path.exists(file_path + '.part')
+
+
+@pytest.mark.parametrize('kind', ['csv', 'binary'])
+def test_slow_channels_merged(logs, kind):
+    memory_times = START + 8 + 0.5 * np.arange(4)
+    memory = (memory_times, np.vstack((np.arange(4.0), np.full(4, np.nan))))
+    file_path = str(logs / ('export.' + kind))
+    export.export_window(file_path, kind, ['Channel_A', 'Channel_C'], START + 6, START + 10,
+                         memory, logged=['Channel_C'])
+    _, times, values = read_back(file_path, kind)
+    # The logged rows of Channel_A before the memory, then the memory, Channel_C merged
+    assert np.all(np.diff(times) >= 0)
+    np.testing.assert_array_equal(times[~np.isnan(values[1])], START + np.arange(6.5, 10.0))
+    np.testing.assert_array_equal(values[1][~np.isnan(values[1])], 100 + np.arange(6.0, 10.0))
+    np.testing.assert_array_equal(values[0][~np.isnan(values[0])],
+                                  [6.0, 7.0, 0.0, 1.0, 2.0, 3.0])
+
+
+def test_cancelled_export_leaves_no_file(logs):
+    file_path = str(logs / 'export.csv')
+    assert export.export_window(file_path, 'csv', ['Channel_A'], START, START + 20,
+                                cancelled=lambda: True) is None
+    assert not os.path.exists(file_path)
+    assert not os.path.exists(file_path + '.part')
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
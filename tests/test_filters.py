@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from filters import FIR, MovingAverage, parse_chain
+
+INTERVAL = 0.00025
+
+
+def direct(spec, samples):
+    """
+    Filters the samples one by one with the recursion of each filter of a chain, the first
+    sample being taken as the past of the signal.
+    """
+    out = samples.copy()
+    for item in parse_chain(spec).filters:
+        # The coefficients of the low-pass filters depend on the sample rate
+        item.setup(samples.size, INTERVAL)
+        values = out.copy()
+        past = values[0]
+        if isinstance(item, MovingAverage):
+            padded = np.concatenate((np.full(item.length - 1, past), values))
+            out = np.array([padded[n:n + item.length].mean() for n in range(values.size)])
+        elif isinstance(item, FIR):
+            taps = item.coefficients.size
+            padded = np.concatenate((np.full(taps - 1, past), values))
+            out = np.array([sum(item.coefficients[k] * padded[n + taps - 1 - k]
+                                for k in range(taps)) for n in range(values.size)])
+        else:
+            (b0, b1, b2), (a1, a2) = item.b, item.a
+            previous = before = past * (b0 + b1 + b2) / (1 + a1 + a2)
+            x1 = x2 = past
+            for n, x in enumerate(values):
+                y = b0 * x + b1 * x1 + b2 * x2 - a1 * previous - a2 * before
+                out[n] = y
+                x1, x2 = x, x1
+                previous, before = y, previous
+    return out
+
+
+def blockwise(spec, samples, block_size):
+    """
+    Filters the samples block by block with a filter chain.
+    """
+    chain = parse_chain(spec)
+    out = samples.copy()
+    for start in range(0, samples.size, block_size):
+        chain.process(out[start:start + block_size], INTERVAL)
+    return out
+
+
+@pytest.mark.parametrize('spec', ['average(16)', 'fir(0.25, 0.5, 0.25)',
+                                  'biquad(0.2, 0.3, 0.1, -0.5, 0.1)', 'lowpass(50)',
+                                  'lowpass(200, 2)', 'dc(0.995)', 'dc(0.99); average(8)'])
+@pytest.mark.parametrize('block_size', [250, 1000])
+def test_blocks_match_recursion(spec, block_size):
+    samples = 100 + np.random.default_rng(0).normal(size=4 * block_size)
+    np.testing.assert_allclose(blockwise(spec, samples, block_size), direct(spec, samples),
+                               rtol=1e-9, atol=1e-9)
+
+
+def test_constant_signal_has_no_transient():
+    samples = np.full(500, 3.0)
+    np.testing.assert_allclose(blockwise('lowpass(50); average(4)', samples, 250), samples)
+
+
+@pytest.mark.parametrize('spec', ['median(3)', 'average(0)', 'biquad(1, 2)', 'fir(1, 2',
+                                  'lowpass(-1)', 'dc(1.5)'])
+def test_invalid_chains(spec):
+    with pytest.raises(ValueError):
+        parse_chain(spec)
+
+
+def test_empty_chain():
+    assert parse_chain(' ; ') is None
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from mathchannels import Expression, MathChannels
+
+CHANNELS = ['A', 'B', 'C']
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('A - B', lambda a, b, c: a - b),
+    ('(A - B) / 0.1', lambda a, b, c: (a - b) / 0.1),
+    ('abs(A) * 2.5', lambda a, b, c: np.abs(a) * 2.5),
+    ('-C + sqrt(abs(B))', lambda a, b, c: -c + np.sqrt(np.abs(b))),
+    ('A * B * C + 2 * 3', lambda a, b, c: a * b * c + 6),
+    ('B', lambda a, b, c: b),
+])
+def test_evaluate(text, expected):
+    values = np.random.default_rng(0).normal(size=(3, 100))
+    out = np.empty(100)
+    Expression(text, CHANNELS).evaluate(values, out)
+    np.testing.assert_allclose(out, expected(*values))
+
+
+def test_constants_are_folded():
+    expression = Expression('A * (2 + 3)', CHANNELS)
+    assert len(expression.program) == 1
+    assert expression.program[0][1][1] == ('constant', 5.0)
+
+
+@pytest.mark.parametrize('text', ['A +', 'D - A', 'A ** 2', 'max(A)', 'abs(A, B)', '"A"',
+                                  '__import__("os")'])
+def test_invalid_expressions(text):
+    with pytest.raises(ValueError):
+        Expression(text, CHANNELS)
+
+
+def test_values_cached_per_block():
+    math = MathChannels(CHANNELS, 2, 4)
+    math.set('M1', 'A + B')
+    values = np.ones((3, 4))
+    np.testing.assert_array_equal(math.values('M1', 0, values), 2.0)
+    # Kept until the block is refilled
+    np.testing.assert_array_equal(math.values('M1', 0, values * 2), 2.0)
+    math.invalidate(0)
+    np.testing.assert_array_equal(math.values('M1', 0, values * 2), 4.0)
+    assert math.set('M1', ' ') is None
+    assert math.values('M1', 0, values) is None
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
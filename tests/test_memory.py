@@ -0,0 +1,44 @@
+import pytest
+import memory
+from memory import MemoryBudget
+
+# Bytes held by a consumer at each degradation level
+PLOT = [1000, 400, 200, 100]
+QUEUE = [300, 300, 300, 300]
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    monkeypatch.setattr(memory, 'log_action', lambda *args: None)
+    budget = MemoryBudget()
+    budget.register("plot", lambda level: PLOT[level])
+    budget.register("queue", lambda level: QUEUE[level])
+    return budget
+
+
+@pytest.mark.parametrize('limit, level', [(0, 0), (5000, 0), (1300, 0), (1299, 1), (700, 1),
+                                          (600, 2), (450, 3), (10, 3)])
+def test_lowest_level_that_fits(budget, limit, level):
+    budget.set_budget(limit)
+    total = budget.check()
+    assert budget.level == level
+    assert total == PLOT[level] + QUEUE[level]
+
+
+def test_level_follows_budget(budget):
+    levels = []
+    budget.add_listener(levels.append)
+    for limit in (600, 600, 1000, 0):
+        budget.set_budget(limit)
+        budget.check()
+    assert levels == [2, 1, 0]
+    assert budget.usage() == {"plot": 1000, "queue": 300}
+
+
+def test_stops_when_next_level_frees_nothing(monkeypatch):
+    monkeypatch.setattr(memory, 'log_action', lambda *args: None)
+    budget = MemoryBudget(100)
+    budget.register("plot", lambda level: [1000, 500, 500, 400][level])
+    assert budget.check() == 500
+    assert budget.level == 1
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
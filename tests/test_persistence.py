@@ -0,0 +1,62 @@
+import math
+import numpy as np
+import pytest
+from persistence import Persistence
+
+INTERVAL = 0.00025
+BLOCK_SIZE = 250
+
+
+def reference(blocks, width, height, window, low, high, time_constant):
+    """
+    Counts the samples of the blocks one by one in an image decayed before each block.
+    """
+    samples = round(window / INTERVAL)
+    columns = min(width, samples)
+    image = np.zeros((columns, height))
+    decay = math.exp(-BLOCK_SIZE * INTERVAL / time_constant)
+    position = 0
+    for block in blocks:
+        counts = np.zeros_like(image)
+        for value in block:
+            row = min(max(int((value - low) * height / (high - low)), 0), height - 1)
+            counts[position % samples * columns // samples, row] += 1
+            position += 1
+        image = image * decay + counts
+    return image
+
+
+@pytest.mark.parametrize('window', [0.05, 0.1, 0.001, 0.0173])
+def test_counts_match_reference(window):
+    blocks = 1500 * np.random.default_rng(0).normal(size=(8, BLOCK_SIZE))
+    persistence = Persistence(width=256, height=64, window=window, low=-2000, high=2000,
+                              time_constant=0.5)
+    for block in blocks:
+        persistence.add(block, INTERVAL)
+    np.testing.assert_allclose(persistence.image,
+                               reference(blocks, 256, 64, window, -2000, 2000, 0.5))
+
+
+def test_every_column_filled():
+    persistence = Persistence(width=256, height=16, window=0.001)
+    persistence.add(np.zeros(BLOCK_SIZE), INTERVAL)
+    assert persistence.image.shape == (4, 16)
+    assert (persistence.image.sum(axis=1) > 0).all()
+
+
+def test_decay_converges():
+    persistence = Persistence(width=256, height=16, window=0.05, time_constant=0.1)
+    for _ in range(200):
+        persistence.add(np.zeros(BLOCK_SIZE), INTERVAL)
+    decay = math.exp(-BLOCK_SIZE * INTERVAL / 0.1)
+    # Each block adds its samples to the decayed counts of the previous ones
+    np.testing.assert_allclose(persistence.image.sum(), BLOCK_SIZE / (1 - decay), rtol=1e-6)
+
+
+def test_configure_clears():
+    persistence = Persistence()
+    persistence.add(np.zeros(BLOCK_SIZE), INTERVAL)
+    persistence.configure(low=-500, high=500)
+    assert not persistence.image.any()
+    assert persistence.changed
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
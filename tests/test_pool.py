@@ -0,0 +1,45 @@
+import tracemalloc
+import numpy as np
+import pytest
+
+pico = pytest.importorskip('picoS2000aRealtimeStreaming', exc_type=ImportError)
+
+BLOCK_SIZE = 4000
+DRIVER_SIZE = 100000
+
+
+def stream(pool, deliveries, delivery):
+    """
+    Delivers samples to the pool like the driver callback and consumes every ready block.
+    """
+    start = 0
+    for _ in range(deliveries):
+        if start + delivery > DRIVER_SIZE:
+            start = 0
+        pool.write(start, delivery)
+        start += delivery
+        block = pool.acquire(timeout=0)
+        while block is not None:
+            pool.view(block)
+            pool.release(block)
+            block = pool.acquire(timeout=0)
+
+
+@pytest.mark.parametrize('delivery', [1000, 4000, 7000])
+def test_no_allocation_per_block(delivery):
+    pool = pico.BufferPool(['PS2000A_CHANNEL_A', 'PS2000A_CHANNEL_B'], BLOCK_SIZE, 3, DRIVER_SIZE)
+    pool.driver_buffer[:] = np.random.default_rng(0).integers(
+        -32000, 32000, size=pool.driver_buffer.shape)
+    # The first blocks fill the stream statistics
+    stream(pool, 100, delivery)
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        stream(pool, 2000, delivery)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # No block-sized array is allocated, even temporarily, and nothing is kept
+    assert peak - base < pool.blocks[0].nbytes // 4
+    assert current - base < 1024
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
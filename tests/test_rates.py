@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from rates import Aggregator
+
+INTERVAL = 0.00025
+BLOCK_SIZE = 4000
+DEPTH = 3
+# A POSIX time aligned on all the periods below
+START = 1700000000.0
+
+
+def reference(ticks, values, period):
+    """
+    Reduces samples per period from their whole sample ticks, without any float rounding.
+
+    Returns:
+        tuple: The period numbers, means, minimums, maximums and counts of the periods.
+    """
+    samples = max(1, round(period / INTERVAL))
+    keys, starts, counts = np.unique(ticks // samples, return_index=True, return_counts=True)
+    return (keys, np.add.reduceat(values, starts, axis=1) / counts,
+            np.minimum.reduceat(values, starts, axis=1),
+            np.maximum.reduceat(values, starts, axis=1), counts)
+
+
+def aggregate(period, blocks, dropped=(), jitter=None):
+    """
+    Feeds the blocks to an aggregator, except the dropped ones, and returns the periods it
+    completed with the samples it was fed. The times of the blocks are delayed by `jitter`.
+    """
+    rng = np.random.default_rng(0)
+    aggregator = Aggregator([0, 2], period, INTERVAL, BLOCK_SIZE, DEPTH)
+    results = []
+    ticks = []
+    values = []
+    for number in range(blocks):
+        block = rng.normal(size=(3, BLOCK_SIZE))
+        if number in dropped:
+            continue
+        slot = number % DEPTH
+        timestamp = START + number * BLOCK_SIZE * INTERVAL
+        if jitter is not None:
+            timestamp += jitter[number]
+        aggregator.process(block, timestamp, INTERVAL, slot)
+        # The results of a slot are overwritten by the next block of the slot
+        results.append([np.array(result, copy=True) for result in aggregator.results(slot)])
+        ticks.append(number * BLOCK_SIZE + np.arange(BLOCK_SIZE))
+        values.append(block[[0, 2]])
+    times, mean, minimum, maximum, samples = [np.concatenate(parts, axis=-1)
+                                              for parts in zip(*results)]
+    keys = np.round((times - START) / aggregator.period).astype(np.int64)
+    return ((keys, mean, minimum, maximum, samples), np.concatenate(ticks),
+            np.concatenate(values, axis=1))
+
+
+@pytest.mark.parametrize('period', [0.01, 0.05, 0.1, 0.2, INTERVAL, INTERVAL / 2])
+@pytest.mark.parametrize('dropped', [(), (7, 8, 20)])
+def test_periods_match_reference(period, dropped):
+    periods, ticks, values = aggregate(period, 40, dropped)
+    expected = reference(ticks, values, period)
+    # The last period is still carried by the aggregator
+    keys, mean, minimum, maximum, samples = periods
+    np.testing.assert_array_equal(keys, expected[0][:-1])
+    np.testing.assert_allclose(mean, expected[1][:, :-1])
+    np.testing.assert_array_equal(minimum, expected[2][:, :-1])
+    np.testing.assert_array_equal(maximum, expected[3][:, :-1])
+    np.testing.assert_array_equal(samples, expected[4][:-1])
+
+
+@pytest.mark.parametrize('period', [0.01, 0.05, 0.1])
+def test_constant_count(period):
+    periods, _, _ = aggregate(period, 40)
+    np.testing.assert_array_equal(np.unique(periods[4]), [round(period / INTERVAL)])
+
+
+@pytest.mark.parametrize('period', [0.01, 0.1])
+def test_jittered_times(period):
+    # Block times read from the clock after a callback latency of up to 12 ms
+    jitter = np.random.default_rng(1).uniform(0, 0.012, 300)
+    periods, ticks, _ = aggregate(period, 300, jitter=jitter)
+    keys, _, _, _, samples = periods
+    assert np.all(np.diff(keys) > 0)
+    # Every sample is counted once, except the ones of the period still carried
+    assert 0 <= ticks.size - samples.sum() <= round(period / INTERVAL)
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file
@@ -0,0 +1,70 @@
+import time
+import numpy as np
+import recorder
+from recorder import FlightRecorder, read_snapshot, write_snapshot
+
+INTERVAL = 0.001
+BLOCK_SIZE = 40
+START = 1700000000.0
+
+
+def test_snapshot_file_round_trip(tmp_path):
+    data = np.arange(-30, 30, dtype=np.int16).reshape(2, 30)
+    file_path = write_snapshot(str(tmp_path / 'snapshot.bin'), data, 12, START, INTERVAL,
+                               2000, 32512, "manuel é", ['A', 'B'])
+    snapshot = read_snapshot(file_path)
+    np.testing.assert_array_equal(snapshot['data'], data)
+    assert (snapshot['trigger'], snapshot['timestamp'], snapshot['interval']) == (12, START, INTERVAL)
+    assert (snapshot['range_mv'], snapshot['max_adc']) == (2000, 32512)
+    assert snapshot['reason'] == "manuel é"
+    assert snapshot['channels'] == ['A', 'B']
+
+
+def record(tmp_path, monkeypatch, event, blocks=30):
+    """
+    Streams a ramp through a flight recorder, calls `event` before the block it returns True
+    for, and returns the snapshot written and the ramp.
+    """
+    monkeypatch.setattr(recorder, 'create_folder', lambda: str(tmp_path))
+    monkeypatch.setattr(recorder, 'log_action', lambda *args: None)
+    flight_recorder = FlightRecorder(['A', 'B'], pre_seconds=0.1, post_seconds=0.05)
+    flight_recorder.start(INTERVAL, BLOCK_SIZE, 2000, 32512)
+    flight_recorder.configure(enabled=True)
+    ramp = np.arange(blocks * BLOCK_SIZE, dtype=np.int16)
+    for number in range(blocks):
+        block = ramp[number * BLOCK_SIZE:(number + 1) * BLOCK_SIZE]
+        event(flight_recorder, number)
+        flight_recorder.add(np.vstack((block, -block)), START + number * BLOCK_SIZE * INTERVAL)
+    deadline = time.monotonic() + 5
+    while flight_recorder.snapshots == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return read_snapshot(flight_recorder.last_snapshot), ramp
+
+
+def test_trigger_saves_window(tmp_path, monkeypatch):
+    snapshot, ramp = record(tmp_path, monkeypatch, lambda flight_recorder, number:
+                            number == 10 and flight_recorder.trigger("manuel"))
+    # The event is the last sample of the block the trigger is taken into account with
+    index = 11 * BLOCK_SIZE - 1
+    np.testing.assert_array_equal(snapshot['data'][0], ramp[index - 100:index + 50])
+    np.testing.assert_array_equal(snapshot['data'][1], -ramp[index - 100:index + 50])
+    assert snapshot['trigger'] == 100
+    assert snapshot['timestamp'] == START + (index - 100) * INTERVAL
+    assert snapshot['reason'] == "manuel"
+
+
+def test_level_trigger(tmp_path, monkeypatch):
+    def event(flight_recorder, number):
+        if number == 0:
+            flight_recorder.configure(level_channel=0, level_mv=500 * 2000 / 32512)
+    snapshot, ramp = record(tmp_path, monkeypatch, event)
+    assert snapshot['data'][0][snapshot['trigger']] == 500
+    assert snapshot['reason'] == "level A"
+
+
+def test_window_truncated_to_recorded_samples(tmp_path, monkeypatch):
+    snapshot, ramp = record(tmp_path, monkeypatch, lambda flight_recorder, number:
+                            number == 1 and flight_recorder.trigger("manuel"))
+    np.testing.assert_array_equal(snapshot['data'][0], ramp[:2 * BLOCK_SIZE - 1 + 50])
+    assert snapshot['trigger'] == 2 * BLOCK_SIZE - 1
+# © AIMA DEVELOPPEMENT 2024
\ No newline at end of file